@@ -4,6 +4,7 @@ import React, { createContext, useContext, useState, useEffect, ReactNode } from
 // @ts-ignore - Fuse.js doesn't have type definitions
 import Fuse from "fuse.js"
 import { SyntaxItem } from "@/types"
+import { decodeSyntaxData } from "@/lib/syntax-data"
 
 type SyntaxContextType = {
   syntaxItems: SyntaxItem[]
@@ -52,7 +53,8 @@ export function SyntaxProvider({ children }: { children: ReactNode }) {
           throw new Error(`Failed to fetch syntax data: ${response.status} ${response.statusText}`)
         }
         
-        const data = await response.json()
+        // syntax.json is either an array of items or the normalized export
+        const data = decodeSyntaxData(await response.json())
         console.log("Syntax data loaded:", data)
         setSyntaxItems(data)
         setFilteredItems(data)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark the AI enrichment step against the local mock Ollama server.
+
+Measures commands/sec, per-command p50/p95 latency and the overhead of
+retries, for each concurrency level given. Nothing is sent to a real model
+and the pipeline's data files are not touched. Run from the data_pipeline
+directory:
+
+    python benchmarks/bench_ai.py --commands 200 --concurrency 1,4,8 --error-rate 0.05
+"""
+
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+# Make the pipeline scripts importable
+sys.path.append(str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import utils
+import llm_cache
+import enrich_with_ai
+from mock_ollama import MockOllamaConfig, start_server
+
+def synthetic_commands(count):
+    """Generate commands that need both an explanation and tags"""
+    return [
+        {
+            "id": f"bench-{i}",
+            "command": f"tool{i} --option-{i % 7}",
+            "description": f"Run tool number {i} with one of its options",
+            "category": "bash",
+            "tags": [],
+            "examples": [{"code": f"tool{i} --option-{i % 7} path/to/file", "description": "Process a file"}]
+        }
+        for i in range(count)
+    ]
+
+def percentile(values, fraction):
+    """Return the value below which the given fraction of values fall"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run_once(config, concurrency, batch_tags):
+    """Run the AI step once and collect its measurements"""
+    latencies = []
+    backoff = []
+    enrich_command = enrich_with_ai.enrich_command
+    policy_backoff = enrich_with_ai.OLLAMA_RETRY.backoff
+
+    def timed_enrich_command(command, position):
+        start = time.perf_counter()
+        try:
+            return enrich_command(command, position)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    def recorded_backoff(attempt):
+        delay = policy_backoff(attempt)
+        backoff.append(delay)
+        return delay
+
+    # Start from scratch, so unchanged commands aren't carried over from the last run
+    if enrich_with_ai.OUTPUT_PATH.exists():
+        enrich_with_ai.OUTPUT_PATH.unlink()
+
+    config.requests = config.errors = config.aborted = 0
+    enrich_with_ai.enrich_command = timed_enrich_command
+    enrich_with_ai.OLLAMA_RETRY.backoff = recorded_backoff
+    enrich_with_ai.OLLAMA_BREAKER = utils.CircuitBreaker(
+        enrich_with_ai.OLLAMA_BREAKER_THRESHOLD, enrich_with_ai.OLLAMA_BREAKER_RESET, name="Ollama"
+    )
+    try:
+        start = time.perf_counter()
+        results = enrich_with_ai.enrich_with_ai_explanations_and_tags(concurrency=concurrency, batch_tags=batch_tags)
+        elapsed = time.perf_counter() - start
+    finally:
+        enrich_with_ai.enrich_command = enrich_command
+        del enrich_with_ai.OLLAMA_RETRY.backoff
+
+    return {
+        "elapsed": elapsed,
+        "commands": len(results),
+        "complete": sum(1 for c in results if c.get("explanation") and c.get("tags")),
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "requests": config.requests,
+        "errors": config.errors,
+        "retries": len(backoff),
+        "backoff": sum(backoff),
+    }
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark the AI enrichment step against a mock Ollama")
+    parser.add_argument("--commands", type=int, default=200, help="Number of commands to enrich")
+    parser.add_argument("--concurrency", default="1,4,8", help="Comma-separated concurrency levels to compare")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Typical time before the first token")
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "lognormal"], default="lognormal",
+                        help="Distribution of the time before the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="Token generation rate (0 for no delay)")
+    parser.add_argument("--explanation-words", type=int, default=150, help="Length of a generated explanation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second allowed (0 = no limit)")
+    parser.add_argument("--batch-tags", action="store_true", help="Request tags in batches")
+    parser.add_argument("--cache", action="store_true",
+                        help="Use a fresh LLM cache and run each level twice, cold then warm")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the mock server")
+    args = parser.parse_args()
+
+    utils.logger.setLevel(logging.ERROR)
+    config = MockOllamaConfig(latency_ms=args.latency_ms, latency_dist=args.latency_dist,
+                              tokens_per_sec=args.tokens_per_sec, error_rate=args.error_rate,
+                              explanation_words=args.explanation_words, seed=args.seed)
+    server = start_server(config)
+    enrich_with_ai.OLLAMA_HOST = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        enrich_with_ai.INPUT_PATH = tmp / "enriched_commands.jsonl"
+        enrich_with_ai.OUTPUT_PATH = tmp / "ai_explanations.jsonl"
+        enrich_with_ai.CHECKPOINT_PATH = tmp / "ai_explanations.checkpoint.jsonl"
+        utils.write_jsonl(synthetic_commands(args.commands), enrich_with_ai.INPUT_PATH)
+
+        print(f"Enriching {args.commands} commands against the mock server "
+              f"({args.latency_dist} latency ~{args.latency_ms:.0f}ms, {args.error_rate:.0%} errors)")
+        print(f"{'run':<16} {'cmd/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'requests':>9} {'retries':>8} "
+              f"{'backoff s':>10} {'complete':>9}")
+
+        for level in [int(value) for value in args.concurrency.split(",")]:
+            enrich_with_ai.RATE_LIMITER = utils.RateLimiter(args.rate_limit, burst=level)
+            runs = ["cold", "warm"] if args.cache else [""]
+            llm_cache.LLM_CACHE_ENABLED = args.cache
+            if llm_cache._cache is not None:
+                llm_cache._cache.close()
+                llm_cache._cache = None
+            llm_cache.LLM_CACHE_PATH = tmp / f"llm_cache_{level}.sqlite3"
+
+            for run in runs:
+                stats = run_once(config, level, args.batch_tags)
+                label = f"concurrency {level}" + (f" {run}" if run else "")
+                print(f"{label:<16} {stats['commands'] / stats['elapsed']:>8.1f} {stats['p50'] * 1000:>8.0f} "
+                      f"{stats['p95'] * 1000:>8.0f} {stats['requests']:>9} {stats['retries']:>8} "
+                      f"{stats['backoff']:>10.1f} {stats['complete']:>5}/{stats['commands']}")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark category and tag matching in enrich_data against the old
+per-pattern re.search loops, checking that both give identical results.
+
+Run from the data_pipeline directory:
+
+    python benchmarks/bench_enrich.py --records 100000
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+from pathlib import Path
+
+# Make the pipeline scripts importable
+sys.path.append(str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import enrich_data
+
+def legacy_assign_category(item):
+    """assign_category as it was before the compiled matcher"""
+    cmd = item.get("command", "").lower()
+    desc = item.get("description", "").lower()
+    text = f"{cmd} {desc}"
+
+    scores = Counter()
+    for category, patterns in enrich_data.CATEGORY_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, text, re.IGNORECASE):
+                scores[category] += 1
+
+    if scores:
+        return scores.most_common(1)[0][0]
+    return "other"
+
+def legacy_extract_tags(item):
+    """extract_tags as it was before the compiled matcher"""
+    cmd = item.get("command", "").lower()
+    desc = item.get("description", "").lower()
+    title = item.get("title", "").lower()
+    text = f"{title} {cmd} {desc}"
+
+    tags = set()
+    if " " not in cmd and len(cmd) > 1:
+        tags.add(cmd.split()[0].split("/")[-1])
+    if "language" in item:
+        tags.add(item["language"])
+    for tag, patterns in enrich_data.TAG_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, text, re.IGNORECASE):
+                tags.add(tag)
+                break
+    if "category" in item:
+        tags.add(item["category"])
+
+    return sorted(list(tags))[:5]
+
+def synthetic_records(count, seed=42):
+    """Generate records whose text mixes pattern keywords, near misses and filler"""
+    rng = random.Random(seed)
+    keywords = set()
+    for patterns in list(enrich_data.CATEGORY_PATTERNS.values()) + list(enrich_data.TAG_PATTERNS.values()):
+        keywords.update(p.replace(r"\b", "") for p in patterns)
+    keywords = sorted(keywords)
+    filler = ["the", "a", "of", "to", "with", "output", "show", "print", "given",
+              "multiple", "options", "remote", "local", "quickly", "all"]
+
+    records = []
+    for i in range(count):
+        words = []
+        for _ in range(rng.randint(4, 16)):
+            roll = rng.random()
+            if roll < 0.25:
+                word = rng.choice(keywords)
+            elif roll < 0.35:
+                # Keywords glued to other text, to exercise word boundaries
+                word = rng.choice(keywords) + rng.choice(["s", "ing", "-x", "_y", ".", ""])
+                word = rng.choice(["", "re", "un", "-"]) + word
+            else:
+                word = rng.choice(filler)
+            words.append(word.upper() if rng.random() < 0.05 else word)
+        command = rng.choice(keywords + filler) + (f"-{i % 7}" if rng.random() < 0.3 else "")
+        records.append({"command": command, "description": " ".join(words)})
+    return records
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark enrich_data category and tag matching")
+    parser.add_argument("--records", type=int, default=100000, help="Number of records to classify")
+    args = parser.parse_args()
+
+    records = synthetic_records(args.records)
+    print(f"Classifying {len(records)} synthetic records")
+
+    start = time.perf_counter()
+    legacy = [(legacy_assign_category(r), legacy_extract_tags(r)) for r in records]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new = [(enrich_data.assign_category(r), enrich_data.extract_tags(r)) for r in records]
+    new_time = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy, new) if a != b)
+    print(f"per-pattern re.search: {legacy_time:.2f}s ({len(records) / legacy_time:.0f} records/sec)")
+    print(f"compiled matcher:      {new_time:.2f}s ({len(records) / new_time:.0f} records/sec)")
+    print(f"speedup:               {legacy_time / new_time:.1f}x")
+    print(f"mismatches:            {mismatches}")
+
+    if enrich_data.np is not None:
+        start = time.perf_counter()
+        batch = enrich_data.classify_categories(records)
+        batch_time = time.perf_counter() - start
+        batch_mismatches = sum(1 for (category, _), b in zip(legacy, batch) if category != b)
+        print(f"batch categories:      {batch_time:.2f}s ({len(records) / batch_time:.0f} records/sec, "
+              f"{batch_mismatches} mismatches)")
+        mismatches += batch_mismatches
+
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
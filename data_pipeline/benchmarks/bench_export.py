@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Compare the size of syntax.json as an array of records and in the normalized format.
+
+Uses the scraped TLDR commands when they exist (data/raw/tldr/tldr_commands.jsonl),
+otherwise a synthetic corpus of the same shape. Reports the raw and gzipped
+size the browser downloads, the time to parse each file, and the time to
+decode the normalized records back into plain ones. Run
+from the data_pipeline directory:
+
+    python benchmarks/bench_export.py
+"""
+
+import sys
+import gzip
+import json
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+# Make the pipeline scripts importable
+sys.path.append(str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import utils
+import export_to_json
+from bench_json import load_corpus, best_time
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Compare the array and normalized export formats")
+    parser.add_argument("--commands", type=int, default=20000, help="Size of the synthetic corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs (best is reported)")
+    args = parser.parse_args()
+
+    utils.logger.setLevel(logging.WARNING)
+    commands = load_corpus(args.commands)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        files = [
+            ("array, pretty", tmp / "pretty.json", lambda path: utils.write_json_array(commands, path),
+             lambda data: data),
+            ("array, compact", tmp / "compact.json", lambda path: utils.write_json_array(commands, path, pretty=False),
+             lambda data: data),
+            ("normalized", tmp / "normalized.json", lambda path: export_to_json.write_normalized(commands, path),
+             export_to_json.decode_normalized)
+        ]
+
+        rows = []
+        for label, path, write, decode in files:
+            write(path)
+            raw = path.read_bytes()
+            data = json.loads(raw)
+            assert decode(data) == commands
+            # json.loads stands in for the browser's JSON.parse
+            parse = best_time(lambda: json.loads(raw), args.repeat)
+            rows.append((label, len(raw), len(gzip.compress(raw)), parse, best_time(lambda: decode(data), args.repeat)))
+
+    baseline = rows[0]
+    print(f"{'format':<16} {'size MB':>8} {'gzip MB':>8} {'vs pretty':>10} {'parse ms':>9} {'decode ms':>10}")
+    for label, size, gzipped, parse, decode in rows:
+        print(f"{label:<16} {size / 1e6:>8.2f} {gzipped / 1e6:>8.2f} {gzipped / baseline[2]:>9.0%} "
+              f"{parse * 1000:>9.1f} {decode * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
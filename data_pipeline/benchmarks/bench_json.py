@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark loading and saving the pipeline's data files with each JSON codec.
+
+Uses the scraped TLDR commands when they exist (data/raw/tldr/tldr_commands.jsonl),
+otherwise a synthetic corpus of the same shape. Compares the old text-mode
+json.load/json.dump(indent=2) round trip with utils.load_json/save_json and the
+JSON Lines helpers, for every codec that is installed. Run from the
+data_pipeline directory:
+
+    python benchmarks/bench_json.py --repeat 5
+"""
+
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+# Make the pipeline scripts importable
+sys.path.append(str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import utils
+import enrich_data
+
+def synthetic_commands(count, seed=42):
+    """Generate command records shaped like enriched TLDR pages"""
+    rng = random.Random(seed)
+    words = ["list", "files", "in", "the", "current", "directory", "show", "hidden", "größe",
+             "recursively", "compress", "archive", "remote", "server", "with", "verbose", "output"]
+    commands = []
+    for i in range(count):
+        name = f"tool{i}"
+        commands.append({
+            "id": f"{i:012x}",
+            "command": name,
+            "description": " ".join(rng.choice(words) for _ in range(rng.randint(6, 20))),
+            "category": rng.choice(["file-management", "networking", "text-processing", "other"]),
+            "tags": sorted({rng.choice(words) for _ in range(4)}),
+            "examples": [
+                {"code": f"{name} --option-{j} {{{{path/to/file}}}}",
+                 "description": " ".join(rng.choice(words) for _ in range(8))}
+                for j in range(rng.randint(3, 8))
+            ],
+            "source": {"name": "TLDR Pages", "url": f"https://github.com/tldr-pages/tldr/blob/main/pages/common/{name}.md"},
+            "created_at": "2025-01-01T00:00:00",
+            "updated_at": "2025-01-01T00:00:00"
+        })
+    return commands
+
+def load_corpus(count):
+    """Load the scraped commands, or generate a synthetic corpus"""
+    if enrich_data.INPUT_FILE.exists():
+        commands = list(utils.iter_jsonl(enrich_data.INPUT_FILE))
+        print(f"Using {len(commands)} commands from {enrich_data.INPUT_FILE}")
+        return commands
+    print(f"Scraped commands not found, using {count} synthetic commands")
+    return synthetic_commands(count)
+
+def best_time(func, repeat):
+    """Return the best time of several calls"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def legacy_save(data, path):
+    """save_json as it was before the codec layer"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+def legacy_load(path):
+    """load_json as it was before the codec layer"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark JSON load/save times for each codec")
+    parser.add_argument("--commands", type=int, default=20000, help="Size of the synthetic corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs (best is reported)")
+    args = parser.parse_args()
+
+    utils.logger.setLevel(logging.WARNING)
+    commands = load_corpus(args.commands)
+    codecs = [name for name in ("stdlib", "msgspec", "orjson")
+              if name == "stdlib" or getattr(utils, name) is not None]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        rows = []
+
+        path = tmp / "legacy.json"
+        save = best_time(lambda: legacy_save(commands, path), args.repeat)
+        load = best_time(lambda: legacy_load(path), args.repeat)
+        rows.append(("legacy", "pretty array", save, load, path.stat().st_size))
+
+        for name in codecs:
+            utils.CODEC = utils.get_codec(name)
+            for label, pretty in (("pretty array", True), ("compact array", False)):
+                path = tmp / f"{name}-{pretty}.json"
+                save = best_time(lambda: utils.save_json(commands, path, pretty=pretty), args.repeat)
+                load = best_time(lambda: utils.load_json(path), args.repeat)
+                assert utils.load_json(path) == commands
+                rows.append((name, label, save, load, path.stat().st_size))
+
+            path = tmp / f"{name}.jsonl"
+            save = best_time(lambda: utils.write_jsonl(commands, path), args.repeat)
+            load = best_time(lambda: sum(1 for _ in utils.iter_jsonl(path)), args.repeat)
+            assert list(utils.iter_jsonl(path)) == commands
+            rows.append((name, "jsonl", save, load, path.stat().st_size))
+
+    legacy_total = rows[0][2] + rows[0][3]
+    print(f"{'codec':<8} {'format':<14} {'save ms':>8} {'load ms':>8} {'size MB':>8} {'speedup':>8}")
+    for name, label, save, load, size in rows:
+        print(f"{name:<8} {label:<14} {save * 1000:>8.1f} {load * 1000:>8.1f} {size / 1e6:>8.2f} "
+              f"{legacy_total / (save + load):>7.1f}x")
+
+if __name__ == "__main__":
+    main()
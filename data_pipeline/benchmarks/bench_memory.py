@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Measure the memory held by command records as plain dicts and as utils.Command.
+
+Uses the scraped TLDR commands when they exist (data/raw/tldr/tldr_commands.jsonl),
+otherwise a synthetic corpus of the same shape. The records are written to a
+JSON Lines file and read back, as the stages do, and tracemalloc measures the
+memory held once they are all loaded, and once they are all enriched. The old
+dict-based enrich_item is kept here for comparison. Run from the
+data_pipeline directory:
+
+    python benchmarks/bench_memory.py --commands 50000
+"""
+
+import gc
+import sys
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+# Make the pipeline scripts importable
+sys.path.append(str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import utils
+import enrich_data
+from bench_json import load_corpus
+
+def legacy_enrich_item(item):
+    """enrich_item as it was before the record model: a full dict copy per item"""
+    enriched = item.copy()
+    for field in ["command", "description", "category"]:
+        if field not in enriched:
+            enriched[field] = ""
+    enriched["category"] = enrich_data.assign_category(item)
+    enriched["tags"] = enrich_data.extract_tags(enriched)
+    if not enriched.get("created_at"):
+        enriched["created_at"] = utils.get_timestamp()
+    enriched["updated_at"] = utils.get_timestamp()
+    return enriched
+
+def measure(build):
+    """Return the memory held by what build returns, and the peak while building it"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, held, peak
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Measure the memory held by command records")
+    parser.add_argument("--commands", type=int, default=50000, help="Size of the synthetic corpus")
+    args = parser.parse_args()
+
+    commands = load_corpus(args.commands)
+    utils.logger.setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "commands.jsonl"
+        utils.write_jsonl(commands, path)
+        del commands
+
+        rows = []
+        for label, build in (
+            ("loaded, dicts", lambda: list(utils.iter_jsonl(path))),
+            ("loaded, Commands", lambda: list(utils.iter_commands(path))),
+            ("enriched, dicts", lambda: list(map(legacy_enrich_item, utils.iter_jsonl(path)))),
+            ("enriched, Commands", lambda: list(enrich_data.enrich_records(utils.iter_commands(path))))
+        ):
+            records, held, peak = measure(build)
+            rows.append((label, len(records), held, peak))
+            del records
+
+    print(f"{'records':<20} {'count':>7} {'held MB':>8} {'peak MB':>8} {'bytes/record':>13}")
+    for label, count, held, peak in rows:
+        print(f"{label:<20} {count:>7} {held / 1e6:>8.1f} {peak / 1e6:>8.1f} {held / max(count, 1):>13.0f}")
+    for stage, (dicts, commands) in (("loaded", rows[0:2]), ("enriched", rows[2:4])):
+        print(f"{stage}: Commands hold {1 - commands[2] / dicts[2]:.0%} less memory than dicts")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark the line-oriented TLDR page parser against the old regex parser.
+
+Uses the pages of the local TLDR clone when it exists, otherwise a synthetic
+corpus. Run from the data_pipeline directory:
+
+    python benchmarks/bench_parser.py
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Make the pipeline scripts importable
+sys.path.append(str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import scrape_tldr
+
+def legacy_parse_page(content):
+    """The regex-based parser parse_md_file used before the line parser"""
+    title_match = re.search(r"^# (.*?)$", content, re.MULTILINE)
+    if not title_match:
+        return None
+    title = title_match.group(1).strip()
+
+    desc_match = re.search(r"^# .*?\n> (.*?)(?:\n>|\n\n)", content, re.DOTALL)
+    description = desc_match.group(1).strip() if desc_match else ""
+    description = re.sub(r"\s+", " ", description)
+
+    examples = []
+    for example_desc, cmd in re.findall(r"- (.*?):\n\n`(.*?)`", content, re.DOTALL):
+        examples.append((re.sub(r"\s+", " ", example_desc.strip()), cmd.strip()))
+
+    return title, description, examples
+
+def synthetic_page(rng, name):
+    """Build a page in the TLDR format with some of the spacing variations found in practice"""
+    lines = [f"# {name}", "", f"> Tool number {name}.", "> It does several things.",
+             f"> More information: <https://example.com/{name}>.", ""]
+    for i in range(rng.randint(3, 8)):
+        lines.append(f"- Example {i} of {name}, with a `flag`:")
+        # Some pages have no blank line or trailing whitespace between the parts
+        if rng.random() < 0.9:
+            lines.append("")
+        code = f"`{name} --option-{i} {{{{path/to/file}}}}`"
+        lines.append(code + (" " if rng.random() < 0.05 else ""))
+        lines.append("")
+    return "\n".join(lines)
+
+def malformed_page(size):
+    """A page of example descriptions with no code, the worst case for the old pattern"""
+    return "# broken\n\n> Broken page.\n\n" + "- an example without code\n" * size
+
+def load_corpus(count):
+    """Load pages from the TLDR clone, or generate a synthetic corpus"""
+    pages_dir = scrape_tldr.CLONE_DIR / "pages"
+    if pages_dir.exists():
+        files = sorted(pages_dir.glob("**/*.md"))[:count]
+        print(f"Using {len(files)} pages from {pages_dir}")
+        return [f.read_text(encoding="utf-8") for f in files]
+
+    rng = random.Random(42)
+    print(f"TLDR clone not found, using {count} synthetic pages")
+    return [synthetic_page(rng, f"cmd{i}") for i in range(count)]
+
+def time_parser(parse, pages, repeat):
+    """Return the best time of several runs parsing every page"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in pages:
+            parse(page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark the TLDR page parsers")
+    parser.add_argument("--pages", type=int, default=6000, help="Number of pages to parse")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs (best is reported)")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.pages)
+
+    legacy_time = time_parser(legacy_parse_page, pages, args.repeat)
+    new_time = time_parser(scrape_tldr.parse_page, pages, args.repeat)
+    print(f"regex parser: {legacy_time:.3f}s ({len(pages) / legacy_time:.0f} pages/sec)")
+    print(f"line parser:  {new_time:.3f}s ({len(pages) / new_time:.0f} pages/sec)")
+    print(f"speedup:      {legacy_time / new_time:.1f}x")
+
+    # Compare what each parser extracted
+    legacy_examples = new_examples = differing = 0
+    for page in pages:
+        legacy = legacy_parse_page(page)
+        new = scrape_tldr.parse_page(page)
+        legacy_examples += len(legacy[2]) if legacy else 0
+        new_examples += len(new[2]) if new else 0
+        if (legacy and legacy[2]) != (new and new[2]):
+            differing += 1
+    print(f"examples found: regex {legacy_examples}, line {new_examples} "
+          f"({differing} pages differ)")
+
+    # Show how each parser scales on a malformed page
+    for size in (250, 500, 1000):
+        page = malformed_page(size)
+        legacy_time = time_parser(legacy_parse_page, [page], 1)
+        new_time = time_parser(scrape_tldr.parse_page, [page], 1)
+        print(f"malformed page with {size} lines: regex {legacy_time * 1000:.1f}ms, "
+              f"line {new_time * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    main()
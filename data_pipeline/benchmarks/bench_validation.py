@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark schema validation with jsonschema against the generated record types.
+
+Validates a synthetic corpus record by record with jsonschema (--strict), with
+the msgspec types generated from the schema, and by decoding a syntax.json
+file with the types in one native pass. Needs msgspec. Run from the
+data_pipeline directory:
+
+    python benchmarks/bench_validation.py --commands 100000
+"""
+
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+# Make the pipeline scripts importable
+sys.path.append(str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import utils
+import validation
+from bench_json import synthetic_commands
+
+def timed(func):
+    """Return the result of a call and the time it took"""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark jsonschema validation against the generated record types")
+    parser.add_argument("--commands", type=int, default=100000, help="Size of the synthetic corpus")
+    args = parser.parse_args()
+
+    utils.logger.setLevel(logging.WARNING)
+    if validation.fast_types() is None:
+        print("The generated record types are unavailable (is msgspec installed and record_types.py up to date?)")
+        return
+
+    commands = synthetic_commands(args.commands)
+    rows = []
+
+    report, elapsed = timed(lambda: validation.validate_records(commands, strict=True))
+    rows.append(("jsonschema, per record", report, elapsed))
+    report, elapsed = timed(lambda: validation.validate_records(commands))
+    rows.append(("record types, per record", report, elapsed))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "syntax.json"
+        utils.save_json(commands, path, pretty=False)
+        report, elapsed = timed(lambda: validation.validate_file(path, strict=True))
+        rows.append(("jsonschema, file", report, elapsed))
+        report, elapsed = timed(lambda: validation.validate_file(path))
+        rows.append(("record types, file", report, elapsed))
+
+    baseline = rows[0][2]
+    print(f"{'method':<26} {'records':>8} {'seconds':>8} {'records/sec':>12} {'speedup':>8}")
+    for name, report, elapsed in rows:
+        assert report.valid and report.checked == len(commands)
+        print(f"{name:<26} {report.checked:>8} {elapsed:>8.2f} {report.checked / elapsed:>12.0f} "
+              f"{baseline / elapsed:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Ollama API, for benchmarking the AI step offline.
+
+Implements GET /api/version and POST /api/generate, with and without
+streaming. Replies follow the shape the pipeline asks for: an explanation,
+a JSON array of tags, a JSON object of batched tags, or a structured
+explanation-and-tags object. Latency, error rate and token rate can be
+configured. Run from the data_pipeline directory:
+
+    python benchmarks/mock_ollama.py --port 11435 --latency-ms 200 --error-rate 0.05
+
+then point the pipeline at it with OLLAMA_HOST=http://localhost:11435.
+"""
+
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+WORDS = ("the command reads input files and writes the result to standard output "
+         "use options to change how it works and check the manual for details").split()
+
+TAGS = ["filesystem", "networking", "search", "permissions", "compression",
+        "text", "process", "archive", "system", "development"]
+
+class MockOllamaConfig:
+    """
+    Behaviour of the mock server.
+
+    Latency is the time before the first token. It is fixed, uniform on
+    [0, 2 * latency_ms], or lognormal with median latency_ms. Tokens then
+    arrive at tokens_per_sec (0 sends them all at once). A fraction of
+    requests fails with error_status instead.
+    """
+
+    def __init__(self, latency_ms: float = 100.0, latency_dist: str = "lognormal",
+                 latency_sigma: float = 0.5, tokens_per_sec: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 500,
+                 explanation_words: int = 150, seed: Optional[int] = None):
+        """
+        Create a configuration.
+
+        Args:
+            latency_ms: Typical time before the first token, in milliseconds
+            latency_dist: "fixed", "uniform" or "lognormal"
+            latency_sigma: Spread of the lognormal distribution
+            tokens_per_sec: Token generation rate (0 for no delay between tokens)
+            error_rate: Fraction of generate requests that fail
+            error_status: HTTP status of a failed request
+            explanation_words: Length of a generated explanation
+            seed: Optional seed for repeatable runs
+        """
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.latency_sigma = latency_sigma
+        self.tokens_per_sec = tokens_per_sec
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.explanation_words = explanation_words
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+        # Counters, read by the benchmark
+        self.requests = 0
+        self.errors = 0
+        self.aborted = 0
+
+    def latency(self) -> float:
+        """Draw the time before the first token, in seconds"""
+        with self.lock:
+            if self.latency_dist == "fixed":
+                value = self.latency_ms
+            elif self.latency_dist == "uniform":
+                value = self.rng.uniform(0, 2 * self.latency_ms)
+            else:
+                value = self.latency_ms * self.rng.lognormvariate(0, self.latency_sigma)
+        return value / 1000
+
+    def should_fail(self) -> bool:
+        """Decide whether the next request fails"""
+        with self.lock:
+            return self.rng.random() < self.error_rate
+
+    def count(self, name: str):
+        """Increment a counter"""
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+def generate_response(prompt: str, response_format: Any, config: MockOllamaConfig) -> str:
+    """
+    Build a reply in the shape the prompt asks for.
+
+    Args:
+        prompt: The request prompt
+        response_format: The request's "format" field, if any
+        config: Server configuration
+
+    Returns:
+        The reply text
+    """
+    command = re.search(r"Command: (.*)", prompt)
+    name = command.group(1).strip() if command else "command"
+    seed = sum(map(ord, name))
+    tags = [TAGS[seed % len(TAGS)], TAGS[(seed // 3 + 1) % len(TAGS)]]
+
+    if "maps each command number" in prompt:
+        numbers = re.findall(r"^(\d+)\. Command", prompt, re.MULTILINE)
+        return json.dumps({number: tags for number in numbers})
+    if "JSON array" in prompt:
+        return json.dumps(tags)
+
+    words = [f"{name}:"] + [WORDS[i % len(WORDS)] for i in range(config.explanation_words)]
+    explanation = " ".join(words)
+    if response_format:
+        return json.dumps({"explanation": explanation, "tags": tags})
+    return explanation
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    """Request handler for the mock server; the config is set on the server"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        """Keep request logging quiet"""
+
+    def handle(self):
+        """Handle requests until the client closes the connection, however it does so"""
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def send_json(self, status: int, data: Dict[str, Any]):
+        """Send a complete JSON response"""
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunk(self, data: bytes):
+        """Send one chunk of a chunked response"""
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        """Handle /api/version"""
+        if self.path == "/api/version":
+            self.send_json(200, {"version": "0.0.0-mock"})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        """Handle /api/generate"""
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/api/generate":
+            self.send_json(404, {"error": "not found"})
+            return
+
+        config = self.server.config
+        config.count("requests")
+        time.sleep(config.latency())
+
+        if config.should_fail():
+            config.count("errors")
+            self.send_json(config.error_status, {"error": "mock failure"})
+            return
+
+        text = generate_response(payload.get("prompt", ""), payload.get("format"), config)
+        # Whitespace-separated pieces stand in for tokens
+        tokens = re.findall(r"\S+\s*", text)
+        delay = 1 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0
+
+        if not payload.get("stream", True):
+            time.sleep(delay * len(tokens))
+            self.send_json(200, {"model": payload.get("model"), "response": text, "done": True})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for token in tokens:
+                time.sleep(delay)
+                self.send_chunk(json.dumps({"response": token, "done": False}).encode("utf-8") + b"\n")
+            self.send_chunk(json.dumps({"response": "", "done": True}).encode("utf-8") + b"\n")
+            self.send_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, e.g. at its word budget
+            config.count("aborted")
+            self.close_connection = True
+
+def start_server(config: MockOllamaConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """
+    Start the mock server on a background thread.
+
+    Args:
+        config: Server configuration
+        host: Interface to listen on
+        port: Port to listen on (0 picks a free one)
+
+    Returns:
+        The running server; its address is server.server_address
+    """
+    server = ThreadingHTTPServer((host, port), MockOllamaHandler)
+    server.daemon_threads = True
+    server.config = config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    """Run the mock server in the foreground"""
+    parser = argparse.ArgumentParser(description="Local stand-in for the Ollama API")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=11435, help="Port to listen on")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Typical time before the first token")
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "lognormal"], default="lognormal",
+                        help="Distribution of the time before the first token")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Spread of the lognormal distribution")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="Token generation rate (0 for no delay)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of generate requests that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of a failed request")
+    parser.add_argument("--explanation-words", type=int, default=150, help="Length of a generated explanation")
+    parser.add_argument("--seed", type=int, help="Seed for repeatable runs")
+    args = parser.parse_args()
+
+    config = MockOllamaConfig(args.latency_ms, args.latency_dist, args.latency_sigma, args.tokens_per_sec,
+                              args.error_rate, args.error_status, args.explanation_words, args.seed)
+    server = start_server(config, args.host, args.port)
+    print(f"Mock Ollama listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Served {config.requests} requests ({config.errors} errors, {config.aborted} aborted streams)")
+
+if __name__ == "__main__":
+    main()
@@ -3,110 +3,172 @@
 Script to combine data from different sources into a single dataset.
 """
 
+import argparse
 import utils
+import validation
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, Iterator, List
 
 logger = utils.logger
 
 # Input/output paths
-ENRICHED_PATH = utils.DATA_DIR / "processed" / "enriched_commands.json"
-AI_EXPLANATIONS_PATH = utils.DATA_DIR / "processed" / "ai_explanations.json"
-OUTPUT_PATH = utils.DATA_DIR / "processed" / "combined_data.json"
+ENRICHED_PATH = utils.DATA_DIR / "processed" / "enriched_commands.jsonl"
+AI_EXPLANATIONS_PATH = utils.DATA_DIR / "processed" / "ai_explanations.jsonl"
+OUTPUT_PATH = utils.DATA_DIR / "processed" / "combined_data.jsonl"
 
-def combine_data() -> List[Dict[str, Any]]:
+def combine_records(enriched_commands: Iterable[Dict[str, Any]],
+                    ai_commands: Iterable[Dict[str, Any]] = (),
+                    fail_fast: bool = False) -> Iterator[utils.Command]:
     """
-    Combine data from different sources into a single dataset.
+    Merge AI explanations and tags into the enriched commands, without touching any file.
 
-    Returns:
-        List of combined command entries
-    """
-    # Load the enriched command data
-    if not ENRICHED_PATH.exists():
-        logger.error(f"Enriched commands file not found: {ENRICHED_PATH}")
-        return []
+    The AI results are indexed by ID; the enriched commands are streamed
+    through one at a time. An enriched command whose ID was already seen is
+    dropped, so the first of any duplicates is kept. AI results for commands
+    that aren't among the enriched ones come last. Each combined command is
+    validated against the schema as it goes by, and the errors are logged at
+    the end.
 
-    enriched_commands = utils.load_json(ENRICHED_PATH)
-    logger.info(f"Loaded {len(enriched_commands)} enriched commands from {ENRICHED_PATH}")
-
-    # Load the AI explanations data if available
-    ai_commands = []
-    if AI_EXPLANATIONS_PATH.exists():
-        ai_commands = utils.load_json(AI_EXPLANATIONS_PATH)
-        logger.info(f"Loaded {len(ai_commands)} commands with AI explanations from {AI_EXPLANATIONS_PATH}")
-
-    # Create a dictionary of commands by ID for easier merging
-    command_dict = {cmd.get('id'): cmd for cmd in enriched_commands if cmd.get('id')}
-
-    # Merge in AI explanations and tags
-    for cmd in ai_commands:
-        cmd_id = cmd.get('id')
-        if not cmd_id:
-            continue
-
-        if cmd_id in command_dict:
-            # Update the explanation if it exists
-            if cmd.get('explanation'):
-                command_dict[cmd_id]['explanation'] = cmd['explanation']
-                command_dict[cmd_id]['updated_at'] = cmd.get('updated_at', utils.get_timestamp())
-            
-            # Update tags if they exist in the AI data
-            if cmd.get('tags') and len(cmd.get('tags', [])) > 0:
-                # If the original command already has tags, merge them and remove duplicates
-                if command_dict[cmd_id].get('tags'):
-                    # Combine AI tags with existing tags, removing duplicates
-                    existing_tags = set(command_dict[cmd_id]['tags'])
-                    ai_tags = set(cmd['tags'])
-                    combined_tags = list(existing_tags.union(ai_tags))
-                    # Limit to a reasonable number of tags (e.g., 5)
-                    command_dict[cmd_id]['tags'] = combined_tags[:5]
-                else:
-                    # Just use the AI tags if none exist
-                    command_dict[cmd_id]['tags'] = cmd['tags']
-                
-                command_dict[cmd_id]['updated_at'] = cmd.get('updated_at', utils.get_timestamp())
-        else:
-            # Add the command if it's not already in the dictionary
-            command_dict[cmd_id] = cmd
-
-    # Convert back to a list
-    combined_commands = list(command_dict.values())
-
-    # Validate against schema
-    if not utils.validate_against_schema(combined_commands):
-        logger.warning("Combined data does not fully conform to schema")
+    Args:
+        enriched_commands: Commands with categories and tags
+        ai_commands: Commands with AI explanations and tags
+        fail_fast: Stop at the first command that doesn't match the schema
 
-    # Save the combined data
-    utils.save_json(combined_commands, OUTPUT_PATH)
-    logger.info(f"Saved {len(combined_commands)} combined commands to {OUTPUT_PATH}")
+    Yields:
+        Combined command entries, as copies of the inputs
+
+    Raises:
+        validation.RecordValidationError: In fail-fast mode, for the first invalid command
+    """
+    ai_by_id = {cmd.get('id'): cmd for cmd in ai_commands if cmd.get('id')}
+    validator = validation.get_validator()
+    types = validation.fast_types()
+    report = validation.ValidationReport()
 
-    # Print statistics
     categories = {}
-    with_explanation = 0
-    with_tags = 0
+    total = with_explanation = with_tags = duplicates = 0
+
+    def merged(combined):
+        """Merge the AI results for one enriched command into it"""
+        cmd = ai_by_id.get(combined.id)
+        if cmd is None:
+            return combined
 
-    for cmd in combined_commands:
+        # Update the explanation if it exists
+        if cmd.get('explanation'):
+            combined['explanation'] = cmd['explanation']
+            combined['updated_at'] = cmd.get('updated_at', utils.get_timestamp())
+
+        # Update tags if they exist in the AI data
+        if cmd.get('tags') and len(cmd.get('tags', [])) > 0:
+            # If the original command already has tags, merge them and remove duplicates
+            if combined.get('tags'):
+                # Combine AI tags with existing tags, removing duplicates; keep
+                # their order so the output is the same from run to run
+                combined_tags = list(dict.fromkeys(combined['tags'] + cmd['tags']))
+                # Limit to a reasonable number of tags (e.g., 5)
+                combined['tags'] = combined_tags[:5]
+            else:
+                # Just use the AI tags if none exist
+                combined['tags'] = cmd['tags']
+
+            combined['updated_at'] = cmd.get('updated_at', utils.get_timestamp())
+        return combined
+
+    def combined_commands():
+        """The enriched commands with their AI results, then the AI-only commands"""
+        nonlocal duplicates
+        ai_only = dict(ai_by_id)
+        seen = set()
+        for enriched in enriched_commands:
+            command_id = enriched.get('id')
+            if not command_id:
+                continue
+            if command_id in seen:
+                duplicates += 1
+                continue
+            seen.add(command_id)
+            ai_only.pop(command_id, None)
+            yield merged(utils.Command.from_dict(enriched))
+
+        # Add the commands that are only in the AI data
+        yield from map(utils.Command.from_dict, ai_only.values())
+
+    for cmd in combined_commands():
+        # Validate against schema
+        errors = validation.validate_record(cmd, total, validator, types)
+        report.add(errors)
+        if errors and fail_fast:
+            raise validation.RecordValidationError(errors)
+
+        total += 1
         category = cmd.get('category', 'unknown')
         categories[category] = categories.get(category, 0) + 1
-
         if cmd.get('explanation'):
             with_explanation += 1
-        
         if cmd.get('tags') and len(cmd.get('tags', [])) > 0:
             with_tags += 1
+        yield cmd
+
+    report.log_summary("Combined data")
+    if duplicates:
+        logger.warning(f"Dropped {duplicates} enriched commands with an ID that was already seen")
 
-    logger.info(f"Commands with explanations: {with_explanation}/{len(combined_commands)}")
-    logger.info(f"Commands with tags: {with_tags}/{len(combined_commands)}")
+    # Print statistics
+    logger.info(f"Commands with explanations: {with_explanation}/{total}")
+    logger.info(f"Commands with tags: {with_tags}/{total}")
 
     logger.info("Category breakdown:")
     for category, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
         logger.info(f"  - {category}: {count} commands")
 
-    return combined_commands
+def load_ai_commands() -> List[utils.Command]:
+    """
+    Load the AI explanations data if available.
+
+    Returns:
+        List of commands with AI explanations, empty if there are none
+    """
+    if not AI_EXPLANATIONS_PATH.exists():
+        return []
+    ai_commands = list(utils.iter_commands(AI_EXPLANATIONS_PATH))
+    logger.info(f"Loaded {len(ai_commands)} commands with AI explanations from {AI_EXPLANATIONS_PATH}")
+    return ai_commands
+
+def combine_data(fail_fast: bool = False) -> int:
+    """
+    Combine data from different sources into a single dataset.
+
+    Enriched commands are streamed from their file to the output file.
+
+    Args:
+        fail_fast: Stop at the first command that doesn't match the schema
+
+    Returns:
+        Number of combined command entries
+    """
+    # Load the enriched command data
+    if not ENRICHED_PATH.exists():
+        logger.error(f"Enriched commands file not found: {ENRICHED_PATH}")
+        return 0
+
+    logger.info(f"Combining enriched commands from {ENRICHED_PATH}")
+    combined = combine_records(utils.iter_commands(ENRICHED_PATH), load_ai_commands(), fail_fast)
+
+    # Save the combined data
+    count = utils.write_jsonl(combined, OUTPUT_PATH)
+    logger.info(f"Saved {count} combined commands to {OUTPUT_PATH}")
+
+    return count
 
 def main():
-    """Run the script"""
-    combine_data()
+    """Parse arguments and run the script"""
+    parser = argparse.ArgumentParser(description="Combine data from different sources into a single dataset")
+    parser.add_argument("--fail-fast", action="store_true", help="Stop at the first command that doesn't match the schema")
+
+    args = parser.parse_args()
+
+    combine_data(fail_fast=args.fail_fast)
 
 if __name__ == "__main__":
     main()
@@ -4,14 +4,21 @@ Script to enrich command data with categories and tags.
 """
 
 import re
+import argparse
 from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 import utils
 
+try:
+    import numpy as np
+except ImportError:  # Only needed for batch classification
+    np = None
+
 logger = utils.logger
 
 # Setup paths
-INPUT_FILE = utils.DATA_DIR / "raw" / "tldr" / "tldr_commands.json"
-OUTPUT_FILE = utils.DATA_DIR / "processed" / "enriched_commands.json"
+INPUT_FILE = utils.DATA_DIR / "raw" / "tldr" / "tldr_commands.jsonl"
+OUTPUT_FILE = utils.DATA_DIR / "processed" / "enriched_commands.jsonl"
 
 # Ensure output directory exists
 OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
@@ -81,24 +88,206 @@ TAG_PATTERNS = {
     "text": [r"text", r"string", r"pattern", r"replace", r"format"],
 }
 
+# Matches a keyword pattern, optionally wrapped in word boundaries
+KEYWORD_PATTERN_RE = re.compile(r"(\\b)?([\w-]+)(\\b)?")
+
+# Runs of characters a keyword can be made of
+TOKEN_RE = re.compile(r"[\w-]+")
+
+# Number of distinct tokens to remember before the token cache is reset
+MAX_CACHED_TOKENS = 200000
+
+class KeywordMatcher:
+    """
+    Finds which of a set of keyword patterns match a text in a single scan.
+
+    Every keyword is made of word characters and hyphens, so it can only match
+    inside a run of those characters, and whether it matches there (word
+    boundaries included) depends only on the run itself. The text is split into
+    runs with one compiled findall, and the patterns matching each distinct run
+    are worked out once and remembered. Most records then cost one scan plus a
+    few dictionary lookups, with results identical to calling re.search for
+    every pattern. Patterns that are not plain keywords are still searched in
+    the whole text.
+    """
+
+    def __init__(self, groups: Dict[str, List[str]]):
+        """
+        Build the matcher.
+
+        Args:
+            groups: Dictionary mapping group names (categories or tags) to
+                lists of keyword patterns
+        """
+        self.groups = list(groups)
+        self.pattern_groups = []
+        self.compiled = []
+        self.keyword_patterns = []
+        self.other_patterns = []
+        self.token_cache = {}
+
+        for group_index, patterns in enumerate(groups.values()):
+            for pattern in patterns:
+                match = KEYWORD_PATTERN_RE.fullmatch(pattern)
+                if match and bool(match.group(1)) == bool(match.group(3)):
+                    self.keyword_patterns.append(len(self.compiled))
+                else:
+                    self.other_patterns.append(len(self.compiled))
+                self.pattern_groups.append(group_index)
+                self.compiled.append(re.compile(pattern, re.IGNORECASE))
+
+    def _token_patterns(self, token: str) -> frozenset:
+        """Find the keyword patterns matching inside a single token"""
+        return frozenset(
+            index for index in self.keyword_patterns
+            if self.compiled[index].search(token)
+        )
+
+    def matching_patterns(self, text: str) -> Set[int]:
+        """
+        Find every pattern that matches somewhere in the text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Set of pattern indexes, in declaration order across all groups
+        """
+        matched = set()
+        cache = self.token_cache
+
+        for token in set(TOKEN_RE.findall(text)):
+            patterns = cache.get(token)
+            if patterns is None:
+                if len(cache) >= MAX_CACHED_TOKENS:
+                    cache.clear()
+                patterns = cache[token] = self._token_patterns(token)
+            matched |= patterns
+
+        for index in self.other_patterns:
+            if self.compiled[index].search(text):
+                matched.add(index)
+
+        return matched
+
+    def scores(self, text: str) -> Counter:
+        """
+        Count the matching patterns of each group.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Counter of group name to number of matching patterns, holding only
+            groups with at least one match, in declaration order
+        """
+        counts = [0] * len(self.groups)
+        for index in self.matching_patterns(text):
+            counts[self.pattern_groups[index]] += 1
+
+        scores = Counter()
+        for group, count in zip(self.groups, counts):
+            if count:
+                scores[group] = count
+        return scores
+
+    def matching_groups(self, text: str) -> Set[str]:
+        """
+        Find the groups with at least one matching pattern.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Set of group names
+        """
+        return {self.groups[self.pattern_groups[index]] for index in self.matching_patterns(text)}
+
+# Built once at import and shared by every record
+CATEGORY_MATCHER = KeywordMatcher(CATEGORY_PATTERNS)
+TAG_MATCHER = KeywordMatcher(TAG_PATTERNS)
+
 def assign_category(item):
     """Assign a category to an item based on its command and description"""
     cmd = item.get("command", "").lower()
     desc = item.get("description", "").lower()
     text = f"{cmd} {desc}"
 
-    scores = Counter()
-
-    for category, patterns in CATEGORY_PATTERNS.items():
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                scores[category] += 1
+    scores = CATEGORY_MATCHER.scores(text)
 
     # Return the category with the highest score, or a default
     if scores:
         return scores.most_common(1)[0][0]
     return "other"
 
+def classify_categories(items: List[Dict], tfidf: bool = False) -> List[str]:
+    """
+    Assign categories to a whole batch of items at once.
+
+    Builds a sparse term-document matrix of which CATEGORY_PATTERNS keywords
+    each item contains and scores every item against every category in one
+    matrix product with a keyword-by-category weight matrix. Without TF-IDF
+    the scores, and so the categories, are the same as assign_category's.
+    With TF-IDF each keyword is weighted by how rare it is across the batch,
+    so common words like "file" count for less than specific tool names.
+
+    Ties go to the category declared first in CATEGORY_PATTERNS, and items
+    matching no keyword get "other".
+
+    Args:
+        items: Items to classify
+        tfidf: Weight keywords by inverse document frequency
+
+    Returns:
+        List of category names, one per item
+    """
+    if np is None:
+        logger.warning("NumPy is not installed; classifying categories one item at a time")
+        return [assign_category(item) for item in items]
+
+    matcher = CATEGORY_MATCHER
+    categories = matcher.groups
+
+    # Sparse term-document matrix in coordinate form: one entry per
+    # (item, keyword pattern) pair that matches
+    rows = []
+    cols = []
+    for row, item in enumerate(items):
+        text = f"{item.get('command', '').lower()} {item.get('description', '').lower()}"
+        patterns = matcher.matching_patterns(text)
+        rows.extend([row] * len(patterns))
+        cols.extend(patterns)
+
+    rows = np.array(rows, dtype=np.int64)
+    cols = np.array(cols, dtype=np.int64)
+    values = np.ones(len(cols), dtype=np.float64)
+
+    if tfidf and len(cols):
+        document_frequency = np.bincount(cols, minlength=len(matcher.compiled))
+        idf = np.log((1 + len(items)) / (1 + document_frequency)) + 1
+        values = idf[cols]
+
+    # Keyword-by-category weights, seeded from CATEGORY_PATTERNS
+    weights = np.zeros((len(matcher.compiled), len(categories)))
+    weights[np.arange(len(matcher.compiled)), matcher.pattern_groups] = 1.0
+
+    # scores = term-document matrix x weights, computed one category column
+    # at a time so memory stays proportional to the number of matches
+    scores = np.zeros((len(items), len(categories)))
+    for column in range(len(categories)):
+        scores[:, column] = np.bincount(
+            rows, weights=values * weights[cols, column], minlength=len(items)
+        )
+
+    # argmax returns the first of equal scores, i.e. the earliest declared category
+    best = scores.argmax(axis=1)
+    has_match = scores.max(axis=1) > 0
+
+    return [
+        categories[index] if matched else "other"
+        for index, matched in zip(best.tolist(), has_match.tolist())
+    ]
+
 def extract_tags(item):
     """Extract relevant tags from the item's command and description"""
     cmd = item.get("command", "").lower()
@@ -118,11 +307,7 @@ def extract_tags(item):
         tags.add(item["language"])
 
     # Add matches from patterns
-    for tag, patterns in TAG_PATTERNS.items():
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                tags.add(tag)
-                break
+    tags.update(TAG_MATCHER.matching_groups(text))
 
     # Add category as a tag
     if "category" in item:
@@ -131,72 +316,117 @@ def extract_tags(item):
     # Limit to 5 most relevant tags
     return sorted(list(tags))[:5]
 
-def enrich_item(item):
-    """Add additional metadata to an item"""
-    enriched = item.copy()
+def enrich_item(item, category: Optional[str] = None, timestamp: Optional[str] = None) -> utils.Command:
+    """
+    Add additional metadata to an item.
+
+    Args:
+        item: The item to enrich, a dict or a Command
+        category: Category already assigned by classify_categories, if any
+        timestamp: Update time to set, shared by the items of a run (defaults to now)
+
+    Returns:
+        The enriched copy of the item
+    """
+    # A shallow copy: the examples and source are shared with the item
+    enriched = utils.Command.from_dict(item)
 
     # Ensure we have the basic fields
-    for field in ["command", "description", "category"]:
-        if field not in enriched:
-            enriched[field] = ""
+    if enriched.command is None:
+        enriched.command = ""
+    if enriched.description is None:
+        enriched.description = ""
 
     # Add category
-    enriched["category"] = assign_category(item)
+    enriched.category = category or assign_category(enriched)
 
     # Add tags
-    enriched["tags"] = extract_tags(enriched)
+    enriched.tags = utils.intern_strings(extract_tags(enriched))
 
     # Generate a unique ID if not present
-    if "id" not in enriched:
+    if enriched.id is None:
         # Use command and category to create a unique, deterministic ID
-        key = f"{enriched['command']}-{enriched['category']}"
-        enriched["id"] = utils.generate_id(key)
+        key = f"{enriched.command}-{enriched.category}"
+        enriched.id = utils.generate_id(key)
 
     # Add timestamps if missing
-    if not enriched.get('created_at'):
-        enriched['created_at'] = utils.get_timestamp()
+    timestamp = timestamp or utils.get_timestamp()
+    if not enriched.created_at:
+        enriched.created_at = timestamp
 
-    enriched['updated_at'] = utils.get_timestamp()
+    enriched.updated_at = timestamp
 
     return enriched
 
-def enrich_data():
-    """Main function to enrich the scraped data"""
-    if not INPUT_FILE.exists():
-        logger.error(f"Input file not found: {INPUT_FILE}")
-        return []
-
-    try:
-        data = utils.load_json(INPUT_FILE)
-    except Exception as e:
-        logger.error(f"Error loading input file: {e}")
-        return []
-
-    logger.info(f"Enriching {len(data)} items...")
+def enrich_records(records: Iterable[Dict], batch: bool = False, tfidf: bool = False) -> Iterator[Dict]:
+    """
+    Enrich scraped records with categories and tags, without touching any file.
+
+    Records are enriched one at a time as they are consumed, except in batch
+    mode, which classifies them all at once.
+
+    Args:
+        records: Scraped command entries
+        batch: Classify all items in one vectorized pass with classify_categories
+        tfidf: Weight category keywords by TF-IDF (batch mode only)
+
+    Yields:
+        Enriched items, as Commands
+    """
+    timestamp = utils.get_timestamp()
+    if batch:
+        data = list(records)
+        enriched_data = (
+            enrich_item(item, category, timestamp)
+            for item, category in zip(data, classify_categories(data, tfidf=tfidf))
+        )
+    else:
+        enriched_data = (enrich_item(item, timestamp=timestamp) for item in records)
 
-    # Enrich all items
-    enriched_data = [enrich_item(item) for item in data]
-
-    # Save the enriched data
-    utils.save_json(enriched_data, OUTPUT_FILE)
-
-    # Print statistics
     categories = Counter()
     for item in enriched_data:
-        categories[item.get("category", "unknown")] += 1
+        categories[item.category] += 1
+        yield item
 
-    logger.info(f"✅ Enriched {len(enriched_data)} items")
-    logger.info(f"Output written to {OUTPUT_FILE}")
+    # Print statistics
+    logger.info(f"✅ Enriched {sum(categories.values())} items")
 
     logger.info("\nCategory breakdown:")
     for category, count in categories.most_common():
         logger.info(f"  - {category}: {count} items")
 
-    return enriched_data
+def enrich_data(batch: bool = False, tfidf: bool = False) -> int:
+    """
+    Main function to enrich the scraped data.
+
+    Records are streamed from the input file to the output file.
+
+    Args:
+        batch: Classify all items in one vectorized pass with classify_categories
+        tfidf: Weight category keywords by TF-IDF (batch mode only)
+
+    Returns:
+        Number of enriched items
+    """
+    if not INPUT_FILE.exists():
+        logger.error(f"Input file not found: {INPUT_FILE}")
+        return 0
+
+    logger.info(f"Enriching items from {INPUT_FILE}...")
+    count = utils.write_jsonl(enrich_records(utils.iter_commands(INPUT_FILE), batch=batch, tfidf=tfidf), OUTPUT_FILE)
+    logger.info(f"Output written to {OUTPUT_FILE}")
+
+    return count
 
 def main():
-    """Run the script"""
-    enrich_data()
+    """Parse arguments and run the script"""
+    parser = argparse.ArgumentParser(description="Enrich command data with categories and tags")
+    parser.add_argument("--batch", action="store_true", help="Classify categories for all items in one vectorized pass (needs NumPy)")
+    parser.add_argument("--tfidf", action="store_true", help="Weight category keywords by TF-IDF in batch mode")
+
+    args = parser.parse_args()
+
+    enrich_data(batch=args.batch or args.tfidf, tfidf=args.tfidf)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
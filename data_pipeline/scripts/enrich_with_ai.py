@@ -4,11 +4,15 @@ Script to enrich command data with AI-generated explanations and tags using Olla
 """
 
 import os
+import re
 import time
 import requests
 import json
-from typing import Dict, List, Any, Optional, Tuple
+import jsonschema
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterable, List, Any, Optional, Tuple
 import utils
+from llm_cache import get_llm_cache
 
 logger = utils.logger
 
@@ -17,9 +21,77 @@ OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
 OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama3")
 OLLAMA_TIMEOUT = int(os.environ.get("OLLAMA_TIMEOUT", "30"))
 
+# Streaming: responses are read token by token, a request is only abandoned
+# when no token arrives for OLLAMA_IDLE_TIMEOUT seconds, and explanations stop
+# once they reach EXPLANATION_MAX_WORDS
+OLLAMA_STREAM = os.environ.get("OLLAMA_STREAM", "true").lower() in ("true", "1", "yes")
+OLLAMA_IDLE_TIMEOUT = float(os.environ.get("OLLAMA_IDLE_TIMEOUT", "10"))
+EXPLANATION_MAX_WORDS = 300
+
+# Concurrency settings: commands in flight at once, and requests per second
+# allowed to Ollama (0 disables the rate limit)
+OLLAMA_CONCURRENCY = int(os.environ.get("OLLAMA_CONCURRENCY", "4"))
+OLLAMA_RATE_LIMIT = float(os.environ.get("OLLAMA_RATE_LIMIT", "5"))
+
+# Shared by every worker thread, so the limit applies to the whole run; its
+# burst is resized to the concurrency of each run
+RATE_LIMITER = utils.RateLimiter(OLLAMA_RATE_LIMIT, burst=OLLAMA_CONCURRENCY)
+
+# Retry settings: attempts per request, the backoff bounds in seconds, and
+# how many failed attempts in a row make every request fail fast until a
+# probe after OLLAMA_BREAKER_RESET seconds gets through
+OLLAMA_MAX_ATTEMPTS = int(os.environ.get("OLLAMA_MAX_ATTEMPTS", "3"))
+OLLAMA_RETRY_BASE_DELAY = float(os.environ.get("OLLAMA_RETRY_BASE_DELAY", "1"))
+OLLAMA_RETRY_MAX_DELAY = float(os.environ.get("OLLAMA_RETRY_MAX_DELAY", "20"))
+OLLAMA_BREAKER_THRESHOLD = int(os.environ.get("OLLAMA_BREAKER_THRESHOLD", "5"))
+OLLAMA_BREAKER_RESET = float(os.environ.get("OLLAMA_BREAKER_RESET", "30"))
+
+# While the breaker is open no new command is started, except one probing
+# command every OLLAMA_BREAKER_RESET seconds; after this many failed probes in
+# a row the remaining commands are left for a later run
+OLLAMA_MAX_PROBES = int(os.environ.get("OLLAMA_MAX_PROBES", "10"))
+
+# Ask for the explanation and tags of a command in one structured-output
+# request, falling back to separate requests if the reply doesn't validate
+OLLAMA_STRUCTURED = os.environ.get("OLLAMA_STRUCTURED", "true").lower() in ("true", "1", "yes")
+
+# Shape of a combined explanation and tags reply, also sent to Ollama as the
+# output format
+ENRICHMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "explanation": {"type": "string", "minLength": 1},
+        "tags": {
+            "type": "array",
+            "items": {"type": "string", "minLength": 1},
+            "minItems": 1,
+            "maxItems": 5
+        }
+    },
+    "required": ["explanation", "tags"]
+}
+ENRICHMENT_VALIDATOR = jsonschema.Draft7Validator(ENRICHMENT_SCHEMA)
+
+# Batched tagging: tags for many commands are requested in one prompt, with
+# batches sized to fit the model's context window
+OLLAMA_BATCH_TAGS = os.environ.get("OLLAMA_BATCH_TAGS", "false").lower() in ("true", "1", "yes")
+OLLAMA_CONTEXT_LENGTH = int(os.environ.get("OLLAMA_CONTEXT_LENGTH", "4096"))
+TAG_BATCH_MAX = int(os.environ.get("TAG_BATCH_MAX", "40"))
+
+# Tokens reserved for each command's tags in a batched reply
+TAG_OUTPUT_TOKENS = 24
+
+# Weight of the latest command in the moving average of command latency,
+# used to stop before the time budget runs out
+LATENCY_EWMA_ALPHA = 0.2
+
+# Number of finished commands between fsyncs of the checkpoint log
+SAVE_INTERVAL = 10
+
 # Input/output paths
-INPUT_PATH = utils.DATA_DIR / "processed" / "enriched_commands.json"
-OUTPUT_PATH = utils.DATA_DIR / "processed" / "ai_explanations.json"
+INPUT_PATH = utils.DATA_DIR / "processed" / "enriched_commands.jsonl"
+OUTPUT_PATH = utils.DATA_DIR / "processed" / "ai_explanations.jsonl"
+CHECKPOINT_PATH = utils.DATA_DIR / "processed" / "ai_explanations.checkpoint.jsonl"
 
 # Create sample data for testing
 def create_sample_data() -> List[Dict[str, Any]]:
@@ -57,6 +129,30 @@ def create_sample_data() -> List[Dict[str, Any]]:
         }
     ]
 
+def content_fingerprint(command: Dict[str, Any]) -> str:
+    """
+    Fingerprint the parts of a command that go into its prompts.
+
+    An explanation generated for a command stays valid for as long as this
+    fingerprint is unchanged.
+
+    Args:
+        command: Command data dictionary
+
+    Returns:
+        Fingerprint string
+    """
+    content = {
+        "command": command.get('command', ''),
+        "description": command.get('description', ''),
+        "category": command.get('category', ''),
+        "examples": [
+            [example.get('code', ''), example.get('description', '')]
+            for example in (command.get('examples') or [])[:3]
+        ]
+    }
+    return utils.generate_id(json.dumps(content, sort_keys=True, ensure_ascii=False))
+
 def generate_explanation_prompt(command: Dict[str, Any]) -> str:
     """
     Generate a prompt for the AI to explain a command.
@@ -124,13 +220,205 @@ Focus on functional categories like "filesystem", "networking", "search", "permi
 """
     return prompt
 
-def get_ai_explanation(prompt: str, max_retries: int = 3) -> Optional[str]:
+def generate_combined_prompt(command: Dict[str, Any]) -> str:
+    """
+    Generate a prompt for the AI to explain a command and suggest tags in one reply.
+
+    Args:
+        command: Command data dictionary
+
+    Returns:
+        Prompt string for the AI
+    """
+    cmd = command.get('command', '')
+    description = command.get('description', '')
+    category = command.get('category', '')
+    examples = command.get('examples', [])
+
+    example_text = ""
+    if examples:
+        example_text = "Examples:\n"
+        for i, example in enumerate(examples[:3], 1):  # Limit to 3 examples
+            example_text += f"{i}. {example.get('code', '')}: {example.get('description', '')}\n"
+
+    prompt = f"""You are an expert shell tutor. Explain the following command and suggest tags for it.
+
+Command: {cmd}
+Description: {description}
+Category: {category}
+{example_text}
+
+Reply with a JSON object with two fields:
+- "explanation": a comprehensive explanation that covers what the command does, how it works,
+  common use cases, important options or flags, and any potential pitfalls or security
+  considerations. Keep it clear, concise, and informative for someone who might be new to
+  this command, and limit it to 300 words.
+- "tags": 2-3 general lowercase tags that describe what the command does, focusing on
+  functional categories like "filesystem", "networking", "search", "permissions", "compression", etc.
+"""
+    return prompt
+
+def generate_batch_tags_prompt(commands: List[Dict[str, Any]]) -> str:
+    """
+    Generate a prompt for the AI to suggest tags for several commands at once.
+
+    Commands are numbered from 1 in the prompt, and the reply is expected to
+    map those numbers to tags.
+
+    Args:
+        commands: Command data dictionaries
+
+    Returns:
+        Prompt string for the AI
+    """
+    entries = "\n".join(
+        format_batch_entry(number, command) for number, command in enumerate(commands, 1)
+    )
+
+    prompt = f"""You are an expert shell tutor. For each command below, suggest 2-3 general tags that describe what it does.
+
+{entries}
+
+Return ONLY a JSON object that maps each command number to an array of 2-3 lowercase string tags, like this:
+{{"1": ["tag1", "tag2"], "2": ["tag1", "tag2", "tag3"]}}
+
+Focus on functional categories like "filesystem", "networking", "search", "permissions", "compression", etc.
+"""
+    return prompt
+
+def format_batch_entry(number: int, command: Dict[str, Any]) -> str:
+    """
+    Format one command for a batched tags prompt.
+
+    Args:
+        number: Number of the command in the batch
+        command: Command data dictionary
+
+    Returns:
+        The command's lines in the prompt
+    """
+    return (f"{number}. Command: {command.get('command', '')}\n"
+            f"   Description: {command.get('description', '')}\n"
+            f"   Category: {command.get('category', '')}")
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in a text (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+def truncate_words(text: str, max_words: int) -> str:
+    """
+    Cut a text after its first max_words words, keeping its original spacing.
+
+    Args:
+        text: Text to cut
+        max_words: Number of words to keep
+
+    Returns:
+        The truncated text
+    """
+    match = re.match(r"(?:\s*\S+){%d}" % max_words, text)
+    return match.group(0) if match else text
+
+def stream_ollama_response(url: str, payload: Dict[str, Any],
+                           max_words: Optional[int] = None) -> Tuple[str, bool]:
+    """
+    Read a response from Ollama's NDJSON stream.
+
+    The request only times out when no data arrives for OLLAMA_IDLE_TIMEOUT
+    seconds, however long the whole generation takes. Once the text reaches
+    max_words words the connection is closed, which stops the generation on
+    the Ollama host.
+
+    Args:
+        url: Ollama generate endpoint
+        payload: Request payload, with "stream" set to True
+        max_words: Optional word budget for the response
+
+    Returns:
+        Tuple of the response text and whether it is complete, i.e. not cut
+        off by an idle timeout
+
+    Raises:
+        requests.exceptions.RequestException: If the request fails before any
+            text arrives
+    """
+    parts = []
+    words = 0
+    with requests.post(url, json=payload, stream=True, timeout=(5, OLLAMA_IDLE_TIMEOUT)) as response:
+        response.raise_for_status()
+        try:
+            for line in response.iter_lines(chunk_size=None):
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise requests.exceptions.RequestException(chunk['error'])
+
+                token = chunk.get('response', '')
+                parts.append(token)
+                if max_words and token.strip():
+                    # Tokens can split words, so this overestimates; recount
+                    # the joined text before cutting
+                    words += len(token.split())
+                    if words > max_words:
+                        text = "".join(parts)
+                        words = len(text.split())
+                        if words > max_words:
+                            return truncate_words(text, max_words).strip(), True
+                if chunk.get('done'):
+                    break
+        except requests.exceptions.RequestException as e:
+            text = "".join(parts).strip()
+            if not text:
+                raise
+            logger.warning(f"Stream stalled, keeping partial response ({len(text.split())} words): {e}")
+            return text, False
+
+    return "".join(parts).strip(), True
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Decide whether a failed Ollama request is worth retrying.
+
+    Connection errors, timeouts, rate limiting and server errors are
+    retryable; other errors, such as an unknown model, are not.
+
+    Args:
+        error: The error raised by the request
+
+    Returns:
+        True if the request should be retried
+    """
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
+# Shared by every worker thread, so a dead Ollama stops the whole run's requests
+OLLAMA_RETRY = utils.RetryPolicy(
+    OLLAMA_MAX_ATTEMPTS, OLLAMA_RETRY_BASE_DELAY, OLLAMA_RETRY_MAX_DELAY, retryable=is_retryable_error
+)
+OLLAMA_BREAKER = utils.CircuitBreaker(OLLAMA_BREAKER_THRESHOLD, OLLAMA_BREAKER_RESET, name="Ollama")
+
+def get_ai_explanation(prompt: str, max_retries: Optional[int] = None,
+                       response_format: Optional[Any] = None,
+                       model_options: Optional[Dict[str, Any]] = None,
+                       max_words: Optional[int] = None) -> Optional[str]:
     """
     Get an AI-generated explanation using Ollama.
 
+    Responses are looked up in the persistent LLM cache first, so a prompt
+    that was already answered by the same model is not sent again. Requests
+    are retried by OLLAMA_RETRY and guarded by OLLAMA_BREAKER, so while Ollama
+    is down this returns None at once.
+
     Args:
         prompt: The prompt to send to the AI
-        max_retries: Maximum number of retry attempts
+        max_retries: Maximum number of attempts (defaults to OLLAMA_MAX_ATTEMPTS)
+        response_format: Optional Ollama output format, either "json" or a JSON schema
+        model_options: Optional Ollama model options, e.g. {"num_ctx": 8192}
+        max_words: Optional word budget; when streaming, generation stops there
 
     Returns:
         AI-generated explanation or None if failed
@@ -140,27 +428,49 @@ def get_ai_explanation(prompt: str, max_retries: int = 3) -> Optional[str]:
     payload = {
         "model": OLLAMA_MODEL,
         "prompt": prompt,
-        "stream": False
+        "stream": OLLAMA_STREAM
     }
+    if response_format is not None:
+        payload["format"] = response_format
+    if model_options:
+        payload["options"] = model_options
 
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(url, json=payload, timeout=OLLAMA_TIMEOUT)
-            response.raise_for_status()
+    # Everything besides the model and prompt that can change the response
+    options = {key: value for key, value in payload.items() if key not in ("model", "prompt", "stream")}
+    if OLLAMA_STREAM and max_words:
+        options["max_words"] = max_words
 
-            result = response.json()
-            return result.get('response', '').strip()
+    cache = get_llm_cache()
+    if cache is not None:
+        cached = cache.get(OLLAMA_MODEL, prompt, options)
+        if cached is not None:
+            return cached
 
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
-            if attempt + 1 < max_retries:
-                # Exponential backoff
-                wait_time = 2 ** attempt
-                logger.info(f"Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
+    def request() -> Tuple[str, bool]:
+        RATE_LIMITER.acquire()
+        if OLLAMA_STREAM:
+            return stream_ollama_response(url, payload, max_words)
+
+        response = requests.post(url, json=payload, timeout=OLLAMA_TIMEOUT)
+        response.raise_for_status()
+        return response.json().get('response', '').strip(), True
+
+    policy = OLLAMA_RETRY
+    if max_retries is not None:
+        policy = utils.RetryPolicy(max_retries, policy.base_delay, policy.max_delay, policy.retryable)
 
-    logger.error(f"Failed to get AI response after {max_retries} attempts")
-    return None
+    try:
+        text, complete = policy.call(request, breaker=OLLAMA_BREAKER)
+    except utils.CircuitOpenError:
+        return None
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.error(f"Failed to get AI response: {e}")
+        return None
+
+    # A partial response is used for this run but not cached
+    if cache is not None and text and complete:
+        cache.put(OLLAMA_MODEL, prompt, text, options)
+    return text
 
 def parse_tags_response(response: str) -> List[str]:
     """
@@ -204,121 +514,605 @@ def parse_tags_response(response: str) -> List[str]:
     logger.warning(f"Could not extract valid tags from response: {response}")
     return []
 
-def enrich_with_ai_explanations_and_tags(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+def parse_enrichment_response(response: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse and validate a combined explanation and tags reply.
+
+    Args:
+        response: The AI-generated JSON object
+
+    Returns:
+        Dictionary with the explanation and lowercase, deduplicated tags, or
+        None if the reply doesn't match ENRICHMENT_SCHEMA
+    """
+    if not response:
+        return None
+
+    try:
+        data = json.loads(response)
+    except json.JSONDecodeError as e:
+        logger.warning(f"Structured response is not valid JSON: {e}")
+        return None
+
+    errors = list(ENRICHMENT_VALIDATOR.iter_errors(data))
+    if errors:
+        logger.warning(f"Structured response doesn't match the schema: {errors[0].message}")
+        return None
+
+    return {
+        "explanation": data["explanation"].strip(),
+        "tags": list(dict.fromkeys(tag.strip().lower() for tag in data["tags"]))
+    }
+
+def parse_batch_tags_response(response: str, size: int) -> Dict[int, List[str]]:
+    """
+    Parse a batched tags reply.
+
+    Args:
+        response: The AI-generated JSON object mapping command numbers to tags
+        size: Number of commands in the batch
+
+    Returns:
+        Dictionary of lowercase, deduplicated tags by 0-based position in the
+        batch; commands missing from the reply or given invalid tags are left out
+    """
+    if not response:
+        return {}
+
+    try:
+        data = json.loads(response)
+    except json.JSONDecodeError as e:
+        logger.warning(f"Batched tags response is not valid JSON: {e}")
+        return {}
+
+    if not isinstance(data, dict):
+        logger.warning("Batched tags response is not a JSON object")
+        return {}
+
+    tags_by_position = {}
+    for key, tags in data.items():
+        try:
+            position = int(str(key).strip()) - 1
+        except ValueError:
+            continue
+        if not 0 <= position < size or not isinstance(tags, list):
+            continue
+        tags = list(dict.fromkeys(
+            tag.strip().lower() for tag in tags if isinstance(tag, str) and tag.strip()
+        ))
+        if tags:
+            tags_by_position[position] = tags
+    return tags_by_position
+
+def plan_tag_batches(commands: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """
+    Split commands into batches whose prompt and reply fit the context window.
+
+    Batches are filled in order until the estimated prompt tokens, plus
+    TAG_OUTPUT_TOKENS for each command's reply, would exceed
+    OLLAMA_CONTEXT_LENGTH, or until TAG_BATCH_MAX commands.
+
+    Args:
+        commands: Commands that need tags
+
+    Returns:
+        List of batches
+    """
+    budget = OLLAMA_CONTEXT_LENGTH - estimate_tokens(generate_batch_tags_prompt([]))
+    batches = []
+    batch = []
+    used = 0
+    for command in commands:
+        cost = estimate_tokens(format_batch_entry(len(batch) + 1, command)) + TAG_OUTPUT_TOKENS
+        if batch and (used + cost > budget or len(batch) >= TAG_BATCH_MAX):
+            batches.append(batch)
+            batch = []
+            used = 0
+        batch.append(command)
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+def tag_batch(batch: List[Dict[str, Any]], deadline: Optional[float] = None) -> int:
+    """
+    Add AI tags to a batch of commands with a single request.
+
+    If the reply is malformed or leaves commands out, the commands still
+    without tags are split in half and each half is retried, down to single
+    commands. No request is sent once the deadline has passed; commands left
+    untagged are picked up by the per-command pass or the next run.
+
+    Args:
+        batch: Commands that need tags, updated in place
+        deadline: Optional time.monotonic() value after which no request is sent
+
+    Returns:
+        Number of commands tagged
+    """
+    if deadline is not None and time.monotonic() >= deadline:
+        return 0
+
+    response = get_ai_explanation(
+        generate_batch_tags_prompt(batch),
+        response_format="json", model_options={"num_ctx": OLLAMA_CONTEXT_LENGTH}
+    )
+    if response is None:
+        # The request failed rather than coming back malformed
+        return 0
+    tags_by_position = parse_batch_tags_response(response, len(batch))
+
+    timestamp = utils.get_timestamp()
+    for position, tags in tags_by_position.items():
+        batch[position]['tags'] = tags
+        batch[position]['updated_at'] = timestamp
+
+    missing = [command for position, command in enumerate(batch) if position not in tags_by_position]
+    if not missing or len(batch) == 1:
+        return len(tags_by_position)
+    if deadline is not None and time.monotonic() >= deadline:
+        logger.warning(f"Batched tags reply covered {len(tags_by_position)}/{len(batch)} commands, "
+                       f"not retrying the rest after the time budget ran out")
+        return len(tags_by_position)
+
+    logger.warning(f"Batched tags reply covered {len(tags_by_position)}/{len(batch)} commands, "
+                   f"retrying {len(missing)} in smaller batches")
+    middle = (len(missing) + 1) // 2
+    return len(tags_by_position) + sum(
+        tag_batch(half, deadline) for half in (missing[:middle], missing[middle:]) if half
+    )
+
+def tag_commands_in_batches(commands: List[Dict[str, Any]], concurrency: int,
+                            deadline: Optional[float] = None) -> int:
+    """
+    Add AI tags to every command without them, many commands per request.
+
+    Batches are started in the order of the commands. With a deadline, no
+    batch is started once a moving average of batch latency says it would
+    not finish in time, and no batch is started while OLLAMA_BREAKER is
+    open. Commands left untagged are picked up by the per-command tags
+    request.
+
+    Args:
+        commands: Command data dictionaries, updated in place
+        concurrency: Batches requested at once
+        deadline: Optional time.monotonic() value by which tagging must stop
+
+    Returns:
+        Number of commands tagged
+    """
+    untagged = [command for command in commands if not command.get('tags')]
+    if not untagged:
+        return 0
+
+    batches = plan_tag_batches(untagged)
+    logger.info(f"Tagging {len(untagged)} commands in {len(batches)} batches")
+
+    tagged = 0
+    next_batch = 0
+    latency = None
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {}
+        while pending or next_batch < len(batches):
+            while next_batch < len(batches) and len(pending) < concurrency:
+                if deadline is not None and time.monotonic() + (latency or 0) > deadline:
+                    logger.warning(f"Stopping batched tagging before the time budget runs out: "
+                                   f"{len(batches) - next_batch} batches not requested")
+                    next_batch = len(batches)
+                    break
+                if OLLAMA_BREAKER.is_open:
+                    logger.warning(f"Ollama is unavailable, stopping batched tagging: "
+                                   f"{len(batches) - next_batch} batches not requested")
+                    next_batch = len(batches)
+                    break
+                pending[executor.submit(tag_batch, batches[next_batch], deadline)] = time.monotonic()
+                next_batch += 1
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                elapsed = time.monotonic() - pending.pop(future)
+                latency = elapsed if latency is None else (
+                    LATENCY_EWMA_ALPHA * elapsed + (1 - LATENCY_EWMA_ALPHA) * latency
+                )
+                try:
+                    tagged += future.result()
+                except Exception as e:
+                    logger.error(f"Error tagging a batch: {e}")
+
+    logger.info(f"Added batched AI tags for {tagged}/{len(untagged)} commands")
+    return tagged
+
+def enrich_command(command: Dict[str, Any], position: str) -> Dict[str, Any]:
+    """
+    Add an AI explanation and tags to a single command, if it needs them.
+
+    Args:
+        command: Command data dictionary, updated in place
+        position: Progress label for log messages, e.g. "3/100"
+
+    Returns:
+        The enriched command
+    """
+    command_id = command.get('id', 'unknown')
+    command_name = command.get('command', 'unknown')
+    fingerprint = content_fingerprint(command)
+
+    logger.info(f"Processing command {position}: {command_name} (ID: {command_id})")
+
+    needs_explanation = not command.get('explanation')
+    needs_tags = not command.get('tags') or len(command.get('tags', [])) == 0
+    modified = needs_explanation or needs_tags
+
+    # Ask for both in one structured request when both are missing
+    if needs_explanation and needs_tags and OLLAMA_STRUCTURED:
+        combined_response = get_ai_explanation(
+            generate_combined_prompt(command), response_format=ENRICHMENT_SCHEMA
+        )
+        combined = parse_enrichment_response(combined_response)
+
+        if combined:
+            command['explanation'] = combined['explanation']
+            command['tags'] = combined['tags']
+            needs_explanation = needs_tags = False
+            logger.info(f"Added AI explanation ({len(combined['explanation'])} chars) "
+                        f"and tags for {command_name}: {combined['tags']}")
+        else:
+            logger.warning(f"Falling back to separate requests for {command_name}")
+
+    # Generate explanation if needed
+    if needs_explanation:
+        # Generate the explanation prompt
+        explanation_prompt = generate_explanation_prompt(command)
+
+        # Get the AI explanation
+        explanation = get_ai_explanation(explanation_prompt, max_words=EXPLANATION_MAX_WORDS)
+
+        if explanation:
+            # Add the explanation to the command
+            command['explanation'] = explanation
+            logger.info(f"Added AI explanation for {command_name} ({len(explanation)} chars)")
+        else:
+            logger.warning(f"Failed to get AI explanation for {command_name}")
+
+    # Generate tags if needed
+    if needs_tags:
+        # Generate the tags prompt
+        tags_prompt = generate_tags_prompt(command)
+
+        # Get the AI tags
+        tags_response = get_ai_explanation(tags_prompt)
+
+        if tags_response:
+            # Parse the response to extract tags
+            tags = parse_tags_response(tags_response)
+
+            if tags:
+                # Add the tags to the command
+                command['tags'] = tags
+                logger.info(f"Added AI tags for {command_name}: {tags}")
+            else:
+                logger.warning(f"Failed to parse tags from response: {tags_response}")
+        else:
+            logger.warning(f"Failed to get AI tags for {command_name}")
+
+    # Update timestamp if we modified the command
+    if modified:
+        command['updated_at'] = utils.get_timestamp()
+    if command.get('explanation'):
+        command['ai_fingerprint'] = fingerprint
+
+    return command
+
+def load_checkpoint() -> Dict[str, Dict[str, Any]]:
+    """
+    Load the commands finished by a previous run from the checkpoint log.
+
+    Returns:
+        Dictionary of finished commands by ID
+    """
+    return {
+        command['id']: command
+        for command in utils.iter_jsonl(CHECKPOINT_PATH)
+        if isinstance(command, dict) and command.get('id')
+    }
+
+def is_enriched(command: Dict[str, Any]) -> bool:
+    """Whether a command has both an AI explanation and tags"""
+    return bool(command.get('explanation') and command.get('tags'))
+
+def count_unenriched(commands: Iterable[Dict[str, Any]]) -> int:
+    """
+    Count the commands still missing an AI explanation or tags.
+
+    Args:
+        commands: Command data dictionaries
+
+    Returns:
+        Number of commands a later run still has to enrich
+    """
+    return sum(1 for command in commands if not is_enriched(command))
+
+def command_priority(command: Dict[str, Any]) -> Tuple[int, int, int]:
+    """
+    Get the sort key that orders commands by how much enriching them is worth.
+
+    Commands missing both an explanation and tags come first, then commands
+    from the common platform, then commands with more examples.
+
+    Args:
+        command: Command data dictionary
+
+    Returns:
+        Sort key, lowest first
+    """
+    needs_both = not command.get('explanation') and not command.get('tags')
+    return (
+        0 if needs_both else 1,
+        0 if command.get('platform') == 'common' else 1,
+        -len(command.get('examples') or [])
+    )
+
+def reuse_previous_results(commands: List[Dict[str, Any]]) -> List[bool]:
+    """
+    Carry explanations and tags over from the previous output, where still valid.
+
+    A command whose content fingerprint matches the one stored with its
+    previous explanation gets that explanation, and its previous tags if it
+    has none. Anything else is enriched again.
+
+    Args:
+        commands: Command data dictionaries, updated in place
+
+    Returns:
+        For each command, whether its previous results were reused
+    """
+    previous = {}
+    if OUTPUT_PATH.exists():
+        previous = {
+            command['id']: command
+            for command in utils.iter_jsonl(OUTPUT_PATH)
+            if isinstance(command, dict) and command.get('id')
+        }
+
+    reused = []
+    skipped = refreshed = new = 0
+    for command in commands:
+        old = previous.get(command.get('id'))
+        if command.get('explanation') or not old or not old.get('explanation'):
+            new += not command.get('explanation')
+            reused.append(False)
+            continue
+
+        fingerprint = content_fingerprint(command)
+        if old.get('ai_fingerprint') != fingerprint:
+            refreshed += 1
+            reused.append(False)
+            continue
+
+        command['explanation'] = old['explanation']
+        command['ai_fingerprint'] = fingerprint
+        if not command.get('tags') and old.get('tags'):
+            command['tags'] = old['tags']
+        if old.get('updated_at'):
+            command['updated_at'] = old['updated_at']
+        skipped += 1
+        reused.append(True)
+
+    logger.info(f"Content fingerprints: {skipped} unchanged (skipped), "
+                f"{refreshed} changed (refreshed), {new} new")
+    return reused
+
+def enrich_with_ai_explanations_and_tags(limit: Optional[int] = None,
+                                         concurrency: Optional[int] = None,
+                                         resume: bool = False,
+                                         batch_tags: Optional[bool] = None,
+                                         time_budget: Optional[float] = None,
+                                         commands: Optional[Iterable[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
     """
     Enrich command data with AI-generated explanations and tags.
 
+    Commands whose content is unchanged since the previous run keep their
+    previous explanation (see reuse_previous_results). Up to `concurrency`
+    of the rest are processed at once, with requests to
+    Ollama paced by the shared rate limiter. Each finished command is appended
+    to a JSON Lines checkpoint log, in input order whatever order requests
+    finish in, and the log is fsynced in batches. With `resume`, commands
+    already in the log are not processed again. The final output file is
+    written once, from the log, at the end.
+
+    With `batch_tags`, tags are first requested for many commands per prompt,
+    and only the explanations and any tags that batching missed are requested
+    per command.
+
+    With `time_budget`, commands are processed in order of command_priority,
+    and no new command is started once a moving average of command latency
+    says it would not finish before the budget runs out; batched tagging
+    stops the same way. Commands that were not reached are written unchanged.
+
+    While OLLAMA_BREAKER is open, new commands are held back instead of
+    failing fast: one command is started as a probe whenever the breaker
+    allows it, and after OLLAMA_MAX_PROBES failed probes the rest are left
+    unprocessed.
+
     Args:
         limit: Optional limit on the number of commands to process
+        concurrency: Commands processed at once (defaults to OLLAMA_CONCURRENCY)
+        resume: Skip commands finished by a previous, interrupted run
+        batch_tags: Request tags in batches (defaults to OLLAMA_BATCH_TAGS)
+        time_budget: Optional number of seconds the step may take
+        commands: Enriched commands to process instead of reading INPUT_PATH;
+            they are copied, not modified
 
     Returns:
         List of enriched command entries
     """
+    deadline = time.monotonic() + time_budget if time_budget else None
+
     # Load the enriched command data
-    if not INPUT_PATH.exists():
+    if commands is not None:
+        commands = [utils.Command.from_dict(command) for command in commands]
+    elif not INPUT_PATH.exists():
         logger.error(f"Input file not found: {INPUT_PATH}")
         return []
-
-    commands = utils.load_json(INPUT_PATH)
-    logger.info(f"Loaded {len(commands)} commands from {INPUT_PATH}")
+    else:
+        commands = list(utils.iter_commands(INPUT_PATH))
+        logger.info(f"Loaded {len(commands)} commands from {INPUT_PATH}")
 
     # Limit the number of commands to process if specified
     if limit and limit > 0:
         commands = commands[:limit]
         logger.info(f"Processing only the first {limit} commands")
 
+    # Keep the results of the last complete run for unchanged commands
+    reused = reuse_previous_results(commands)
+
+    # Pick up the commands finished by the previous run. Commands it logged
+    # without an explanation or tags, e.g. while Ollama was down, are retried.
+    finished = load_checkpoint() if resume and CHECKPOINT_PATH.exists() else {}
+    results = []
+    for command, unchanged in zip(commands, reused):
+        result = command if unchanged else finished.get(command.get('id'))
+        results.append(result if result and is_enriched(result) else None)
+    if resume:
+        resumed = sum(1 for result, unchanged in zip(results, reused) if result is not None and not unchanged)
+        logger.info(f"Resuming: {resumed}/{len(commands)} commands already finished")
+
+    to_process = [index for index, result in enumerate(results) if result is None]
+    if deadline is not None:
+        to_process.sort(key=lambda index: command_priority(commands[index]))
+        logger.info(f"Processing commands by priority within a {time_budget:.0f}s budget")
+
     # Check if Ollama is available
-    try:
-        requests.get(f"{OLLAMA_HOST}/api/version", timeout=5)
-    except requests.exceptions.RequestException:
-        logger.error(f"Ollama not available at {OLLAMA_HOST}. Make sure it's running.")
-        return []
+    if to_process:
+        try:
+            requests.get(f"{OLLAMA_HOST}/api/version", timeout=5)
+        except requests.exceptions.RequestException:
+            logger.error(f"Ollama not available at {OLLAMA_HOST}. Make sure it's running.")
+            return []
 
-    # Process each command
-    enriched_commands = []
-    for i, command in enumerate(commands):
-        command_id = command.get('id', f"unknown-{i}")
-        command_name = command.get('command', 'unknown')
-
-        logger.info(f"Processing command {i+1}/{len(commands)}: {command_name} (ID: {command_id})")
-
-        # Generate explanation if needed
-        needs_explanation = not command.get('explanation')
-        if needs_explanation:
-            # Generate the explanation prompt
-            explanation_prompt = generate_explanation_prompt(command)
-            
-            # Get the AI explanation
-            explanation = utils.retry_operation(get_ai_explanation, 3, explanation_prompt)
-            
-            if explanation:
-                # Add the explanation to the command
-                command['explanation'] = explanation
-                logger.info(f"Added AI explanation ({len(explanation)} chars)")
-            else:
-                logger.warning(f"Failed to get AI explanation for {command_name}")
-        
-        # Generate tags if needed
-        needs_tags = not command.get('tags') or len(command.get('tags', [])) == 0
-        if needs_tags:
-            # Generate the tags prompt
-            tags_prompt = generate_tags_prompt(command)
-            
-            # Get the AI tags
-            tags_response = utils.retry_operation(get_ai_explanation, 3, tags_prompt)
-            
-            if tags_response:
-                # Parse the response to extract tags
-                tags = parse_tags_response(tags_response)
-                
-                if tags:
-                    # Add the tags to the command
-                    command['tags'] = tags
-                    logger.info(f"Added AI tags: {tags}")
-                else:
-                    logger.warning(f"Failed to parse tags from response: {tags_response}")
-            else:
-                logger.warning(f"Failed to get AI tags for {command_name}")
-        
-        # Update timestamp if we modified the command
-        if needs_explanation or needs_tags:
-            command['updated_at'] = utils.get_timestamp()
-        
-        enriched_commands.append(command)
+    concurrency = max(1, concurrency or OLLAMA_CONCURRENCY)
+    RATE_LIMITER.resize(concurrency)
+    logger.info(f"Processing {len(to_process)} commands with up to {concurrency} in flight")
+
+    if OLLAMA_BATCH_TAGS if batch_tags is None else batch_tags:
+        tag_commands_in_batches([commands[index] for index in to_process], concurrency, deadline)
+
+    # Process the commands, keeping at most `concurrency` in flight. Finished
+    # commands are logged once everything before them has finished too.
+    logged = 0
+    with utils.JsonlWriter(CHECKPOINT_PATH, sync_every=SAVE_INTERVAL, truncate=not resume) as checkpoint, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {}
+        started = {}
+        next_index = 0
+        stop_index = len(to_process)
+        latency = None
+
+        while next_index < stop_index or pending:
+            while next_index < stop_index and len(pending) < concurrency:
+                # Don't start a command that would finish after the deadline
+                if deadline is not None and time.monotonic() + (latency or 0) > deadline:
+                    stop_index = next_index
+                    logger.warning(f"Stopping before the time budget runs out: "
+                                   f"{len(to_process) - next_index} commands not processed")
+                    break
+
+                # While Ollama is down, only start the command that probes it
+                if OLLAMA_BREAKER.is_open:
+                    if OLLAMA_BREAKER.failed_probes >= OLLAMA_MAX_PROBES:
+                        stop_index = next_index
+                        logger.error(f"Ollama is still unavailable after {OLLAMA_BREAKER.failed_probes} probes: "
+                                     f"{len(to_process) - next_index} commands not processed")
+                        break
+                    if pending or OLLAMA_BREAKER.retry_in() > 0:
+                        break
 
-        # Save progress periodically
-        if (i + 1) % 10 == 0 or i == len(commands) - 1:
-            utils.save_json(enriched_commands, OUTPUT_PATH)
-            logger.info(f"Saved progress ({i+1}/{len(commands)} commands processed)")
+                index = to_process[next_index]
+                position = f"{index + 1}/{len(commands)}"
+                future = executor.submit(enrich_command, commands[index], position)
+                pending[future] = index
+                started[future] = time.monotonic()
+                next_index += 1
 
-        # Be nice to the API
-        time.sleep(1)
+            if not pending:
+                if next_index >= stop_index:
+                    break
+                # Held back by the breaker: wait for the next probe
+                pause = OLLAMA_BREAKER.retry_in()
+                if deadline is not None and time.monotonic() + pause > deadline:
+                    stop_index = next_index
+                    logger.warning(f"Time budget runs out while Ollama is unavailable: "
+                                   f"{len(to_process) - next_index} commands not processed")
+                    break
+                logger.info(f"Waiting {pause:.1f}s for Ollama before probing it")
+                time.sleep(pause)
+                continue
 
-    # Final save
-    utils.save_json(enriched_commands, OUTPUT_PATH)
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                elapsed = time.monotonic() - started.pop(future)
+                latency = elapsed if latency is None else (
+                    LATENCY_EWMA_ALPHA * elapsed + (1 - LATENCY_EWMA_ALPHA) * latency
+                )
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    logger.error(f"Error enriching {commands[index].get('command', 'unknown')}: {e}")
+                    results[index] = commands[index]
+
+            # Append the in-order prefix of newly finished commands to the log
+            while logged < len(to_process) and results[to_process[logged]] is not None:
+                checkpoint.write(results[to_process[logged]])
+                logged += 1
+
+    # Compact the log into the output file once, in input order
+    finished = load_checkpoint()
+    enriched_commands = [
+        finished.get(command.get('id')) or result or command
+        for command, result in zip(commands, results)
+    ]
+    utils.write_jsonl(enriched_commands, OUTPUT_PATH)
     logger.info(f"Completed AI enrichment for {len(enriched_commands)} commands")
 
+    cache = get_llm_cache()
+    if cache is not None:
+        cache.log_stats()
+
     # Count commands with explanations and tags
     with_explanation = sum(1 for cmd in enriched_commands if cmd.get('explanation'))
     with_tags = sum(1 for cmd in enriched_commands if cmd.get('tags') and len(cmd.get('tags', [])) > 0)
-    
+
     logger.info(f"Commands with explanations: {with_explanation}/{len(enriched_commands)}")
     logger.info(f"Commands with tags: {with_tags}/{len(enriched_commands)}")
 
     return enriched_commands
 
-def enrich_with_ai_explanations(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+def enrich_with_ai_explanations(limit: Optional[int] = None,
+                                concurrency: Optional[int] = None,
+                                resume: bool = False,
+                                batch_tags: Optional[bool] = None,
+                                time_budget: Optional[float] = None,
+                                commands: Optional[Iterable[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
     """
     Legacy function for backward compatibility.
     Calls the new function that handles both explanations and tags.
 
     Args:
         limit: Optional limit on the number of commands to process
+        concurrency: Commands processed at once (defaults to OLLAMA_CONCURRENCY)
+        resume: Skip commands finished by a previous, interrupted run
+        batch_tags: Request tags in batches (defaults to OLLAMA_BATCH_TAGS)
+        time_budget: Optional number of seconds the step may take
+        commands: Enriched commands to process instead of reading INPUT_PATH
 
     Returns:
         List of enriched command entries
     """
-    return enrich_with_ai_explanations_and_tags(limit)
+    return enrich_with_ai_explanations_and_tags(limit, concurrency, resume, batch_tags, time_budget, commands)
 
 def main():
     """Run the script"""
@@ -328,6 +1122,12 @@ def main():
     
     # Check if we should use sample data
     use_sample = os.environ.get("USE_SAMPLE", "false").lower() in ("true", "1", "yes")
+
+    # Check if we should pick up where an interrupted run stopped
+    resume = os.environ.get("AI_RESUME", "false").lower() in ("true", "1", "yes")
+
+    # Check if the step has a time budget, in seconds
+    time_budget = float(os.environ.get("AI_TIME_BUDGET", "0")) or None
     
     if use_sample:
         logger.info("Using sample data for testing")
@@ -335,7 +1135,7 @@ def main():
         sample_data = create_sample_data()
         
         # Use the sample data directly
-        utils.save_json(sample_data, INPUT_PATH)
+        utils.write_jsonl(sample_data, INPUT_PATH)
         logger.info(f"Saved {len(sample_data)} sample commands to {INPUT_PATH}")
         
     # Check if input file exists
@@ -346,11 +1146,9 @@ def main():
     
     # Run the enrichment
     logger.info(f"Starting enrichment process with model {OLLAMA_MODEL}")
-    enriched_data = enrich_with_ai_explanations_and_tags(limit)
+    enriched_data = enrich_with_ai_explanations_and_tags(limit, resume=resume, time_budget=time_budget)
     
     if enriched_data:
-        # Save the enriched data
-        utils.save_json(enriched_data, OUTPUT_PATH)
         logger.info(f"Saved {len(enriched_data)} enriched commands to {OUTPUT_PATH}")
         
         # Print stats
@@ -3,65 +3,291 @@
 Script to export the combined data to a JSON file for the frontend.
 """
 
+import os
+import re
+import json
+import argparse
 import utils
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, List, Optional, Union
 
 logger = utils.logger
 
 # Input/output paths
-INPUT_PATH = utils.DATA_DIR / "processed" / "combined_data.json"
+INPUT_PATH = utils.DATA_DIR / "processed" / "combined_data.jsonl"
 OUTPUT_PATH = utils.PUBLIC_DATA_DIR / "syntax.json"
 
-def export_to_json() -> List[Dict[str, Any]]:
+# Write syntax.json in the normalized format instead of as an array of records
+EXPORT_NORMALIZED = os.environ.get("EXPORT_NORMALIZED", "false").lower() in ("true", "1", "yes")
+
+# Normalized format: each record is an array of NORMALIZED_FIELDS, and the
+# values of TABLE_FIELDS are indexes into a table of that field's values
+NORMALIZED_FORMAT = "syntaxscope-normalized"
+NORMALIZED_VERSION = 1
+NORMALIZED_FIELDS = ("id", "command", "description", "category", "tags", "explanation", "examples",
+                     "source", "platform", "locale", "created_at", "updated_at")
+TABLE_FIELDS = ("category", "tags", "platform", "locale")
+
+# Placeholders of a source URL template, filled in one pass so values that
+# look like placeholders themselves are left alone
+URL_PLACEHOLDER = re.compile(r"\{(command|path)\}")
+
+class NormalizedEncoder:
     """
-    Export the combined data to a JSON file for the frontend.
+    Turns command records into the rows of the normalized format.
+
+    Values of TABLE_FIELDS are replaced by their index in the field's table,
+    in order of first use, and examples by [code, description] pairs. Sources
+    have a table of their own in which the URL is a template: "{command}"
+    stands for the record's command and "{path}" for the rest of its URL. A
+    record refers to its source by index, or by [index, path] when the
+    template needs a path. Fields outside NORMALIZED_FIELDS are kept in an
+    object after the last field.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[Any, int]] = {field: {} for field in TABLE_FIELDS}
+        self.sources: Dict[str, int] = {}
+        self.source_table: List[Dict[str, Any]] = []
+
+    def index(self, field: str, value: Any) -> int:
+        """Get the index of a value in a field's table, adding it if needed"""
+        table = self.tables[field]
+        index = table.get(value)
+        if index is None:
+            index = table[value] = len(table)
+        return index
+
+    def source(self, source: Any, command: Any) -> Any:
+        """Get the reference to a record's source, adding the source to its table if needed"""
+        url = source.get("url") if isinstance(source, dict) else None
+        # A URL with braces of its own can't be told apart from a template
+        if not isinstance(url, str) or "{" in url:
+            return source
+
+        head, slash, path = url.rpartition("/")
+        if isinstance(command, str) and command and command in path:
+            template, path = head + slash + path.replace(command, "{command}", 1), None
+        else:
+            template = head + slash + "{path}"
+
+        entry = {key: template if key == "url" else value for key, value in source.items()}
+        key = json.dumps(entry, sort_keys=True)
+        index = self.sources.get(key)
+        if index is None:
+            index = self.sources[key] = len(self.source_table)
+            self.source_table.append(entry)
+        return index if path is None else [index, path]
+
+    def encode(self, record: Dict[str, Any]) -> List[Any]:
+        """
+        Encode a record as a row.
+
+        Args:
+            record: The command record
+
+        Returns:
+            The row, without trailing empty fields
+        """
+        row = []
+        for field in NORMALIZED_FIELDS:
+            value = record.get(field)
+            if value is None:
+                pass
+            elif field == "tags":
+                value = [self.index(field, tag) for tag in value]
+            elif field in self.tables:
+                value = self.index(field, value)
+            elif field == "examples":
+                value = [
+                    [example["code"], example["description"]]
+                    if len(example) == 2 and "code" in example and "description" in example else dict(example)
+                    for example in value
+                ]
+            elif field == "source":
+                value = self.source(value, record.get("command"))
+            row.append(value)
+
+        extra = {key: value for key, value in record.items() if key not in NORMALIZED_FIELDS}
+        if extra:
+            row.append(extra)
+        else:
+            while row and row[-1] is None:
+                row.pop()
+        return row
+
+    def tables_data(self) -> Dict[str, List[Any]]:
+        """Get the field tables, each a list of values by index"""
+        return {field: list(table) for field, table in self.tables.items()}
+
+def write_normalized(records: Iterable[Dict[str, Any]], file_path: Union[str, Path]) -> int:
+    """
+    Write records to a file in the normalized format, as they are produced.
+
+    The file is one compact JSON object: the format name and version, the
+    field names, the records as rows, then the tables the rows refer to.
+    Only the rows and tables are in memory, not the records.
+
+    Args:
+        records: The records to write
+        file_path: Path of the JSON file
 
     Returns:
-        List of exported command entries
+        Number of records written
     """
-    # Load the combined data
-    if not INPUT_PATH.exists():
-        logger.error(f"Combined data file not found: {INPUT_PATH}")
-        return []
+    file_path = Path(file_path)
+    file_path.parent.mkdir(exist_ok=True, parents=True)
+    temp_path = file_path.with_name(file_path.name + ".tmp")
+    encoder = NormalizedEncoder()
+    header = {"format": NORMALIZED_FORMAT, "version": NORMALIZED_VERSION, "fields": list(NORMALIZED_FIELDS)}
 
-    commands = utils.load_json(INPUT_PATH)
-    logger.info(f"Loaded {len(commands)} commands from {INPUT_PATH}")
+    count = 0
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(utils.CODEC.dumps(header)[:-1] + b',"records":[')
+            for record in records:
+                f.write((b"," if count else b"") + utils.CODEC.dumps(encoder.encode(record)))
+                count += 1
+            f.write(b'],"tables":' + utils.CODEC.dumps(encoder.tables_data()) +
+                    b',"sources":' + utils.CODEC.dumps(encoder.source_table) + b'}')
+        os.replace(temp_path, file_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
 
-    # Ensure the output directory exists
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    logger.info(f"Saved normalized JSON to {file_path}")
+    return count
 
-    # Save the data to the public directory
-    utils.save_json(commands, OUTPUT_PATH)
-    logger.info(f"Exported {len(commands)} commands to {OUTPUT_PATH}")
+def is_normalized(data: Any) -> bool:
+    """Check whether loaded JSON data is in the normalized format"""
+    return isinstance(data, dict) and data.get("format") == NORMALIZED_FORMAT
 
-    # Print statistics
+def decode_normalized(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Turn data in the normalized format back into records.
+
+    This is what the frontend's decoder (lib/syntax-data.ts) does.
+
+    Args:
+        data: The loaded JSON object
+
+    Returns:
+        The records
+
+    Raises:
+        ValueError: If the data isn't in a supported version of the format
+    """
+    if not is_normalized(data) or data.get("version") != NORMALIZED_VERSION:
+        raise ValueError(f"Not {NORMALIZED_FORMAT} data, version {NORMALIZED_VERSION}")
+
+    fields = data["fields"]
+    tables = data.get("tables", {})
+    sources = data.get("sources", [])
+    records = []
+    for row in data["records"]:
+        record = {}
+        for field, value in zip(fields, row):
+            if value is None:
+                continue
+            table = tables.get(field)
+            if table is not None:
+                value = [table[index] for index in value] if isinstance(value, list) else table[value]
+            elif field == "examples":
+                value = [
+                    {"code": example[0], "description": example[1]} if isinstance(example, list) else example
+                    for example in value
+                ]
+            record[field] = value
+        if len(row) > len(fields):
+            record.update(row[len(fields)])
+
+        source = record.get("source")
+        if isinstance(source, (int, list)):
+            index, path = (source, "") if isinstance(source, int) else source
+            source = dict(sources[index])
+            if "url" in source:
+                values = {"command": record.get("command", ""), "path": path}
+                source["url"] = URL_PLACEHOLDER.sub(lambda match: values[match.group(1)], source["url"])
+            record["source"] = source
+        records.append(record)
+    return records
+
+def export_records(commands: Iterable[Dict[str, Any]], normalized: Optional[bool] = None) -> int:
+    """
+    Write combined commands to the frontend's JSON file.
+
+    The file is a single JSON array, or an object in the normalized format
+    (see write_normalized), written one command at a time.
+
+    Args:
+        commands: Combined command entries
+        normalized: Write the normalized format (defaults to EXPORT_NORMALIZED)
+
+    Returns:
+        Number of exported command entries
+    """
+    if normalized is None:
+        normalized = EXPORT_NORMALIZED
     categories = {}
     with_explanation = 0
     with_tags = 0
 
-    for cmd in commands:
-        category = cmd.get('category', 'unknown')
-        categories[category] = categories.get(category, 0) + 1
+    def counted(commands):
+        """Pass the commands through, gathering statistics"""
+        nonlocal with_explanation, with_tags
+        for cmd in commands:
+            category = cmd.get('category', 'unknown')
+            categories[category] = categories.get(category, 0) + 1
 
-        if cmd.get('explanation'):
-            with_explanation += 1
-            
-        if cmd.get('tags') and len(cmd.get('tags', [])) > 0:
-            with_tags += 1
+            if cmd.get('explanation'):
+                with_explanation += 1
 
-    logger.info(f"Commands with explanations: {with_explanation}/{len(commands)}")
-    logger.info(f"Commands with tags: {with_tags}/{len(commands)}")
+            if cmd.get('tags') and len(cmd.get('tags', [])) > 0:
+                with_tags += 1
+            yield cmd
+
+    # Save the data to the public directory
+    write = write_normalized if normalized else utils.write_json_array
+    count = write(counted(commands), OUTPUT_PATH)
+    logger.info(f"Exported {count} commands to {OUTPUT_PATH}" + (" (normalized)" if normalized else ""))
+
+    # Print statistics
+    logger.info(f"Commands with explanations: {with_explanation}/{count}")
+    logger.info(f"Commands with tags: {with_tags}/{count}")
 
     logger.info("Category breakdown:")
-    for category, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
-        logger.info(f"  - {category}: {count} commands")
+    for category, count_in_category in sorted(categories.items(), key=lambda x: x[1], reverse=True):
+        logger.info(f"  - {category}: {count_in_category} commands")
+
+    return count
+
+def export_to_json(normalized: Optional[bool] = None) -> int:
+    """
+    Export the combined data to a JSON file for the frontend.
+
+    Args:
+        normalized: Write the normalized format (defaults to EXPORT_NORMALIZED)
+
+    Returns:
+        Number of exported command entries
+    """
+    # Load the combined data
+    if not INPUT_PATH.exists():
+        logger.error(f"Combined data file not found: {INPUT_PATH}")
+        return 0
 
-    return commands
+    logger.info(f"Exporting commands from {INPUT_PATH}")
+    return export_records(utils.iter_commands(INPUT_PATH), normalized)
 
 def main():
-    """Run the script"""
-    export_to_json()
+    """Parse arguments and run the script"""
+    parser = argparse.ArgumentParser(description="Export the combined data to a JSON file for the frontend")
+    parser.add_argument("--normalized", action="store_true",
+                        help="Write string tables and records that refer to them, instead of an array of records")
+
+    args = parser.parse_args()
+
+    export_to_json(normalized=args.normalized or None)
 
 if __name__ == "__main__":
     main()
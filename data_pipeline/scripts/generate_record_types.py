@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Generate typed record definitions (msgspec Structs) from the command schema.
+
+The generated module lets validation decode and check records in one native
+pass instead of walking them with jsonschema. Regenerate it whenever
+schema/syntax_schema.json changes:
+
+    python generate_record_types.py
+"""
+
+import sys
+import json
+import keyword
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List
+import utils
+
+logger = utils.logger
+
+SCHEMA_PATH = utils.SCHEMA_DIR / "syntax_schema.json"
+OUTPUT_PATH = Path(__file__).resolve().parent / "record_types.py"
+
+# Schema keywords the generated types enforce exactly; "format" is ignored,
+# as it is by jsonschema's default validator
+SUPPORTED_KEYWORDS = {"$schema", "title", "description", "type", "properties", "required", "items", "format"}
+
+SCALAR_TYPES = {"string": "str", "integer": "int", "number": "float", "boolean": "bool", "null": "None"}
+
+def schema_digest(schema: Any) -> str:
+    """
+    Hash a schema independently of its formatting.
+
+    Args:
+        schema: The parsed schema
+
+    Returns:
+        Hex digest
+    """
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode("utf-8")).hexdigest()
+
+def class_name(name: str) -> str:
+    """Turn a property name into a class name, e.g. "examples" into "Example" """
+    name = name[:-1] if name.endswith("s") and not name.endswith("ss") else name
+    return "".join(part.capitalize() for part in name.replace("-", "_").split("_")) or "Record"
+
+class TypeGenerator:
+    """Builds Struct definitions for the object schemas nested in a schema"""
+
+    def __init__(self):
+        self.classes: List[str] = []
+        self.names = set()
+
+    def type_for(self, schema: Dict[str, Any], name: str, where: str, doc: str = "") -> str:
+        """
+        Get the annotation for a value, defining Structs for nested objects.
+
+        Args:
+            schema: Schema of the value
+            name: Name to derive a class name from
+            where: Location in the schema, for error messages
+            doc: Docstring for a Struct if the schema has no title or description
+
+        Returns:
+            Python type annotation
+
+        Raises:
+            ValueError: If the schema uses keywords the types can't enforce
+        """
+        unsupported = set(schema) - SUPPORTED_KEYWORDS
+        if unsupported:
+            raise ValueError(f"{where}: unsupported schema keywords {sorted(unsupported)}; "
+                             f"validate with jsonschema (--strict) instead")
+
+        schema_type = schema.get("type")
+        if schema_type == "object":
+            if "properties" not in schema:
+                return "Dict[str, Any]"
+            return self.define_struct(schema, class_name(name), where, doc)
+        if schema_type == "array":
+            if "items" not in schema:
+                return "List[Any]"
+            return f"List[{self.type_for(schema['items'], name, where + '.items', f'One of the {name}')}]"
+        if schema_type in SCALAR_TYPES:
+            return SCALAR_TYPES[schema_type]
+        if schema_type is None:
+            return "Any"
+        raise ValueError(f"{where}: unsupported type {schema_type!r}")
+
+    def define_struct(self, schema: Dict[str, Any], name: str, where: str, doc: str = "") -> str:
+        """
+        Define a Struct for an object schema.
+
+        Args:
+            schema: The object schema
+            name: Class name
+            where: Location in the schema, for error messages
+            doc: Docstring if the schema has no title or description
+
+        Returns:
+            The class name
+        """
+        while name in self.names:
+            name += "_"
+        self.names.add(name)
+
+        required = set(schema.get("required", []))
+        fields = []
+        for prop, prop_schema in schema["properties"].items():
+            annotation = self.type_for(prop_schema, prop, f"{where}.{prop}")
+            attribute = prop if prop.isidentifier() and not keyword.iskeyword(prop) else f"{class_name(prop).lower()}_"
+            renamed = attribute != prop
+            if prop in required:
+                default = f" = msgspec.field(name={prop!r})" if renamed else ""
+                fields.append(f"    {attribute}: {annotation}{default}")
+            else:
+                default = f"msgspec.field(default=UNSET, name={prop!r})" if renamed else "UNSET"
+                fields.append(f"    {attribute}: Union[{annotation}, UnsetType] = {default}")
+        for prop in sorted(required - set(schema["properties"])):
+            raise ValueError(f"{where}: required property {prop!r} has no definition")
+
+        description = schema.get("title") or schema.get("description") or doc or f"Record matching {where}"
+        self.classes.append(
+            f"class {name}(msgspec.Struct, kw_only=True):\n"
+            f'    """{description}"""\n\n' + ("\n".join(fields) or "    pass") + "\n"
+        )
+        return name
+
+def generate_module(schema: Dict[str, Any]) -> str:
+    """
+    Generate the source of the record types module.
+
+    Args:
+        schema: The command schema, an array of command objects
+
+    Returns:
+        Python source code
+    """
+    if schema.get("type") != "array" or "items" not in schema:
+        raise ValueError("Expected the schema of an array of records")
+
+    generator = TypeGenerator()
+    unsupported = set(schema) - SUPPORTED_KEYWORDS
+    if unsupported:
+        raise ValueError(f"schema: unsupported schema keywords {sorted(unsupported)}")
+    record = generator.type_for(schema["items"], "command", "items", "A command record")
+    if record in ("Any", "Dict[str, Any]"):
+        raise ValueError("Records must be objects with properties")
+
+    classes = "\n".join(generator.classes)
+    return f'''#!/usr/bin/env python3
+"""
+Typed command records generated from schema/syntax_schema.json.
+
+Do not edit: regenerate with `python generate_record_types.py`.
+"""
+
+from typing import Any, Dict, List, Union
+import msgspec
+from msgspec import UNSET, UnsetType
+
+# Digest of the schema these types were generated from
+SCHEMA_DIGEST = "{schema_digest(schema)}"
+
+{classes}
+Record = {record}
+
+_array_decoder = msgspec.json.Decoder(List[Record])
+
+def is_valid(record: Any) -> bool:
+    """Check an already decoded record against the schema"""
+    try:
+        msgspec.convert(record, Record)
+        return True
+    except msgspec.ValidationError:
+        return False
+
+def decode_array(data: Union[bytes, memoryview]) -> List[Record]:
+    """
+    Decode and validate a JSON array of records in one pass.
+
+    Raises:
+        msgspec.ValidationError: If a record doesn't match the schema
+        msgspec.DecodeError: If the data isn't valid JSON
+    """
+    return _array_decoder.decode(data)
+'''
+
+def main():
+    """Parse arguments and run the script"""
+    parser = argparse.ArgumentParser(description="Generate msgspec record types from the command schema")
+    parser.add_argument("--schema", default=str(SCHEMA_PATH), help="Path of the schema")
+    parser.add_argument("--output", default=str(OUTPUT_PATH), help="Path of the generated module")
+    parser.add_argument("--check", action="store_true", help="Only check that the generated module is up to date")
+    args = parser.parse_args()
+
+    source = generate_module(utils.load_json(args.schema))
+    output = Path(args.output)
+    current = output.read_text(encoding="utf-8").replace("\r\n", "\n") if output.exists() else None
+
+    if args.check:
+        if current != source:
+            logger.error(f"{output} is out of date; run generate_record_types.py")
+            return 1
+        logger.info(f"{output} is up to date")
+        return 0
+
+    output.write_text(source, encoding="utf-8")
+    logger.info(f"Wrote record types to {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of LLM responses, so identical prompts are only sent once.
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+import utils
+
+logger = utils.logger
+
+# Cache settings
+LLM_CACHE_PATH = Path(os.environ.get("LLM_CACHE_PATH", utils.DATA_DIR / "cache" / "llm_responses.sqlite3"))
+LLM_CACHE_MAX_MB = float(os.environ.get("LLM_CACHE_MAX_MB", "256"))
+LLM_CACHE_TTL_DAYS = float(os.environ.get("LLM_CACHE_TTL_DAYS", "30"))
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE", "true").lower() in ("true", "1", "yes")
+
+# Hits, misses and access times are kept in memory and written once this
+# many lookups have accumulated (and when the cache is closed)
+LLM_CACHE_FLUSH_EVERY = 256
+
+# Eviction frees space down to this fraction of the size limit, so a full
+# cache doesn't evict on every write
+LLM_CACHE_EVICT_TO = 0.9
+
+class LLMCache:
+    """
+    SQLite-backed cache of LLM responses keyed on (model, prompt, options).
+
+    Entries expire after a TTL, and the least recently used entries are
+    evicted once the stored responses exceed the size limit. The cache can be
+    shared between threads.
+
+    Lookups don't write to the database: hit and miss counters and access
+    times are batched in memory and flushed every LLM_CACHE_FLUSH_EVERY
+    lookups, before an eviction and on close. The total size of the stored
+    responses is kept in memory too, and only re-summed from the table when
+    the limit seems to be reached.
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: int, ttl_seconds: float):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Path of the SQLite database
+            max_bytes: Maximum total size of the stored responses
+            ttl_seconds: Age after which an entry is no longer used (0 or less
+                means entries never expire)
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        # Writes waiting for the next flush
+        self.pending_counts = {"hits": 0, "misses": 0}
+        self.pending_used: Dict[str, float] = {}
+        self.pending_lookups = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_model ON responses (model)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.commit()
+        self.total_bytes = self._stored_bytes()
+
+    def _stored_bytes(self) -> int:
+        """Sum the size of the stored responses (the lock must be held)"""
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _lookup_done(self):
+        """Count a lookup and flush pending writes if enough have accumulated (the lock must be held)"""
+        self.pending_lookups += 1
+        if self.pending_lookups >= LLM_CACHE_FLUSH_EVERY:
+            self._flush()
+            self.conn.commit()
+
+    def _flush(self):
+        """Write pending counters and access times, without committing (the lock must be held)"""
+        if self.pending_used:
+            self.conn.executemany(
+                "UPDATE responses SET last_used = MAX(last_used, ?) WHERE key = ?",
+                [(used, key) for key, used in self.pending_used.items()]
+            )
+        self.conn.executemany(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            [(name, count) for name, count in self.pending_counts.items() if count]
+        )
+        self.pending_counts = {"hits": 0, "misses": 0}
+        self.pending_used = {}
+        self.pending_lookups = 0
+
+    def flush(self):
+        """Write the batched counters and access times to the database"""
+        with self.lock:
+            if self.conn is not None:
+                self._flush()
+                self.conn.commit()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the cache key for a request.
+
+        Args:
+            model: Model name
+            prompt: Full prompt text
+            options: Any other request settings that affect the response
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = json.dumps([model, prompt, options or {}], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            model: Model name
+            prompt: Full prompt text
+            options: Any other request settings that affect the response
+
+        Returns:
+            The cached response, or None if there is no fresh entry
+        """
+        key = self.make_key(model, prompt, options)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response, created_at, size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+                self.total_bytes -= row[2]
+                self.pending_used.pop(key, None)
+                row = None
+
+            if row is None:
+                self.misses += 1
+                self.pending_counts["misses"] += 1
+                self._lookup_done()
+                return None
+
+            self.hits += 1
+            self.pending_counts["hits"] += 1
+            self.pending_used[key] = now
+            self._lookup_done()
+            return row[0]
+
+    def put(self, model: str, prompt: str, response: str, options: Optional[Dict[str, Any]] = None):
+        """
+        Store a response, evicting least recently used entries if the cache is full.
+
+        Args:
+            model: Model name
+            prompt: Full prompt text
+            response: The model's response
+            options: Any other request settings that affect the response
+        """
+        key = self.make_key(model, prompt, options)
+        size = len(response.encode("utf-8"))
+        now = time.time()
+        with self.lock:
+            replaced = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now)
+            )
+            self.total_bytes += size - (replaced[0] if replaced else 0)
+            self.pending_used.pop(key, None)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """Delete the least recently used entries until the cache is back under its size limit"""
+        # Access times must be up to date to pick the right entries, and the
+        # total may have drifted if another process shares the database
+        self._flush()
+        self.total_bytes = self._stored_bytes()
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        excess = self.total_bytes - int(self.max_bytes * LLM_CACHE_EVICT_TO)
+        freed = 0
+        keys = []
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            keys.append(key)
+            freed += size
+            if freed >= excess:
+                break
+
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in keys])
+        self.total_bytes -= freed
+        logger.info(f"Evicted {len(keys)} entries from the LLM cache")
+
+    def purge_expired(self) -> int:
+        """
+        Delete every entry older than the TTL.
+
+        Returns:
+            Number of entries deleted
+        """
+        if self.ttl_seconds <= 0:
+            return 0
+        with self.lock:
+            cursor = self.conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self.conn.commit()
+            self.total_bytes = self._stored_bytes()
+            return cursor.rowcount
+
+    def invalidate_model(self, model: str) -> int:
+        """
+        Delete every entry produced by a model.
+
+        Args:
+            model: Model name
+
+        Returns:
+            Number of entries deleted
+        """
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM responses WHERE model = ?", (model,))
+            self.conn.commit()
+            self.total_bytes = self._stored_bytes()
+            return cursor.rowcount
+
+    def clear(self) -> int:
+        """
+        Delete every entry.
+
+        Returns:
+            Number of entries deleted
+        """
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+            self.total_bytes = 0
+            self.pending_used = {}
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with this session's hits, misses and hit rate, the
+            lifetime totals, and the number of entries and stored bytes per model
+        """
+        with self.lock:
+            self._flush()
+            self.conn.commit()
+            models = {
+                model: {"entries": entries, "bytes": size}
+                for model, entries, size in self.conn.execute(
+                    "SELECT model, COUNT(*), SUM(size) FROM responses GROUP BY model"
+                )
+            }
+            counters = dict(self.conn.execute("SELECT name, value FROM counters"))
+        lookups = self.hits + self.misses
+        total_hits = counters.get("hits", 0)
+        total_lookups = total_hits + counters.get("misses", 0)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "total_hits": total_hits,
+            "total_misses": counters.get("misses", 0),
+            "total_hit_rate": total_hits / total_lookups if total_lookups else 0.0,
+            "entries": sum(m["entries"] for m in models.values()),
+            "bytes": sum(m["bytes"] for m in models.values()),
+            "models": models,
+        }
+
+    def log_stats(self):
+        """Log hit/miss counters for this session and the size of the cache"""
+        stats = self.stats()
+        logger.info(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses "
+                    f"({stats['hit_rate'] * 100:.1f}% hit rate), {stats['entries']} entries "
+                    f"(~{stats['bytes'] / 1024 / 1024:.1f} MB)")
+
+    def close(self):
+        """Flush pending writes and close the database connection"""
+        with self.lock:
+            if self.conn is None:
+                return
+            self._flush()
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """
+    Get the shared LLM cache, opening it on first use.
+
+    Returns:
+        The cache, or None if caching is disabled with LLM_CACHE=false
+    """
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(
+                LLM_CACHE_PATH,
+                max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+                ttl_seconds=LLM_CACHE_TTL_DAYS * 24 * 60 * 60
+            )
+            # Batched counters and access times would otherwise be lost
+            atexit.register(_cache.close)
+        return _cache
+
+def main():
+    """Inspect or maintain the LLM cache"""
+    parser = argparse.ArgumentParser(description="Inspect or maintain the LLM response cache")
+    parser.add_argument("--invalidate-model", metavar="MODEL", help="Delete every cached response from a model")
+    parser.add_argument("--purge-expired", action="store_true", help="Delete every entry older than the TTL")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached response")
+
+    args = parser.parse_args()
+
+    cache = LLMCache(
+        LLM_CACHE_PATH,
+        max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+        ttl_seconds=LLM_CACHE_TTL_DAYS * 24 * 60 * 60
+    )
+
+    if args.invalidate_model:
+        deleted = cache.invalidate_model(args.invalidate_model)
+        logger.info(f"Deleted {deleted} cached responses from {args.invalidate_model}")
+    if args.purge_expired:
+        logger.info(f"Deleted {cache.purge_expired()} expired responses")
+    if args.clear:
+        logger.info(f"Deleted {cache.clear()} cached responses")
+
+    stats = cache.stats()
+    logger.info(f"LLM cache at {LLM_CACHE_PATH}: {stats['entries']} entries "
+                f"(~{stats['bytes'] / 1024 / 1024:.1f} MB)")
+    logger.info(f"Lifetime: {stats['total_hits']} hits, {stats['total_misses']} misses "
+                f"({stats['total_hit_rate'] * 100:.1f}% hit rate)")
+    for model, info in sorted(stats["models"].items()):
+        logger.info(f"  - {model}: {info['entries']} entries (~{info['bytes'] / 1024 / 1024:.1f} MB)")
+
+    cache.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of parsed TLDR pages, keyed by git blob hash.
+"""
+
+import json
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Union
+import utils
+
+logger = utils.logger
+
+class ParseCache:
+    """
+    Least-recently-used cache of parse results keyed by git blob hash.
+
+    A blob hash identifies the exact bytes of a page, so a cached entry stays
+    valid for as long as the page is unchanged, even across fresh clones.
+    Entries are evicted oldest-first once the cache grows past max_bytes.
+    """
+
+    def __init__(self, path: Union[str, Path], version: str, max_bytes: int):
+        """
+        Load the cache from disk.
+
+        Args:
+            path: Path of the cache file
+            version: Parser version; a cache written by another version is discarded
+            max_bytes: Approximate maximum size of the cache file
+        """
+        self.path = Path(path)
+        self.version = version
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        data = utils.load_json(self.path) if self.path.exists() else {}
+        if isinstance(data, dict) and data.get("version") == version:
+            for key, value in data.get("entries", {}).items():
+                self.entries[key] = value
+                self.size += self._entry_size(key, value)
+        elif data:
+            logger.info(f"Discarding parse cache written by another parser version: {self.path}")
+
+    @staticmethod
+    def _entry_size(key: str, value: Any) -> int:
+        """Approximate number of bytes an entry takes in the cache file"""
+        return len(key) + len(json.dumps(value, ensure_ascii=False)) + 6
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a parse result and mark it as recently used.
+
+        Args:
+            key: Blob hash of the page
+
+        Returns:
+            The cached parse result, or None on a miss
+        """
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any):
+        """
+        Store a parse result, evicting the least recently used entries if needed.
+
+        Args:
+            key: Blob hash of the page
+            value: Parse result to store
+        """
+        if key in self.entries:
+            self.size -= self._entry_size(key, self.entries.pop(key))
+        self.entries[key] = value
+        self.size += self._entry_size(key, value)
+
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            old_key, old_value = self.entries.popitem(last=False)
+            self.size -= self._entry_size(old_key, old_value)
+            self.evictions += 1
+
+    def save(self) -> bool:
+        """Write the cache to disk"""
+        return utils.save_json(
+            {"version": self.version, "entries": self.entries},
+            self.path,
+            pretty=False
+        )
+
+    def log_stats(self):
+        """Log hit/miss counters for this run"""
+        lookups = self.hits + self.misses
+        hit_rate = 100 * self.hits / lookups if lookups else 0
+        logger.info(f"Parse cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate), "
+                    f"{self.evictions} evictions, {len(self.entries)} entries "
+                    f"(~{self.size / 1024 / 1024:.1f} MB)")
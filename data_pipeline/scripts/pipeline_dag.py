@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Make-style runner for pipeline stages, skipping stages whose inputs are unchanged.
+"""
+
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
+import utils
+
+logger = utils.logger
+
+# Fingerprints of the last successful run of each stage
+STATE_FILE = utils.DATA_DIR / "pipeline_state.json"
+
+# Record fields that change on every run and are left out of record digests
+VOLATILE_FIELDS = ("created_at", "updated_at")
+
+class Stage:
+    """
+    One step of the pipeline, with its declared inputs and outputs.
+
+    A stage's run function gets the records returned by the stages it
+    depends on and returns its own, which are handed to its dependents in
+    memory; it raises an exception to fail. Intermediate stages only write
+    their outputs when asked to keep them.
+
+    A stage is up to date when its fingerprint (a hash of its input files, the
+    records of the stages it depends on, the source of its code and its
+    parameters) matches the one recorded when it last succeeded, and its
+    outputs exist. Stages with no inputs, like the scraper, can instead be
+    given a maximum age. A stage that can finish only part of its work in a
+    run, like the AI step, can count the records it left incomplete; it stays
+    stale until that count is 0.
+    """
+
+    def __init__(self, name: str, description: str, run: Callable[[Dict[str, Any], bool], Any],
+                 inputs: Iterable[Union[str, Path]] = (), outputs: Iterable[Union[str, Path]] = (),
+                 deps: Iterable[str] = (), code: Iterable[Union[str, Path]] = (),
+                 params: Optional[Dict[str, Any]] = None, max_age: Optional[float] = None,
+                 optional: bool = False, intermediate: bool = False,
+                 incomplete: Optional[Callable[[Any], int]] = None):
+        """
+        Describe a stage.
+
+        Args:
+            name: Short name, used on the command line
+            description: Title used in log messages
+            run: Function taking the records of the stages it depends on (by
+                name, for those that ran in this process) and whether to write
+                its outputs, and returning its records
+            inputs: Files the stage reads that no stage writes; missing files are allowed
+            outputs: Files the stage writes
+            deps: Names of the stages that must run first
+            code: Source files whose changes make the stage stale
+            params: Settings that change the stage's outputs
+            max_age: Seconds after which the stage is stale regardless
+            optional: Whether dependent stages still run if this one fails
+            intermediate: Whether the outputs are only written when intermediates are kept
+            incomplete: Function counting the records a run left unfinished,
+                given the stage's records
+        """
+        self.name = name
+        self.description = description
+        self.run = run
+        self.inputs = [Path(path) for path in inputs]
+        self.outputs = [Path(path) for path in outputs]
+        self.deps = list(deps)
+        self.code = [Path(path) for path in code]
+        self.params = params or {}
+        self.max_age = max_age
+        self.optional = optional
+        self.intermediate = intermediate
+        self.incomplete = incomplete
+
+def file_digest(path: Path) -> Optional[str]:
+    """
+    Hash the contents of a file.
+
+    Args:
+        path: Path of the file
+
+    Returns:
+        Hex digest, or None if the file doesn't exist
+    """
+    if not path.exists():
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def records_digest(records: Any) -> str:
+    """
+    Hash the records a stage returned, ignoring timestamps.
+
+    Records are hashed one at a time, so a stream of records is never held
+    in memory.
+
+    Args:
+        records: The stage's return value
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    if records is None or isinstance(records, (dict, str, int, float)):
+        records = [records]
+    for record in records:
+        if isinstance(record, utils.CompactRecord):
+            record = record.to_dict()
+        if isinstance(record, dict):
+            record = {key: value for key, value in record.items() if key not in VOLATILE_FIELDS}
+        digest.update(json.dumps(record, sort_keys=True, default=str).encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+def stage_fingerprint(stage: Stage, dep_digests: Optional[Dict[str, Optional[str]]] = None) -> str:
+    """
+    Fingerprint a stage's inputs, code and parameters.
+
+    Args:
+        stage: The stage
+        dep_digests: Digests of the records of the stages it depends on
+
+    Returns:
+        Hex digest
+    """
+    content = {
+        "inputs": {str(path): file_digest(path) for path in stage.inputs},
+        "deps": dep_digests or {},
+        "code": {path.name: file_digest(path) for path in stage.code},
+        "params": stage.params,
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def select_stages(stages: Dict[str, Stage], until: Optional[str] = None) -> Set[str]:
+    """
+    Get the stages to consider for a run.
+
+    Args:
+        stages: Stages by name
+        until: Optional stage to stop at; only it and the stages it depends on are run
+
+    Returns:
+        Names of the selected stages
+    """
+    if until is None:
+        return set(stages)
+
+    selected = set()
+    to_visit = [until]
+    while to_visit:
+        name = to_visit.pop()
+        if name not in selected:
+            selected.add(name)
+            to_visit.extend(stages[name].deps)
+    return selected
+
+def run_stages(stages: List[Stage], force: Iterable[str] = (), until: Optional[str] = None,
+               state_file: Optional[Union[str, Path]] = None, keep_intermediates: bool = False) -> bool:
+    """
+    Run the stages that are out of date, in dependency order.
+
+    Stages whose dependencies have all finished run in parallel, and each one
+    gets the records of the dependencies that ran. A stage is rerun if it is
+    forced, its fingerprint changed, one of its outputs is missing, its last
+    run left records incomplete or it is older than its maximum age;
+    otherwise it is skipped. An intermediate stage
+    that was skipped is run again in memory when a stage that needs its
+    records runs and its outputs weren't kept.
+
+    Args:
+        stages: The pipeline's stages
+        force: Names of stages to rerun even if up to date ("all" forces every stage)
+        until: Optional stage to stop at; its outputs are written even if it is intermediate
+        state_file: Where fingerprints of successful runs are kept (defaults to STATE_FILE)
+        keep_intermediates: Whether intermediate stages write their outputs
+
+    Returns:
+        True if every selected stage succeeded or was up to date (failures of
+        optional stages are tolerated)
+
+    Raises:
+        ValueError: If a stage name is unknown or the stages have a cycle
+    """
+    by_name = {stage.name: stage for stage in stages}
+    force = set(force)
+    for name in force - {"all"} | ({until} if until else set()):
+        if name not in by_name:
+            raise ValueError(f"Unknown stage: {name} (stages: {', '.join(by_name)})")
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage {stage.name} depends on unknown stage {dep}")
+
+    selected = select_stages(by_name, until)
+    state_file = Path(state_file or STATE_FILE)
+    state = utils.load_json(state_file) if state_file.exists() else {}
+    if not isinstance(state, dict):
+        state = {}
+
+    finished = set()
+    failed = set()
+    pending = {}
+    remaining = [stage for stage in stages if stage.name in selected]
+    results = {}
+    # Set once a skipped stage that was rerun for its records has finished
+    rerunning: Dict[str, threading.Event] = {}
+    # Guards results, state and rerunning; stages never run while it is held
+    lock = threading.Lock()
+    ok = True
+
+    def persists(stage: Stage) -> bool:
+        """Whether a stage writes its outputs"""
+        return not stage.intermediate or keep_intermediates or stage.name == until
+
+    def fingerprint_of(stage: Stage) -> str:
+        """Fingerprint a stage given the current records of its dependencies"""
+        dep_digests = {dep: state.get(dep, {}).get("records") for dep in stage.deps}
+        return stage_fingerprint(stage, dep_digests)
+
+    def execute(stage: Stage, fingerprint: str, persist: bool):
+        """Run a stage and record its fingerprint and the digest of its records"""
+        start = time.time()
+        records = stage.run({dep: results[dep] for dep in stage.deps if dep in results}, persist)
+        incomplete = stage.incomplete(records) if stage.incomplete is not None else 0
+        with lock:
+            results[stage.name] = records
+            state[stage.name] = {
+                "fingerprint": fingerprint,
+                "records": records_digest(records),
+                "persisted": persist,
+                "incomplete": incomplete,
+                "finished_at": time.time(),
+                "duration": round(time.time() - start, 3),
+            }
+        if incomplete:
+            logger.warning(f"{stage.description}: {incomplete} records left incomplete, "
+                           f"the stage will run again")
+
+    def ensure_records(stage: Stage):
+        """Rerun, in memory, skipped intermediate dependencies whose outputs weren't kept"""
+        for dep in stage.deps:
+            dep_stage = by_name[dep]
+            # Only decide under the lock; the stage itself runs outside it
+            with lock:
+                if dep in results or not dep_stage.intermediate:
+                    continue
+                recorded = state.get(dep, {})
+                if recorded.get("persisted") and all(path.exists() for path in dep_stage.outputs):
+                    continue
+                done = rerunning.get(dep)
+                owner = done is None
+                if owner:
+                    done = rerunning[dep] = threading.Event()
+                    fingerprint = recorded.get("fingerprint") or fingerprint_of(dep_stage)
+
+            if not owner:
+                # Another stage is already rerunning it
+                done.wait()
+                if dep not in results:
+                    raise RuntimeError(f"Stage {dep} failed to produce the records {stage.name} needs")
+                continue
+
+            try:
+                ensure_records(dep_stage)
+                logger.info(f"\n=== {dep_stage.description} (records needed by {stage.name}) ===")
+                execute(dep_stage, fingerprint, False)
+            finally:
+                done.set()
+
+    def run_stage(stage: Stage):
+        """Run a stage if it is out of date"""
+        with lock:
+            fingerprint = fingerprint_of(stage)
+            recorded = state.get(stage.name, {})
+        persist = persists(stage)
+        age = time.time() - recorded.get("finished_at", 0)
+        stale_reason = None
+        if "all" in force or stage.name in force:
+            stale_reason = "forced"
+        elif recorded.get("fingerprint") != fingerprint:
+            stale_reason = "inputs, code or parameters changed" if recorded else "never run"
+        elif persist and (not recorded.get("persisted", True) or any(not path.exists() for path in stage.outputs)):
+            stale_reason = "outputs missing"
+        elif recorded.get("incomplete"):
+            stale_reason = f"{recorded['incomplete']} records left incomplete by the last run"
+        elif stage.max_age is not None and age > stage.max_age:
+            stale_reason = f"last run {age / 3600:.1f} hours ago"
+
+        if stale_reason is None:
+            logger.info(f"=== {stage.description}: up to date, skipping ===")
+            return
+
+        ensure_records(stage)
+        logger.info(f"\n=== {stage.description} ({stale_reason}) ===")
+        execute(stage, fingerprint, persist)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(remaining))) as executor:
+        while remaining or pending:
+            # Start every stage whose dependencies are done
+            for stage in list(remaining):
+                deps = [dep for dep in stage.deps if dep in selected]
+                if any(dep in failed for dep in deps):
+                    logger.error(f"Not running {stage.name}: a stage it depends on failed")
+                    remaining.remove(stage)
+                    failed.add(stage.name)
+                    ok = False
+                elif all(dep in finished for dep in deps):
+                    remaining.remove(stage)
+                    pending[executor.submit(run_stage, stage)] = stage
+
+            if not pending:
+                if remaining:
+                    raise ValueError(f"Stages have a dependency cycle: {', '.join(s.name for s in remaining)}")
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = pending.pop(future)
+                try:
+                    future.result()
+                    succeeded = True
+                except Exception as e:
+                    logger.error(f"Error in stage {stage.name}: {e}")
+                    succeeded = False
+
+                if succeeded or stage.optional:
+                    if not succeeded:
+                        logger.warning(f"Continuing without stage {stage.name}")
+                    finished.add(stage.name)
+                else:
+                    failed.add(stage.name)
+                    ok = False
+
+            with lock:
+                utils.save_json(state, state_file)
+
+    return ok
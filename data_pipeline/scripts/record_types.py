@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Typed command records generated from schema/syntax_schema.json.
+
+Do not edit: regenerate with `python generate_record_types.py`.
+"""
+
+from typing import Any, Dict, List, Union
+import msgspec
+from msgspec import UNSET, UnsetType
+
+# Digest of the schema these types were generated from
+SCHEMA_DIGEST = "d0c78803e53d7a55fd9fcc0dc154038d02a2c1adf892337e7b862e6e82eeb0fb"
+
+class Example(msgspec.Struct, kw_only=True):
+    """One of the examples"""
+
+    code: str
+    description: str
+
+class Source(msgspec.Struct, kw_only=True):
+    """Information about the source of this command"""
+
+    name: Union[str, UnsetType] = UNSET
+    url: Union[str, UnsetType] = UNSET
+    license: Union[str, UnsetType] = UNSET
+
+class Command(msgspec.Struct, kw_only=True):
+    """A command record"""
+
+    id: str
+    command: str
+    description: str
+    category: str
+    tags: List[str]
+    explanation: Union[str, UnsetType] = UNSET
+    examples: Union[List[Example], UnsetType] = UNSET
+    source: Union[Source, UnsetType] = UNSET
+    created_at: Union[str, UnsetType] = UNSET
+    updated_at: Union[str, UnsetType] = UNSET
+
+Record = Command
+
+_array_decoder = msgspec.json.Decoder(List[Record])
+
+def is_valid(record: Any) -> bool:
+    """Check an already decoded record against the schema"""
+    try:
+        msgspec.convert(record, Record)
+        return True
+    except msgspec.ValidationError:
+        return False
+
+def decode_array(data: Union[bytes, memoryview]) -> List[Record]:
+    """
+    Decode and validate a JSON array of records in one pass.
+
+    Raises:
+        msgspec.ValidationError: If a record doesn't match the schema
+        msgspec.DecodeError: If the data isn't valid JSON
+    """
+    return _array_decoder.decode(data)
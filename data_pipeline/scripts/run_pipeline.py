@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Main script to run the entire data pipeline in sequence.
+Main script to run the data pipeline, skipping stages that are up to date.
 """
 
 import os
@@ -8,6 +8,7 @@ import sys
 import time
 import argparse
 from pathlib import Path
+from typing import List, Optional
 
 # Add the current directory to the Python path
 sys.path.append(str(Path(__file__).resolve().parent))
@@ -19,71 +20,170 @@ import enrich_data
 import enrich_with_ai
 import combine_all
 import export_to_json
+import pipeline_dag
 
 logger = utils.logger
 
-def run_pipeline(skip_ai: bool = False, limit: int = 0):
+# Rescrape TLDR at most this often unless forced, since checking for new
+# commits needs the network
+SCRAPE_MAX_AGE_HOURS = float(os.environ.get("SCRAPE_MAX_AGE_HOURS", "24"))
+
+def build_stages(skip_ai: bool = False, limit: int = 0, full_scrape: bool = False, workers: int = 0,
+                 batch_categories: bool = False, tfidf: bool = False, ai_concurrency: int = 0,
+                 resume: bool = False, batch_tags: bool = False,
+                 ai_time_budget: float = 0, normalized_export: bool = False) -> List[pipeline_dag.Stage]:
     """
-    Run the entire data pipeline in sequence.
+    Describe the pipeline as stages with their inputs and outputs.
+
+    Each stage passes its records to the next in memory; enriched and
+    combined commands are only written to disk when intermediates are kept,
+    and are then streamed through their JSON Lines files one at a time.
 
     Args:
-        skip_ai: Whether to skip the AI enrichment step
-        limit: Limit the number of commands to process in the AI step
+        Same as run_pipeline
+
+    Returns:
+        List of stages
     """
-    start_time = time.time()
-    logger.info("Starting SyntaxScope data pipeline")
+    normalized_export = normalized_export or export_to_json.EXPORT_NORMALIZED
 
-    # Step 1: Scrape TLDR pages
-    logger.info("\n=== Step 1: Scraping TLDR pages ===")
-    try:
-        commands = scrape_tldr.scrape_tldr_pages()
+    def scrape(results, persist):
+        commands = scrape_tldr.scrape_tldr_pages(full=full_scrape, workers=workers or None)
         logger.info(f"Scraped {len(commands)} commands from TLDR pages")
-    except Exception as e:
-        logger.error(f"Error in Step 1 (Scrape TLDR): {e}")
-        return False
+        return utils.RecordStream(utils.iter_commands, scrape_tldr.OUTPUT_FILE)
+
+    def enrich(results, persist):
+        # An empty result is still a result; only read the file if the stage didn't run
+        scraped_commands = results.get("scrape")
+        if scraped_commands is None:
+            scraped_commands = utils.RecordStream(utils.iter_commands, enrich_data.INPUT_FILE)
+        enriched_commands = enrich_data.enrich_records(scraped_commands, batch=batch_categories or tfidf, tfidf=tfidf)
+        if not persist:
+            return list(enriched_commands)
+        # Stream through the file instead of holding the records in memory
+        utils.write_jsonl(enriched_commands, enrich_data.OUTPUT_FILE)
+        return utils.RecordStream(utils.iter_commands, enrich_data.OUTPUT_FILE)
+
+    def enrich_ai(results, persist):
+        # Set environment variable for the limit
+        if limit > 0:
+            os.environ["PROCESS_LIMIT"] = str(limit)
+            logger.info(f"Processing only {limit} commands in AI step")
+
+        # The AI step always writes its output, since it is the cache of previous results
+        ai_commands = enrich_with_ai.enrich_with_ai_explanations(limit, ai_concurrency or None, resume,
+                                                                 batch_tags or None, ai_time_budget or None,
+                                                                 commands=results.get("enrich"))
+        if not ai_commands:
+            raise RuntimeError("No commands were enriched with AI explanations")
+        logger.info(f"Added AI explanations to {len(ai_commands)} commands")
+        return ai_commands
+
+    def combine(results, persist):
+        enriched_commands = results.get("enrich")
+        if enriched_commands is None:
+            enriched_commands = utils.RecordStream(utils.iter_commands, combine_all.ENRICHED_PATH)
+        ai_commands = results.get("ai")
+        if ai_commands is None:
+            ai_commands = combine_all.load_ai_commands()
+        combined_commands = combine_all.combine_records(enriched_commands, ai_commands)
+        if not persist:
+            return list(combined_commands)
+        utils.write_jsonl(combined_commands, combine_all.OUTPUT_PATH)
+        return utils.RecordStream(utils.iter_commands, combine_all.OUTPUT_PATH)
+
+    def export(results, persist):
+        combined_commands = results.get("combine")
+        if combined_commands is None:
+            combined_commands = utils.RecordStream(utils.iter_commands, export_to_json.INPUT_PATH)
+        exported = export_to_json.export_records(combined_commands, normalized=normalized_export)
+        logger.info(f"Exported {exported} commands to frontend")
+        return exported
+
+    scripts_dir = Path(__file__).resolve().parent
+    stages = [
+        pipeline_dag.Stage(
+            "scrape", "Scraping TLDR pages", scrape,
+            outputs=[scrape_tldr.OUTPUT_FILE, scrape_tldr.SHARD_INDEX_FILE],
+            code=[scripts_dir / "scrape_tldr.py", scripts_dir / "parse_cache.py"],
+            params={"parser": scrape_tldr.PARSER_VERSION},
+            max_age=SCRAPE_MAX_AGE_HOURS * 3600
+        ),
+        pipeline_dag.Stage(
+            "enrich", "Enriching data with categories and tags", enrich,
+            outputs=[enrich_data.OUTPUT_FILE], deps=["scrape"],
+            code=[scripts_dir / "enrich_data.py"],
+            params={"batch": batch_categories or tfidf, "tfidf": tfidf},
+            intermediate=True
+        ),
+    ]
+    if not skip_ai:
+        stages.append(pipeline_dag.Stage(
+            "ai", "Enriching with AI explanations", enrich_ai,
+            outputs=[enrich_with_ai.OUTPUT_PATH], deps=["enrich"],
+            code=[scripts_dir / "enrich_with_ai.py"],
+            params={"model": enrich_with_ai.OLLAMA_MODEL, "limit": limit, "batch_tags": batch_tags,
+                    "time_budget": ai_time_budget},
+            optional=True, incomplete=enrich_with_ai.count_unenriched
+        ))
+    stages += [
+        pipeline_dag.Stage(
+            "combine", "Combining all data sources", combine,
+            outputs=[combine_all.OUTPUT_PATH], deps=["enrich"] + ([] if skip_ai else ["ai"]),
+            code=[scripts_dir / "combine_all.py"],
+            intermediate=True
+        ),
+        pipeline_dag.Stage(
+            "export", "Exporting to JSON for frontend", export,
+            outputs=[export_to_json.OUTPUT_PATH], deps=["combine"],
+            code=[scripts_dir / "export_to_json.py"],
+            params={"normalized": normalized_export}
+        ),
+    ]
+    return stages
+
+def run_pipeline(skip_ai: bool = False, limit: int = 0, full_scrape: bool = False, workers: int = 0,
+                 batch_categories: bool = False, tfidf: bool = False, ai_concurrency: int = 0,
+                 resume: bool = False, batch_tags: bool = False, ai_time_budget: float = 0,
+                 force: Optional[List[str]] = None, until: Optional[str] = None,
+                 keep_intermediates: bool = False, normalized_export: bool = False):
+    """
+    Run the data pipeline, skipping stages that are up to date.
 
-    # Step 2: Enrich data with categories and tags
-    logger.info("\n=== Step 2: Enriching data with categories and tags ===")
-    try:
-        enriched_commands = enrich_data.enrich_data()
-        logger.info(f"Enriched {len(enriched_commands)} commands")
-    except Exception as e:
-        logger.error(f"Error in Step 2 (Enrich Data): {e}")
-        return False
+    Stages run in dependency order, and only when their inputs, code or
+    parameters changed since they last succeeded (see pipeline_dag). Records
+    are handed from stage to stage in memory.
 
-    # Step 3: Enrich with AI explanations (optional)
-    if not skip_ai:
-        logger.info("\n=== Step 3: Enriching with AI explanations ===")
-        try:
-            # Set environment variable for the limit
-            if limit > 0:
-                os.environ["PROCESS_LIMIT"] = str(limit)
-                logger.info(f"Processing only {limit} commands in AI step")
-
-            ai_commands = enrich_with_ai.enrich_with_ai_explanations(limit)
-            logger.info(f"Added AI explanations to {len(ai_commands)} commands")
-        except Exception as e:
-            logger.error(f"Error in Step 3 (Enrich with AI): {e}")
-            logger.warning("Continuing pipeline without AI enrichment")
-    else:
-        logger.info("\n=== Step 3: Skipping AI enrichment ===")
+    Args:
+        skip_ai: Whether to skip the AI enrichment step
+        limit: Limit the number of commands to process in the AI step
+        full_scrape: Reparse every TLDR page instead of only the changed ones (forces the scrape stage)
+        workers: Number of processes used to parse TLDR pages (0 for one per CPU)
+        batch_categories: Classify categories in one vectorized pass
+        tfidf: Weight category keywords by TF-IDF in batch mode
+        ai_concurrency: Commands processed at once in the AI step (0 for the default)
+        resume: Skip commands finished by an interrupted AI step
+        batch_tags: Request tags for many commands per prompt in the AI step
+        ai_time_budget: Seconds the AI step may take, spent on the most valuable commands first (0 for no limit)
+        force: Names of stages to rerun even if up to date ("all" for every stage)
+        until: Optional stage to stop at, after the stages it depends on
+        keep_intermediates: Also write the enriched and combined commands to the data directory
+        normalized_export: Write syntax.json in the normalized format (defaults to EXPORT_NORMALIZED)
+    """
+    start_time = time.time()
+    logger.info("Starting SyntaxScope data pipeline")
 
-    # Step 4: Combine all data sources
-    logger.info("\n=== Step 4: Combining all data sources ===")
-    try:
-        combined_commands = combine_all.combine_data()
-        logger.info(f"Combined {len(combined_commands)} commands")
-    except Exception as e:
-        logger.error(f"Error in Step 4 (Combine All): {e}")
-        return False
+    stages = build_stages(skip_ai, limit, full_scrape, workers, batch_categories, tfidf,
+                          ai_concurrency, resume, batch_tags, ai_time_budget, normalized_export)
+    force = list(force or [])
+    if full_scrape:
+        force.append("scrape")
 
-    # Step 5: Export to JSON for frontend
-    logger.info("\n=== Step 5: Exporting to JSON for frontend ===")
     try:
-        exported_commands = export_to_json.export_to_json()
-        logger.info(f"Exported {len(exported_commands)} commands to frontend")
-    except Exception as e:
-        logger.error(f"Error in Step 5 (Export to JSON): {e}")
+        success = pipeline_dag.run_stages(stages, force=force, until=until,
+                                          keep_intermediates=keep_intermediates)
+    except ValueError as e:
+        logger.error(str(e))
         return False
 
     # Calculate total time
@@ -92,17 +192,35 @@ def run_pipeline(skip_ai: bool = False, limit: int = 0):
     logger.info(f"\n=== Pipeline completed in {total_time:.2f} seconds ===")
     logger.info(f"Final output: {utils.PUBLIC_DATA_DIR / 'syntax.json'}")
 
-    return True
+    return success
 
 def main():
     """Parse arguments and run the pipeline"""
     parser = argparse.ArgumentParser(description="Run the SyntaxScope data pipeline")
     parser.add_argument("--skip-ai", action="store_true", help="Skip the AI enrichment step")
     parser.add_argument("--limit", type=int, default=0, help="Limit the number of commands to process in the AI step")
+    parser.add_argument("--full-scrape", action="store_true", help="Reparse every TLDR page instead of only the ones changed since the last run")
+    parser.add_argument("--workers", type=int, default=0, help="Number of processes used to parse TLDR pages (defaults to one per CPU)")
+    parser.add_argument("--batch-categories", action="store_true", help="Classify categories for all commands in one vectorized pass (needs NumPy)")
+    parser.add_argument("--tfidf", action="store_true", help="Weight category keywords by TF-IDF in batch mode")
+    parser.add_argument("--ai-concurrency", type=int, default=0, help="Number of commands processed at once in the AI step (defaults to OLLAMA_CONCURRENCY)")
+    parser.add_argument("--resume", action="store_true", help="Resume an interrupted AI step from its checkpoint log")
+    parser.add_argument("--batch-tags", action="store_true", help="Request tags for many commands per prompt in the AI step")
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE",
+                        help="Rerun a stage even if it is up to date (repeatable; 'all' for every stage)")
+    parser.add_argument("--until", metavar="STAGE", help="Stop after this stage and the stages it depends on")
+    parser.add_argument("--ai-time-budget", type=float, default=0, help="Seconds the AI step may take, spent on the most valuable commands first")
+    parser.add_argument("--keep-intermediates", action="store_true", help="Also write the enriched and combined commands to the data directory")
+    parser.add_argument("--normalized-export", action="store_true", help="Write syntax.json with string tables that records refer to by index")
 
     args = parser.parse_args()
 
-    success = run_pipeline(skip_ai=args.skip_ai, limit=args.limit)
+    success = run_pipeline(skip_ai=args.skip_ai, limit=args.limit, full_scrape=args.full_scrape, workers=args.workers,
+                           batch_categories=args.batch_categories, tfidf=args.tfidf,
+                           ai_concurrency=args.ai_concurrency, resume=args.resume,
+                           batch_tags=args.batch_tags, ai_time_budget=args.ai_time_budget,
+                           force=args.force, until=args.until, keep_intermediates=args.keep_intermediates,
+                           normalized_export=args.normalized_export)
 
     if success:
         logger.info("Pipeline completed successfully")
@@ -3,16 +3,45 @@
 Script to fetch command syntax from TLDR pages GitHub repository.
 """
 
-import re
+import os
+import time
+import argparse
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
 import utils
+from parse_cache import ParseCache
 
 logger = utils.logger
 
 # Setup paths
-OUTPUT_FILE = utils.DATA_DIR / "raw" / "tldr" / "tldr_commands.json"
+OUTPUT_FILE = utils.DATA_DIR / "raw" / "tldr" / "tldr_commands.jsonl"
+SHARD_DIR = utils.DATA_DIR / "raw" / "tldr" / "shards"
+SHARD_INDEX_FILE = SHARD_DIR / "index.json"
+STATE_FILE = utils.DATA_DIR / "raw" / "tldr" / "scrape_state.json"
 CLONE_DIR = utils.DATA_DIR / "raw" / "tldr" / "repo"
+PARSE_CACHE_FILE = utils.DATA_DIR / "raw" / "tldr" / "parse_cache.json"
+
+# Bump whenever parse_page output changes so cached parses are discarded
+PARSER_VERSION = "1"
+
+# Locale of the untranslated "pages" directory; its records feed the rest of the pipeline
+DEFAULT_LOCALE = "en"
+
+# Upper bound for the parse cache file
+PARSE_CACHE_MAX_BYTES = int(os.environ.get("PARSE_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+# Base URL for linking records back to their source page
+PAGE_URL_PREFIX = "https://github.com/tldr-pages/tldr/blob/main/"
+
+# Below this many pages a process pool costs more to start than it saves
+PROCESS_POOL_MIN_PAGES = 200
+
+# Maximum number of pages with problems, and of pages that could not be
+# parsed, listed individually in the log
+MAX_REPORTED_PROBLEMS = 20
 
 def clone_tldr_repo():
     """Clone or update the TLDR pages repository"""
@@ -43,83 +72,500 @@ def clone_tldr_repo():
             logger.error(f"Failed to clone repository: {e}")
             return False
 
-def parse_md_file(file_path):
-    """Parse a TLDR markdown file and extract command information"""
+def run_git(*args) -> Optional[str]:
+    """
+    Run a git command inside the TLDR clone.
+
+    Args:
+        *args: Arguments to pass to git
+
+    Returns:
+        The command's stdout, or None if it failed
+    """
     try:
-        content = file_path.read_text(encoding="utf-8")
-
-        # Extract the title (first line after # )
-        title_match = re.search(r"^# (.*?)$", content, re.MULTILINE)
-        if not title_match:
-            return None
-        title = title_match.group(1).strip()
-
-        # Extract the description (line after the title)
-        desc_match = re.search(r"^# .*?\n> (.*?)(?:\n>|\n\n)", content, re.DOTALL)
-        description = desc_match.group(1).strip() if desc_match else ""
-
-        # Replace multiple spaces/newlines in description
-        description = re.sub(r"\s+", " ", description)
-
-        # Extract all command examples
-        commands = []
-        examples = re.findall(r"- (.*?):\n\n`(.*?)`", content, re.DOTALL)
-
-        for example_desc, cmd in examples:
-            example_desc = re.sub(r"\s+", " ", example_desc.strip())
-            commands.append({
-                "code": cmd.strip(),
-                "description": example_desc
-            })
-
-        # Determine the language based on the directory structure
-        parts = file_path.parts
-        language = "unknown"
-        for idx, part in enumerate(parts):
-            if part == "pages":
-                if idx + 1 < len(parts):
-                    language = parts[idx + 1]
-                break
-
-        # Map common language directories to more specific shells
-        language_map = {
-            "common": "bash",
-            "linux": "bash",
-            "osx": "bash",
-            "windows": "powershell",
-            "sunos": "bash",
-            "android": "bash",
-        }
+        result = subprocess.run(
+            ["git", *args],
+            cwd=CLONE_DIR,
+            check=True,
+            capture_output=True,
+            text=True
+        )
+        return result.stdout
+    except subprocess.CalledProcessError as e:
+        logger.warning(f"git {' '.join(args)} failed: {e.stderr.strip() if e.stderr else e}")
+        return None
 
-        language = language_map.get(language, language)
-
-        # Create a single entry with all examples
-        command_name = file_path.stem
-
-        result = {
-            "id": utils.generate_id(f"{language}:{command_name}"),
-            "command": command_name,
-            "description": description if description else title,
-            "category": utils.categorize_command(command_name),
-            "tags": utils.extract_tags_from_command(command_name, description),
-            "examples": commands,
-            "source": {
-                "name": "tldr-pages",
-                "url": f"https://github.com/tldr-pages/tldr/blob/main/pages/{language}/{command_name}.md",
-                "license": "MIT"
-            },
-            "created_at": utils.get_timestamp(),
-            "updated_at": utils.get_timestamp()
-        }
+def page_location(rel_path: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Work out where a page lives in the TLDR repository.
+
+    Pages are laid out as pages/<platform>/<command>.md, with translations
+    under pages.<locale>/<platform>/<command>.md.
+
+    Args:
+        rel_path: Page path relative to the repository root
+
+    Returns:
+        Tuple of (locale, platform, command name), or None if the path is not a page
+    """
+    parts = rel_path.split("/")
+    if len(parts) != 3 or not parts[2].endswith(".md"):
+        return None
+
+    pages_dir, platform, filename = parts
+    if pages_dir == "pages":
+        locale = DEFAULT_LOCALE
+    elif pages_dir.startswith("pages.") and len(pages_dir) > len("pages."):
+        locale = pages_dir[len("pages."):]
+    else:
+        return None
+
+    return locale, platform, filename[:-len(".md")]
+
+def is_page_path(rel_path: str) -> bool:
+    """Check whether a repository-relative path is a TLDR page in any locale"""
+    return page_location(rel_path) is not None
+
+def get_head_commit() -> Optional[str]:
+    """Get the commit the TLDR clone is currently at"""
+    output = run_git("rev-parse", "HEAD")
+    return output.strip() if output else None
+
+def get_changed_pages(since_commit: str) -> Optional[Tuple[List[str], List[str]]]:
+    """
+    Ask git which pages changed between a previous commit and HEAD.
+
+    Args:
+        since_commit: The last commit that was ingested
+
+    Returns:
+        Tuple of (added or modified paths, deleted paths) relative to the
+        repository root, or None if git cannot produce the diff (for example
+        when the old commit is not part of a shallow clone)
+    """
+    output = run_git("diff", "--name-status", "--no-renames", since_commit, "HEAD")
+    if output is None:
+        return None
+
+    changed, deleted = [], []
+    for line in output.splitlines():
+        status, _, path = line.partition("\t")
+        if not is_page_path(path):
+            continue
+        if status.startswith("D"):
+            deleted.append(path)
+        else:
+            changed.append(path)
+
+    return changed, deleted
+
+def get_blob_hashes() -> Dict[str, str]:
+    """
+    Get the git blob hash of every page at HEAD without reading the files.
+
+    Returns:
+        Dictionary mapping repository-relative page paths to blob hashes
+    """
+    output = run_git("ls-tree", "-r", "HEAD")
+    if output is None:
+        return {}
 
-        return result
+    blobs = {}
+    for line in output.splitlines():
+        info, _, path = line.partition("\t")
+        fields = info.split()
+        if len(fields) == 3 and fields[1] == "blob" and is_page_path(path):
+            blobs[path] = fields[2]
 
+    return blobs
+
+def page_url(rel_path: str) -> str:
+    """Get the GitHub URL for a page path relative to the repository root"""
+    return PAGE_URL_PREFIX + rel_path
+
+def record_path(record: utils.Command) -> str:
+    """Get the repository-relative page path a scraped record came from"""
+    url = record.source_url or ""
+    return url[len(PAGE_URL_PREFIX):] if url.startswith(PAGE_URL_PREFIX) else ""
+
+def parse_page(content: str, problems: Optional[List[str]] = None) -> Optional[Tuple[str, str, List[Tuple[str, str]]]]:
+    """
+    Parse the text of a TLDR page in a single pass over its lines.
+
+    The page format is a "# title" line, a block of "> description" lines,
+    then examples made of a "- description:" line followed by a line with the
+    example code in backticks. Blank lines and surrounding whitespace are
+    ignored, so examples are found whatever their spacing.
+
+    Args:
+        content: Markdown content of the page
+        problems: Optional list that malformed lines are reported to
+
+    Returns:
+        Tuple of (title, description, [(example description, code), ...]),
+        or None if the page has no title
+    """
+    if problems is None:
+        problems = []
+
+    title = None
+    description_lines = []
+    examples = []
+    pending = None
+
+    for line in content.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        first = line[0]
+
+        if title is None:
+            if first == "#" and line.startswith("# "):
+                title = line[2:].strip()
+            else:
+                problems.append(f"text before title: {line[:60]!r}")
+        elif first == "`" and len(line) >= 2 and line[-1] == "`":
+            code = line[1:-1].strip()
+            if pending is None:
+                problems.append(f"code has no description: {code[:60]!r}")
+            else:
+                examples.append((pending, code))
+                pending = None
+        elif first == "-" and line.startswith("- "):
+            if pending is not None:
+                problems.append(f"example has no code: {pending[:60]!r}")
+            pending = " ".join(line[2:].split())
+            if pending.endswith(":"):
+                pending = pending[:-1].rstrip()
+        elif first == ">":
+            text = line[1:].strip()
+            if examples or pending is not None:
+                problems.append(f"description after examples: {text[:60]!r}")
+            elif text[:17].lower() != "more information:":
+                description_lines.append(text)
+        else:
+            problems.append(f"unexpected line: {line[:60]!r}")
+
+    if pending is not None:
+        problems.append(f"example has no code: {pending[:60]!r}")
+
+    if title is None:
+        problems.append("missing title")
+        return None
+
+    description = " ".join(" ".join(description_lines).split())
+
+    return title, description, examples
+
+def build_record(file_path: Path, parsed: Tuple[str, str, List[Tuple[str, str]]]) -> utils.Command:
+    """
+    Build a command entry from a parsed TLDR page.
+
+    Args:
+        file_path: Path of the page inside the TLDR clone
+        parsed: Result of parse_page for the page
+
+    Returns:
+        Command entry
+    """
+    title, description, examples = parsed
+
+    # The locale and platform come from the directory structure, and are part
+    # of the ID so that same-named pages on different platforms don't collide
+    rel_path = file_path.relative_to(CLONE_DIR).as_posix()
+    locale, platform, command_name = page_location(rel_path)
+    timestamp = utils.get_timestamp()
+
+    return utils.Command(
+        id=utils.generate_id(f"{locale}:{platform}:{command_name}"),
+        command=command_name,
+        description=description if description else title,
+        category=utils.categorize_command(command_name),
+        tags=utils.extract_tags_from_command(command_name, description),
+        examples=[
+            utils.Example(code=code, description=example_desc)
+            for example_desc, code in examples
+        ],
+        source={
+            "name": "tldr-pages",
+            "url": page_url(rel_path),
+            "license": "MIT"
+        },
+        platform=platform,
+        locale=locale,
+        created_at=timestamp,
+        updated_at=timestamp
+    )
+
+def parse_file(path) -> Tuple[Optional[Tuple], List[str]]:
+    """
+    Read and parse a single TLDR page.
+
+    Args:
+        path: Path of the page
+
+    Returns:
+        Tuple of (parse_page result or None, list of problems found)
+    """
+    problems = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            return parse_page(f.read(), problems), problems
+    except Exception as e:
+        problems.append(f"error reading page: {e}")
+        return None, problems
+
+def parse_md_file(file_path):
+    """Parse a TLDR markdown file and extract command information"""
+    parsed, problems = parse_file(file_path)
+    for problem in problems:
+        logger.warning(f"{file_path}: {problem}")
+
+    if not parsed:
+        return None
+
+    try:
+        return build_record(file_path, parsed)
     except Exception as e:
         logger.error(f"Error parsing {file_path}: {e}")
         return None
 
-def scrape_tldr_pages():
-    """Main function to scrape TLDR pages"""
+def parse_chunk(paths: List[str]) -> List[Tuple[str, Optional[Tuple], List[str]]]:
+    """
+    Parse a chunk of pages inside a pool worker.
+
+    Only the compact parse_page tuples travel back to the parent process,
+    which builds the full records.
+
+    Args:
+        paths: Paths of the pages to parse
+
+    Returns:
+        List of (path, parse_page result, problems) tuples
+    """
+    return [(path, *parse_file(path)) for path in paths]
+
+def parse_pages_with_processes(md_files: List[Path], workers: int):
+    """
+    Parse pages across a pool of processes, sending them to workers in chunks.
+
+    Args:
+        md_files: Paths of the pages to parse
+        workers: Number of worker processes
+
+    Yields:
+        (path, parse_page result, problems) tuples
+    """
+    # A few chunks per worker keeps the pool balanced without paying
+    # inter-process overhead for every single page
+    chunk_size = max(1, min(256, len(md_files) // (workers * 4)))
+    chunks = [
+        [str(path) for path in md_files[i:i + chunk_size]]
+        for i in range(0, len(md_files), chunk_size)
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in executor.map(parse_chunk, chunks):
+            yield from chunk
+
+def parse_pages_with_threads(md_files: List[Path], workers: int):
+    """
+    Parse pages across a pool of threads.
+
+    Args:
+        md_files: Paths of the pages to parse
+        workers: Number of worker threads
+
+    Yields:
+        (path, parse_page result, problems) tuples
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(parse_file, file): file for file in md_files}
+
+        for future in as_completed(futures):
+            yield (futures[future], *future.result())
+
+def parse_pages(md_files, engine: str = "auto", workers: Optional[int] = None,
+                cache: Optional[ParseCache] = None, blobs: Optional[Dict[str, str]] = None) -> List[utils.Command]:
+    """
+    Parse a list of markdown pages in parallel.
+
+    Args:
+        md_files: Paths of the pages to parse
+        engine: "process" for a process pool, "thread" for a thread pool, or
+            "auto" to use processes only when there are enough pages
+        workers: Number of workers (defaults to the number of CPUs)
+        cache: Optional parse cache; pages found in it are not read at all
+        blobs: Blob hashes of the pages by repository-relative path, used as
+            cache keys
+
+    Returns:
+        List of parsed command entries
+    """
+    md_files = list(md_files)
+    page_count = len(md_files)
+    workers = workers or os.cpu_count() or 1
+
+    start_time = time.time()
+
+    # Pages whose blob is already in the cache skip reading and parsing
+    cached_pages = []
+    blob_keys = {}
+    if cache is not None and blobs:
+        to_parse = []
+        for path in md_files:
+            blob = blobs.get(Path(path).relative_to(CLONE_DIR).as_posix())
+            parsed = cache.get(blob) if blob else None
+            if parsed:
+                cached_pages.append((path, parsed, []))
+            else:
+                to_parse.append(path)
+                if blob:
+                    blob_keys[str(path)] = blob
+        md_files = to_parse
+
+    if engine == "auto":
+        engine = "process" if len(md_files) >= PROCESS_POOL_MIN_PAGES and workers > 1 else "thread"
+
+    if engine == "process":
+        parsed_pages = parse_pages_with_processes(md_files, workers)
+    else:
+        parsed_pages = parse_pages_with_threads(md_files, workers)
+
+    results = []
+    failed = []
+    reported = 0
+    for path, parsed, problems in chain(cached_pages, parsed_pages):
+        if problems and reported < MAX_REPORTED_PROBLEMS:
+            reported += 1
+            logger.warning(f"{path}: {'; '.join(problems)}")
+        if not parsed:
+            failed.append(str(path))
+            continue
+        if str(path) in blob_keys:
+            cache.put(blob_keys[str(path)], parsed)
+        try:
+            results.append(build_record(Path(path), parsed))
+        except Exception as e:
+            logger.error(f"Error processing {path}: {e}")
+            failed.append(str(path))
+
+    if failed:
+        logger.warning(f"Could not parse {len(failed)} of {page_count} pages "
+                       f"({len(failed) / page_count:.1%}):")
+        for path in failed[:MAX_REPORTED_PROBLEMS]:
+            logger.warning(f"  {path}")
+        if len(failed) > MAX_REPORTED_PROBLEMS:
+            logger.warning(f"  ... and {len(failed) - MAX_REPORTED_PROBLEMS} more")
+
+    elapsed = time.time() - start_time
+    if md_files:
+        rate = len(md_files) / elapsed if elapsed > 0 else float("inf")
+        logger.info(f"Parsed {len(md_files)} pages in {elapsed:.2f}s "
+                    f"({rate:.0f} pages/sec, {engine} engine, {workers} workers)")
+    if cached_pages:
+        logger.info(f"Reused {len(cached_pages)} unchanged pages from the parse cache")
+
+    return results
+
+def shard_path(locale: str, platform: str) -> Path:
+    """Get the path of the output shard for a locale and platform"""
+    return SHARD_DIR / locale / f"{platform}.json"
+
+def load_shard(locale: str, platform: str) -> List[utils.Command]:
+    """
+    Load the scraped commands for a single locale and platform.
+
+    Args:
+        locale: Locale code, e.g. "en" or "de"
+        platform: TLDR platform, e.g. "common" or "linux"
+
+    Returns:
+        List of command entries in the shard
+    """
+    return [utils.Command.from_dict(record) for record in utils.load_json(shard_path(locale, platform))]
+
+def load_previous_scrape(locales: Optional[List[str]] = None) -> Optional[Tuple[str, Dict[str, utils.Command]]]:
+    """
+    Load the state and output shards of the previous scrape.
+
+    Args:
+        locales: Locales this run ingests; a scrape of other locales can't be reused
+
+    Returns:
+        Tuple of (last ingested commit, records keyed by page path), or None
+        if there is no usable previous scrape to build on
+    """
+    if not STATE_FILE.exists() or not SHARD_INDEX_FILE.exists():
+        return None
+
+    state = utils.load_json(STATE_FILE)
+    commit = state.get("commit") if isinstance(state, dict) else None
+    if not commit or state.get("locales") != (sorted(locales) if locales else None):
+        return None
+
+    records = {}
+    for shard in utils.load_json(SHARD_INDEX_FILE):
+        for record in load_shard(shard["locale"], shard["platform"]):
+            path = record_path(record)
+            if not path:
+                return None
+            records[path] = record
+
+    return commit, records
+
+def write_shards(records: Dict[str, utils.Command], dirty: Optional[set] = None) -> List[Dict]:
+    """
+    Write one output shard per locale and platform, plus an index of the shards.
+
+    Args:
+        records: All scraped records keyed by page path
+        dirty: (locale, platform) pairs whose shard changed, or None to write all
+
+    Returns:
+        The shard index entries
+    """
+    shards = {}
+    for path in sorted(records):
+        locale, platform, _ = page_location(path)
+        shards.setdefault((locale, platform), []).append(records[path])
+
+    index = []
+    for (locale, platform), shard_records in sorted(shards.items()):
+        if dirty is None or (locale, platform) in dirty:
+            utils.save_json(shard_records, shard_path(locale, platform), pretty=False)
+        index.append({
+            "locale": locale,
+            "platform": platform,
+            "path": shard_path(locale, platform).relative_to(SHARD_DIR).as_posix(),
+            "count": len(shard_records)
+        })
+
+    # Remove shards whose pages have all been deleted upstream
+    for locale, platform in (dirty or set()) - set(shards):
+        shard_path(locale, platform).unlink(missing_ok=True)
+
+    utils.save_json(index, SHARD_INDEX_FILE)
+    return index
+
+def scrape_tldr_pages(full: bool = False, engine: str = "auto", workers: Optional[int] = None,
+                      locales: Optional[List[str]] = None) -> List[utils.Command]:
+    """
+    Scrape TLDR pages for every platform and locale.
+
+    Only the pages that changed since the last run are reparsed. Results are
+    written as one shard per locale and platform; the default-locale records
+    are also written to tldr_commands.jsonl for the rest of the pipeline.
+
+    Args:
+        full: Reparse every page even if a previous scrape can be updated
+        engine: Parsing engine to use ("auto", "process" or "thread")
+        workers: Number of parsing workers (defaults to the number of CPUs)
+        locales: Only ingest these locales (defaults to every locale)
+
+    Returns:
+        List of scraped command entries for the default locale
+    """
     if not clone_tldr_repo():
         logger.error("Failed to clone/update TLDR repository. Exiting.")
         return []
@@ -129,35 +575,103 @@ def scrape_tldr_pages():
         logger.error(f"Pages directory not found at {pages_dir}")
         return []
 
-    # Find all markdown files
-    md_files = list(pages_dir.glob("**/*.md"))
-    logger.info(f"Found {len(md_files)} markdown files")
+    def wanted(path: str) -> bool:
+        location = page_location(path)
+        return location is not None and (not locales or location[0] in locales)
 
-    # Parse all files in parallel
-    all_commands = []
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = {executor.submit(parse_md_file, file): file for file in md_files}
+    head_commit = get_head_commit()
+    cache = ParseCache(PARSE_CACHE_FILE, PARSER_VERSION, PARSE_CACHE_MAX_BYTES)
+    blobs = get_blob_hashes()
+    previous = None if full else load_previous_scrape(locales)
+    changes = None
+    if previous and head_commit:
+        last_commit, records = previous
+        changes = get_changed_pages(last_commit)
 
-        for future in as_completed(futures):
-            file = futures[future]
-            try:
-                result = future.result()
-                if result:
-                    all_commands.append(result)
-            except Exception as e:
-                logger.error(f"Error processing {file}: {e}")
+    if changes is not None:
+        changed = [path for path in changes[0] if wanted(path)]
+        deleted = [path for path in changes[1] if wanted(path)]
+        logger.info(f"Incremental scrape since {last_commit[:12]}: "
+                    f"{len(changed)} changed, {len(deleted)} deleted")
+
+        dirty = set()
+        for path in deleted:
+            records.pop(path, None)
+            dirty.add(page_location(path)[:2])
 
-    # Write the combined results to JSON
-    utils.save_json(all_commands, OUTPUT_FILE)
+        # Changed pages lose their old record, so one that no longer parses
+        # is dropped as a full scrape would drop it
+        replaced = {}
+        for path in changed:
+            if path in records:
+                replaced[path] = records.pop(path)
+            dirty.add(page_location(path)[:2])
+
+        for result in parse_pages([CLONE_DIR / path for path in changed], engine, workers, cache, blobs):
+            path = record_path(result)
+            if path in replaced:
+                # Keep the original creation time of pages we already had
+                result.created_at = replaced[path].created_at or result.created_at
+            records[path] = result
+            dirty.add(page_location(path)[:2])
+    else:
+        # Find the markdown files of every locale and platform
+        md_files = [
+            path for path in CLONE_DIR.glob("pages*/*/*.md")
+            if wanted(path.relative_to(CLONE_DIR).as_posix())
+        ]
+        logger.info(f"Found {len(md_files)} markdown files")
+
+        records = {
+            record_path(result): result
+            for result in parse_pages(md_files, engine, workers, cache, blobs)
+        }
+        dirty = None
+
+        # Start from an empty shard directory so stale shards don't linger
+        if SHARD_DIR.exists():
+            for old_shard in SHARD_DIR.glob("*/*.json"):
+                old_shard.unlink()
+
+    index = write_shards(records, dirty)
+
+    # Keep a stable order so unchanged runs produce identical output
+    all_commands = [
+        records[path] for path in sorted(records)
+        if page_location(path)[0] == DEFAULT_LOCALE
+    ]
+
+    # Write the default-locale commands for the downstream stages
+    utils.write_jsonl(all_commands, OUTPUT_FILE)
+
+    cache.log_stats()
+    cache.save()
+
+    # Remember where we got to so the next run only reparses what changed
+    if head_commit:
+        utils.save_json({
+            "commit": head_commit,
+            "locales": sorted(locales) if locales else None,
+            "updated_at": utils.get_timestamp()
+        }, STATE_FILE)
 
     # Print statistics
+    locale_counts = {}
+    for shard in index:
+        locale_counts[shard["locale"]] = locale_counts.get(shard["locale"], 0) + shard["count"]
+
     categories = {}
     for cmd in all_commands:
-        category = cmd.get("category", "unknown")
+        category = cmd.category or "unknown"
         categories[category] = categories.get(category, 0) + 1
 
-    logger.info(f"✅ Scraped {len(all_commands)} commands from TLDR pages")
-    logger.info(f"Output written to {OUTPUT_FILE}")
+    logger.info(f"✅ Scraped {len(records)} pages in {len(locale_counts)} locales "
+                f"({len(index)} shards in {SHARD_DIR})")
+    logger.info(f"{len(all_commands)} {DEFAULT_LOCALE} commands written to {OUTPUT_FILE}")
+
+    logger.info("\nLocale breakdown:")
+    for locale, count in sorted(locale_counts.items(), key=lambda x: x[1], reverse=True):
+        logger.info(f"  - {locale}: {count} pages")
 
     logger.info("\nCategory breakdown:")
     for category, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
@@ -166,8 +680,17 @@ def scrape_tldr_pages():
     return all_commands
 
 def main():
-    """Run the script"""
-    scrape_tldr_pages()
+    """Parse arguments and run the script"""
+    parser = argparse.ArgumentParser(description="Scrape command syntax from TLDR pages")
+    parser.add_argument("--full", action="store_true", help="Reparse every page instead of only the ones changed since the last run")
+    parser.add_argument("--engine", choices=["auto", "process", "thread"], default="auto", help="Parse pages with a process pool, a thread pool, or pick automatically")
+    parser.add_argument("--workers", type=int, default=None, help="Number of parsing workers (defaults to the number of CPUs)")
+    parser.add_argument("--locales", default="", help="Comma-separated locales to ingest (defaults to every locale)")
+
+    args = parser.parse_args()
+    locales = [locale.strip() for locale in args.locales.split(",") if locale.strip()]
+
+    scrape_tldr_pages(full=args.full, engine=args.engine, workers=args.workers, locales=locales or None)
 
 if __name__ == "__main__":
     main()
@@ -4,13 +4,28 @@ Utility functions for the SyntaxScope data pipeline.
 """
 
 import os
+import sys
 import json
+import mmap
+import time
 import logging
+import random
 import hashlib
 import datetime
-import jsonschema
+import threading
+from collections.abc import MutableMapping
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # Optional, faster JSON encoding and decoding
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # Optional, used when orjson isn't installed
+    msgspec = None
 
 # Path constants
 ROOT_DIR = Path(__file__).parent.parent.parent
@@ -19,6 +34,13 @@ SCHEMA_DIR = ROOT_DIR / "data_pipeline" / "schema"
 PUBLIC_DATA_DIR = ROOT_DIR / "public" / "data"
 LOG_DIR = ROOT_DIR / "data_pipeline" / "logs"
 
+# JSON library for data files: "auto" (orjson, then msgspec, then the
+# standard library), "orjson", "msgspec" or "stdlib"
+JSON_CODEC = os.environ.get("JSON_CODEC", "auto")
+
+# Files at least this large are decoded from a memory map instead of being read
+JSON_MMAP_MIN_BYTES = 1024 * 1024
+
 # Ensure directories exist
 DATA_DIR.mkdir(exist_ok=True, parents=True)
 SCHEMA_DIR.mkdir(exist_ok=True, parents=True)
@@ -52,6 +74,373 @@ def get_public_path(filename):
     """Get the full path to a file in the public data directory"""
     return PUBLIC_DATA_DIR / filename
 
+def intern_string(value: Any) -> Any:
+    """Intern a string so equal values share one object; anything else is returned as is"""
+    return sys.intern(value) if type(value) is str else value
+
+def intern_strings(values: Any) -> Any:
+    """Intern the strings of a list, e.g. tags; anything but a list is returned as is"""
+    return [intern_string(value) for value in values] if isinstance(values, list) else values
+
+class CompactRecord(MutableMapping):
+    """
+    Base of the record model: fields are kept in __slots__, not a per-record dict.
+
+    Records are also mutable mappings of their JSON fields, so code written
+    for plain dicts keeps working. A field set to None is treated as absent,
+    and keys outside FIELDS are kept in an `extra` dict.
+    """
+
+    __slots__ = ("extra",)
+
+    # JSON fields, in output order
+    FIELDS: Tuple[str, ...] = ()
+
+    # Functions normalizing a value set through the mapping interface
+    NORMALIZERS: Dict[str, Callable[[Any], Any]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+        cls._all_slots = tuple(slot for klass in reversed(cls.__mro__) for slot in getattr(klass, "__slots__", ()))
+
+    def _get(self, key: str) -> Any:
+        """Get the JSON value of a field, None if it is absent"""
+        return getattr(self, key)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_set:
+            value = self._get(key)
+            if value is not None:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self._field_set:
+            normalize = self.NORMALIZERS.get(key)
+            setattr(self, key, normalize(value) if normalize else value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in self._field_set and self._get(key) is not None:
+            self[key] = None
+        elif self.extra and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.FIELDS:
+            if self._get(key) is not None:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def copy(self):
+        """Get a shallow copy; lists and the shared source are not copied"""
+        copied = object.__new__(type(self))
+        for slot in self._all_slots:
+            setattr(copied, slot, getattr(self, slot))
+        if self.extra:
+            copied.extra = dict(self.extra)
+        return copied
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the record as plain JSON data"""
+        data = {}
+        for key in self.FIELDS:
+            value = self._get(key)
+            if value is not None:
+                if isinstance(value, list):
+                    value = [item.to_dict() if isinstance(item, CompactRecord) else item for item in value]
+                data[key] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+class Example(CompactRecord):
+    """One usage example of a command"""
+
+    __slots__ = ("code", "description")
+    FIELDS = ("code", "description")
+
+    def __init__(self, code: Optional[str] = None, description: Optional[str] = None, **extra):
+        self.code = code
+        self.description = description
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data: Any) -> Any:
+        """Get an Example for a decoded example; anything but a dict is returned as is"""
+        return cls(**data) if isinstance(data, dict) else data
+
+def _examples(examples: Any) -> Any:
+    """Turn a list of decoded examples into Examples"""
+    return [Example.from_dict(example) for example in examples] if isinstance(examples, list) else examples
+
+class Source:
+    """
+    Where commands come from, shared by every command with the same source.
+
+    The URL of each command differs, so a Source holds the part up to its
+    last "/" and each command keeps the rest, e.g. the page's file name.
+    """
+
+    __slots__ = ("name", "license", "url_prefix", "extra")
+
+    _shared: Dict[Any, "Source"] = {}
+
+    def __init__(self, name: Optional[str] = None, license: Optional[str] = None,
+                 url_prefix: Optional[str] = None, extra: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.license = license
+        self.url_prefix = url_prefix
+        self.extra = extra
+
+    @classmethod
+    def shared(cls, source: Any) -> Tuple[Any, Optional[str]]:
+        """
+        Get the shared Source for a decoded source object.
+
+        Args:
+            source: The "source" field of a command
+
+        Returns:
+            Tuple of (Source, the rest of the URL), or (source, None) if it
+            isn't a dict
+        """
+        if not isinstance(source, dict):
+            return source, None
+
+        url = source.get("url")
+        url_prefix = url_rest = None
+        if isinstance(url, str):
+            head, slash, url_rest = url.rpartition("/")
+            url_prefix = head + slash
+        fields = tuple((key, value) for key, value in source.items() if key != "url")
+
+        try:
+            shared = cls._shared.get((fields, url_prefix))
+        except TypeError:
+            # Unhashable values can't be shared
+            shared = None
+            fields = None
+        if shared is None:
+            extra = {key: value for key, value in source.items() if key not in ("name", "url", "license")}
+            shared = cls(intern_string(source.get("name")), intern_string(source.get("license")),
+                         intern_string(url_prefix), extra or None)
+            if fields is not None:
+                shared = cls._shared.setdefault((fields, url_prefix), shared)
+        return shared, url_rest
+
+    def to_dict(self, url_rest: Optional[str] = None) -> Dict[str, Any]:
+        """Get the source object of a command with the given rest of the URL"""
+        data = {}
+        if self.name is not None:
+            data["name"] = self.name
+        if self.url_prefix is not None:
+            data["url"] = self.url_prefix + (url_rest or "")
+        if self.license is not None:
+            data["license"] = self.license
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+class Command(CompactRecord):
+    """
+    A command record, as it flows through the pipeline.
+
+    Categories, tags, platforms, locales and timestamps are interned, and the
+    source is shared with the other commands from the same place. Values set
+    through the mapping interface are normalized the same way; values set as
+    attributes are stored as they are.
+    """
+
+    __slots__ = ("id", "command", "description", "category", "tags", "explanation", "examples",
+                 "source", "source_url_rest", "platform", "locale", "created_at", "updated_at")
+    FIELDS = ("id", "command", "description", "category", "tags", "explanation", "examples",
+              "source", "platform", "locale", "created_at", "updated_at")
+    NORMALIZERS = {
+        "category": intern_string,
+        "tags": intern_strings,
+        "examples": _examples,
+        "platform": intern_string,
+        "locale": intern_string,
+        "created_at": intern_string,
+        "updated_at": intern_string
+    }
+
+    def __init__(self, id: Optional[str] = None, command: Optional[str] = None,
+                 description: Optional[str] = None, category: Optional[str] = None,
+                 tags: Optional[List[str]] = None, explanation: Optional[str] = None,
+                 examples: Optional[List[Any]] = None, source: Optional[Dict[str, Any]] = None,
+                 platform: Optional[str] = None, locale: Optional[str] = None,
+                 created_at: Optional[str] = None, updated_at: Optional[str] = None, **extra):
+        self.id = id
+        self.command = command
+        self.description = description
+        self.category = intern_string(category)
+        self.tags = intern_strings(tags)
+        self.explanation = explanation
+        self.examples = _examples(examples)
+        self.source, self.source_url_rest = Source.shared(source)
+        self.platform = intern_string(platform)
+        self.locale = intern_string(locale)
+        self.created_at = intern_string(created_at)
+        self.updated_at = intern_string(updated_at)
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Command":
+        """
+        Get a Command for a decoded record.
+
+        Args:
+            data: The record, a dict or a Command
+
+        Returns:
+            A new Command; a Command is copied
+        """
+        if isinstance(data, Command):
+            return data.copy()
+        return cls(**data)
+
+    @property
+    def source_url(self) -> Optional[str]:
+        """The URL of the command's source, if it has one"""
+        if isinstance(self.source, Source) and self.source.url_prefix is not None:
+            return self.source.url_prefix + (self.source_url_rest or "")
+        return None
+
+    def _get(self, key: str) -> Any:
+        if key == "source" and isinstance(self.source, Source):
+            return self.source.to_dict(self.source_url_rest)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key == "source":
+            self.source, self.source_url_rest = Source.shared(value)
+        else:
+            super().__setitem__(key, value)
+
+def json_default(value: Any) -> Any:
+    """Encode the record model for the JSON codecs"""
+    if isinstance(value, CompactRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class JsonCodec:
+    """
+    Encodes and decodes JSON with the standard library.
+
+    Subclasses use faster libraries. All of them write UTF-8 bytes, either
+    compact (for intermediate files) or indented by two spaces (for files
+    people read), and decode bytes or any buffer without a text decoding step.
+    """
+
+    name = "stdlib"
+
+    # Exceptions raised for invalid JSON
+    decode_errors = (ValueError,)
+
+    def dumps(self, data: Any, pretty: bool = False) -> bytes:
+        """
+        Encode data as JSON.
+
+        Args:
+            data: The data to encode
+            pretty: Whether to indent the output
+
+        Returns:
+            UTF-8 encoded JSON
+        """
+        if pretty:
+            return json.dumps(data, indent=2, ensure_ascii=False, default=json_default).encode("utf-8")
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """
+        Decode JSON.
+
+        Args:
+            data: UTF-8 encoded JSON, or any buffer holding it
+
+        Returns:
+            The decoded data
+        """
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+class OrjsonCodec(JsonCodec):
+    """Encodes and decodes JSON with orjson"""
+
+    name = "orjson"
+
+    def dumps(self, data: Any, pretty: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, default=json_default, option=option)
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return orjson.loads(data)
+
+class MsgspecCodec(JsonCodec):
+    """Encodes and decodes JSON with msgspec"""
+
+    name = "msgspec"
+
+    def __init__(self):
+        self.encoder = msgspec.json.Encoder(enc_hook=json_default)
+        self.decoder = msgspec.json.Decoder()
+        self.decode_errors = (ValueError, msgspec.DecodeError)
+
+    def dumps(self, data: Any, pretty: bool = False) -> bytes:
+        encoded = self.encoder.encode(data)
+        return msgspec.json.format(encoded, indent=2) if pretty else encoded
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        return self.decoder.decode(data)
+
+def get_codec(name: str = "auto") -> JsonCodec:
+    """
+    Get a JSON codec by name.
+
+    Args:
+        name: "auto" for the fastest one installed, "orjson", "msgspec" or "stdlib"
+
+    Returns:
+        The codec
+
+    Raises:
+        ValueError: If the name is unknown or its library isn't installed
+    """
+    if name == "auto":
+        name = "orjson" if orjson is not None else "msgspec" if msgspec is not None else "stdlib"
+    if name == "orjson" and orjson is not None:
+        return OrjsonCodec()
+    if name == "msgspec" and msgspec is not None:
+        return MsgspecCodec()
+    if name == "stdlib":
+        return JsonCodec()
+    raise ValueError(f"JSON codec {name} is not available")
+
+try:
+    CODEC = get_codec(JSON_CODEC)
+except ValueError as e:
+    logger.warning(f"{e}, falling back to the fastest one installed")
+    CODEC = get_codec()
+
 def load_json(file_path: Union[str, Path]) -> Any:
     """
     Load JSON data from a file.
@@ -71,12 +460,21 @@ def load_json(file_path: Union[str, Path]) -> Any:
         if not file_path.exists():
             logger.warning(f"File not found: {file_path}")
             return []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < JSON_MMAP_MIN_BYTES:
+                return CODEC.loads(f.read())
+            # Decode straight from the page cache instead of copying into a buffer
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    return CODEC.loads(view)
+                finally:
+                    view.release()
     except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
         return []
-    except json.JSONDecodeError as e:
+    except CODEC.decode_errors as e:
         logger.error(f"Invalid JSON in {file_path}: {e}")
         return []
 
@@ -87,7 +485,8 @@ def save_json(data: Any, file_path: Union[str, Path], pretty: bool = True) -> bo
     Args:
         data: The data to save
         file_path: Path where to save the JSON file
-        pretty: Whether to format the JSON with indentation
+        pretty: Whether to format the JSON with indentation; use compact
+            output for files only the pipeline reads
 
     Returns:
         True if successful, False otherwise
@@ -96,11 +495,8 @@ def save_json(data: Any, file_path: Union[str, Path], pretty: bool = True) -> bo
         file_path = Path(file_path)
         file_path.parent.mkdir(exist_ok=True, parents=True)
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            if pretty:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            else:
-                json.dump(data, f, ensure_ascii=False)
+        with open(file_path, 'wb') as f:
+            f.write(CODEC.dumps(data, pretty))
 
         logger.info(f"Saved JSON to {file_path}")
         return True
@@ -108,32 +504,227 @@ def save_json(data: Any, file_path: Union[str, Path], pretty: bool = True) -> bo
         logger.error(f"Error saving JSON to {file_path}: {e}")
         return False
 
+class JsonlWriter:
+    """
+    Append-only JSON Lines writer.
+
+    Each record is written as one line. Lines are flushed and fsynced to disk
+    every `sync_every` records, so a crash loses at most that many records and
+    never corrupts the ones before them.
+    """
+
+    def __init__(self, file_path: Union[str, Path], sync_every: int = 10, truncate: bool = False):
+        """
+        Open the file for appending.
+
+        Args:
+            file_path: Path of the JSON Lines file
+            sync_every: Number of records between fsyncs
+            truncate: Start a new, empty file instead of appending
+        """
+        self.file_path = Path(file_path)
+        self.file_path.parent.mkdir(exist_ok=True, parents=True)
+        self.sync_every = max(1, sync_every)
+        self.unsynced = 0
+
+        # Start on a fresh line if the last write was cut off
+        torn = False
+        if not truncate and self.file_path.exists() and self.file_path.stat().st_size > 0:
+            with open(self.file_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+
+        self.file = open(self.file_path, 'wb' if truncate else 'ab')
+        if torn:
+            self.file.write(b"\n")
+
+    def write(self, record: Any):
+        """Append a record as a single line"""
+        self.file.write(CODEC.dumps(record) + b"\n")
+        self.unsynced += 1
+        if self.unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        """Flush buffered lines and fsync them to disk"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def close(self):
+        """Sync and close the file"""
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def iter_jsonl(file_path: Union[str, Path]) -> Iterator[Any]:
+    """
+    Read records from a JSON Lines file one at a time.
+
+    A torn last line, left by a crash in the middle of a write, is skipped
+    with a warning.
+
+    Args:
+        file_path: Path to the JSON Lines file
+
+    Yields:
+        The record on each line
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        logger.warning(f"File not found: {file_path}")
+        return
+
+    with open(file_path, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield CODEC.loads(line)
+            except CODEC.decode_errors as e:
+                logger.warning(f"Skipping invalid line {line_number} in {file_path}: {e}")
+
+def iter_commands(file_path: Union[str, Path]) -> Iterator[Any]:
+    """
+    Read command records from a JSON Lines file one at a time, as Commands.
+
+    Args:
+        file_path: Path to the JSON Lines file
+
+    Yields:
+        A Command for each record (lines that aren't objects are yielded as they are)
+    """
+    for record in iter_jsonl(file_path):
+        yield Command.from_dict(record) if isinstance(record, dict) else record
+
+def write_jsonl(records: Iterable[Any], file_path: Union[str, Path]) -> int:
+    """
+    Write records to a JSON Lines file as they are produced.
+
+    Records are consumed one at a time, so a generator is never held in
+    memory. The file is written under a temporary name and moved into place
+    once complete, so readers never see a partial file.
+
+    Args:
+        records: The records to write
+        file_path: Path of the JSON Lines file
+
+    Returns:
+        Number of records written
+    """
+    file_path = Path(file_path)
+    file_path.parent.mkdir(exist_ok=True, parents=True)
+    temp_path = file_path.with_name(file_path.name + ".tmp")
+
+    count = 0
+    try:
+        with open(temp_path, 'wb') as f:
+            for record in records:
+                f.write(CODEC.dumps(record) + b"\n")
+                count += 1
+        os.replace(temp_path, file_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    logger.info(f"Saved {count} records to {file_path}")
+    return count
+
+def write_json_array(records: Iterable[Any], file_path: Union[str, Path], pretty: bool = True) -> int:
+    """
+    Write records to a JSON array file as they are produced.
+
+    The output is the same as save_json on a list of the records, but only
+    one record is in memory at a time.
+
+    Args:
+        records: The records to write
+        file_path: Path of the JSON file
+        pretty: Whether to format the JSON with indentation
+
+    Returns:
+        Number of records written
+    """
+    file_path = Path(file_path)
+    file_path.parent.mkdir(exist_ok=True, parents=True)
+    temp_path = file_path.with_name(file_path.name + ".tmp")
+
+    count = 0
+    try:
+        with open(temp_path, 'wb') as f:
+            for record in records:
+                if pretty:
+                    item = b"  " + CODEC.dumps(record, pretty=True).replace(b"\n", b"\n  ")
+                    f.write((b"[\n" if count == 0 else b",\n") + item)
+                else:
+                    f.write((b"[" if count == 0 else b",") + CODEC.dumps(record))
+                count += 1
+            f.write((b"\n]" if pretty else b"]") if count else b"[]")
+        os.replace(temp_path, file_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+    logger.info(f"Saved JSON to {file_path}")
+    return count
+
+class RecordStream:
+    """
+    Re-iterable view of records produced by a function.
+
+    Each iteration calls the function again, e.g. to read a JSON Lines file
+    from the start, so the records never need to be held in memory.
+    """
+
+    def __init__(self, source: Callable[..., Iterable[Any]], *args, **kwargs):
+        """
+        Create a view.
+
+        Args:
+            source: Function returning an iterable of records
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function
+        """
+        self.source = source
+        self.args = args
+        self.kwargs = kwargs
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.source(*self.args, **self.kwargs))
+
 def validate_against_schema(data: Any, schema_path: Union[str, Path] = None) -> bool:
     """
-    Validate data against the JSON schema.
+    Validate a list of records against the JSON schema.
+
+    Every record is checked and every error is logged with its record's id
+    (see validation.validate_records).
 
     Args:
-        data: The data to validate
+        data: The records to validate
         schema_path: Path to the schema file (defaults to syntax_schema.json)
 
     Returns:
         True if valid, False otherwise
     """
-    if schema_path is None:
-        schema_path = SCHEMA_DIR / "syntax_schema.json"
+    # Imported here, since the validation module is built on this one
+    import validation
 
     try:
-        schema = load_json(schema_path)
-        jsonschema.validate(instance=data, schema=schema)
-        logger.info("Data validation successful")
-        return True
-    except jsonschema.exceptions.ValidationError as e:
-        logger.error(f"Schema validation error: {e}")
-        return False
+        report = validation.validate_records(data, schema_path)
     except Exception as e:
         logger.error(f"Error during schema validation: {e}")
         return False
 
+    report.log_summary("Schema validation")
+    return report.valid
+
 def generate_id(text: str) -> str:
     """
     Generate a unique ID based on the text.
@@ -155,6 +746,192 @@ def get_timestamp() -> str:
     """
     return datetime.datetime.now().isoformat()
 
+class CircuitOpenError(Exception):
+    """Raised instead of calling an operation while its circuit breaker is open"""
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    After `failure_threshold` consecutive failures the breaker opens and every
+    call fails fast with CircuitOpenError. Once `reset_timeout` seconds have
+    passed, a single probe call is let through: if it succeeds the breaker
+    closes again, otherwise it stays open for another `reset_timeout`. Only
+    the probe itself ends the probe, so calls that were already in flight
+    when the breaker opened can't let a second one through.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, name: str = "circuit"):
+        """
+        Create a closed circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker (0 or
+                less disables it)
+            reset_timeout: Seconds to wait before probing an open breaker
+            name: Name used in log messages
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.failed_probes = 0
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being refused"""
+        with self.lock:
+            return self.opened_at is not None
+
+    def retry_in(self) -> float:
+        """
+        Get the time until a call may go ahead.
+
+        Returns:
+            0 if the breaker is closed or a probe may be sent now, otherwise
+            the seconds left before the next probe
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return 0.0
+            if self.probing:
+                return self.reset_timeout
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def before_call(self) -> bool:
+        """
+        Check that a call may go ahead.
+
+        Returns:
+            Whether the call is the probe of an open breaker; pass this on to
+            record_success, record_failure or release
+
+        Raises:
+            CircuitOpenError: If the breaker is open and it is not yet time to
+                probe, or another call is already probing
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return False
+            if self.probing or time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"{self.name} is unavailable, failing fast")
+            self.probing = True
+            logger.info(f"Probing {self.name}")
+            return True
+
+    def record_success(self, probe: bool = False):
+        """Record a successful call, closing the breaker"""
+        with self.lock:
+            if self.opened_at is not None:
+                logger.info(f"{self.name} is available again, closing the circuit")
+            self.failures = 0
+            self.failed_probes = 0
+            self.opened_at = None
+            if probe:
+                self.probing = False
+
+    def record_failure(self, probe: bool = False):
+        """Record a failed call, opening the breaker if there were too many in a row"""
+        with self.lock:
+            self.failures += 1
+            if probe:
+                self.probing = False
+                self.failed_probes += 1
+                logger.warning(f"{self.name} is still unavailable, failing fast for {self.reset_timeout:g}s")
+                self.opened_at = time.monotonic()
+            elif self.opened_at is None and 0 < self.failure_threshold <= self.failures:
+                logger.warning(f"{self.name} failed {self.failures} times in a row, "
+                               f"failing fast for {self.reset_timeout:g}s")
+                self.opened_at = time.monotonic()
+
+    def release(self, probe: bool = False):
+        """End a call whose outcome says nothing about the operation's health, leaving the state as it is"""
+        if probe:
+            with self.lock:
+                self.probing = False
+
+class RetryPolicy:
+    """
+    Retry policy with full-jitter exponential backoff.
+
+    Before retry n (counting from 0) the policy sleeps for a random time
+    between 0 and min(max_delay, base_delay * 2 ** n). Only errors the
+    `retryable` predicate accepts are retried; anything else is raised at once.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0,
+                 retryable: Optional[Callable[[Exception], bool]] = None):
+        """
+        Create a retry policy.
+
+        Args:
+            max_attempts: Maximum number of attempts, including the first
+            base_delay: Upper bound of the first backoff, in seconds
+            max_delay: Cap on the backoff upper bound, in seconds
+            retryable: Predicate deciding whether an error is worth retrying
+                (defaults to retrying every error)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable or (lambda error: True)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Get the time to sleep before a retry.
+
+        Args:
+            attempt: Number of the retry, counting from 0
+
+        Returns:
+            Delay in seconds
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, func: Callable, *args, breaker: Optional[CircuitBreaker] = None, **kwargs) -> Any:
+        """
+        Call a function, retrying it according to the policy.
+
+        Args:
+            func: The function to call
+            *args, **kwargs: Arguments to pass to the function
+            breaker: Optional circuit breaker guarding the operation; retryable
+                errors count as failures, other errors leave its state unchanged,
+                and no attempt is made while it is open
+
+        Returns:
+            The result of the function call
+
+        Raises:
+            CircuitOpenError: If the breaker is open
+            Exception: The last error raised by the function
+        """
+        for attempt in range(self.max_attempts):
+            probe = breaker.before_call() if breaker is not None else False
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not self.retryable(e):
+                    if breaker is not None:
+                        breaker.release(probe)
+                    raise
+                if breaker is not None:
+                    breaker.record_failure(probe)
+                if attempt + 1 >= self.max_attempts:
+                    logger.error(f"All {self.max_attempts} attempts failed: {e}")
+                    raise
+                wait_time = self.backoff(attempt)
+                logger.warning(f"Attempt {attempt + 1}/{self.max_attempts} failed: {e}. "
+                               f"Retrying in {wait_time:.1f}s")
+                time.sleep(wait_time)
+            else:
+                if breaker is not None:
+                    breaker.record_success(probe)
+                return result
+
 def retry_operation(func, max_retries: int = 3, *args, **kwargs):
     """
     Retry an operation multiple times before giving up.
@@ -170,19 +947,57 @@ def retry_operation(func, max_retries: int = 3, *args, **kwargs):
     Raises:
         Exception: The last exception raised by the function
     """
-    last_exception = None
-    for attempt in range(max_retries):
-        try:
-            return func(*args, **kwargs)
-        except Exception as e:
-            last_exception = e
-            logger.warning(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
-            if attempt + 1 < max_retries:
-                logger.info(f"Retrying...")
-
-    logger.error(f"All {max_retries} attempts failed")
-    if last_exception:
-        raise last_exception
+    return RetryPolicy(max_retries, base_delay=0).call(func, *args, **kwargs)
+
+class RateLimiter:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `burst`; each
+    acquire takes one token, waiting for it if the bucket is empty.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Create a rate limiter.
+
+        Args:
+            rate: Sustained number of operations allowed per second (0 or
+                less disables limiting)
+            burst: Number of operations allowed back to back
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until an operation is allowed, then consume a token"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+    def resize(self, burst: int):
+        """
+        Change the number of operations allowed back to back.
+
+        Args:
+            burst: New burst size; tokens above it are dropped
+        """
+        with self.lock:
+            self.burst = max(1, burst)
+            self.tokens = min(self.tokens, float(self.burst))
 
 def merge_data(data_list: List[Dict]) -> List[Dict]:
     """
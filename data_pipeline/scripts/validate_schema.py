@@ -4,68 +4,77 @@ Validates that the syntax.json file conforms to the expected schema.
 This script is useful for catching schema errors before they reach the frontend.
 """
 
-import json
+import os
 import sys
+import argparse
 from pathlib import Path
-from jsonschema import validate, ValidationError
 
-# Add the parent directory to the Python path
-sys.path.append(str(Path(__file__).resolve().parent.parent))
+# Make the pipeline scripts importable
+sys.path.append(str(Path(__file__).resolve().parent))
 
 # Import utility functions
-from scripts.utils import load_json, get_data_path, get_public_path
+from utils import get_data_path, get_public_path
+import validation
 
-def validate_syntax_json():
-    """Validate the syntax.json file against the schema"""
-    # Load the schema
-    schema_path = Path(__file__).resolve().parent.parent / "schema" / "syntax_schema.json"
-    schema = load_json(schema_path)
-    
-    if not schema:
-        print(f"❌ Schema file not found or empty: {schema_path}")
-        return False
-    
-    # Convert the single object schema to an array schema
-    array_schema = {
-        "type": "array",
-        "items": schema
-    }
-    
+def validate_syntax_json(files=None, fail_fast=False, workers=0, strict=False):
+    """
+    Validate data files against the schema, record by record.
+
+    Args:
+        files: Paths of JSON array, JSON Lines or normalized export files (defaults to both copies of syntax.json)
+        fail_fast: Stop each file at its first invalid record
+        workers: Number of worker processes (0 validates in this process)
+        strict: Validate every record with jsonschema instead of the generated types
+
+    Returns:
+        True if every file exists and all its records are valid
+    """
     # Files to validate
-    files_to_validate = [
+    files_to_validate = files or [
         get_data_path("syntax.json"),
         get_public_path("syntax.json")
     ]
-    
+
     all_valid = True
-    
-    for file_path in files_to_validate:
+
+    for file_path in map(Path, files_to_validate):
         if not file_path.exists():
             print(f"❌ File not found: {file_path}")
             all_valid = False
             continue
-        
-        data = load_json(file_path)
-        if not data:
+
+        report = validation.validate_file(file_path, fail_fast=fail_fast, workers=workers, strict=strict)
+        if not report.checked and file_path.suffix != ".jsonl":
             print(f"❌ File is empty or invalid JSON: {file_path}")
             all_valid = False
             continue
-        
-        try:
-            validate(instance=data, schema=array_schema)
-            print(f"✅ {file_path} is valid against the schema")
-        except ValidationError as e:
-            print(f"❌ {file_path} validation error:")
-            print(f"   Path: {'.'.join(str(x) for x in e.path)}")
-            print(f"   Message: {e.message}")
-            all_valid = False
-    
+
+        if report.valid:
+            print(f"✅ {file_path} is valid against the schema ({report.checked} records)")
+            continue
+
+        stopped = ", stopped at the first invalid record" if report.stopped_early else ""
+        print(f"❌ {file_path}: {report.invalid} of {report.checked} records have "
+              f"{len(report.errors)} validation errors{stopped}:")
+        for error in report.errors:
+            print(f"   {error}")
+        all_valid = False
+
     return all_valid
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Validate data files against the command schema")
+    parser.add_argument("files", nargs="*", help="JSON array, JSON Lines or normalized export files (defaults to syntax.json)")
+    parser.add_argument("--fail-fast", action="store_true", help="Stop each file at its first invalid record")
+    parser.add_argument("--workers", type=int, nargs="?", const=os.cpu_count(), default=0,
+                        help="Validate in a pool of processes (defaults to one per CPU when given without a number)")
+    parser.add_argument("--strict", action="store_true",
+                        help="Validate with jsonschema instead of the types generated from the schema")
+    args = parser.parse_args()
+
     print("\nValidating syntax.json files against schema...")
-    valid = validate_syntax_json()
+    valid = validate_syntax_json(args.files, args.fail_fast, args.workers, args.strict)
     
     if valid:
         print("\n✅ All files are valid")
@@ -75,4 +84,4 @@ def main():
         return False
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Schema validation of command records, one record at a time.
+
+Records are checked against the msgspec types generated from the schema
+(record_types.py) when msgspec is installed and the types are up to date,
+and with jsonschema otherwise, in strict mode, or to describe the errors of
+a record the types reject.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import jsonschema
+import utils
+import export_to_json
+import generate_record_types
+
+try:
+    import record_types
+except ImportError:
+    # msgspec isn't installed
+    record_types = None
+
+logger = utils.logger
+
+# Schema of the command array; records are validated against its "items"
+SCHEMA_PATH = utils.SCHEMA_DIR / "syntax_schema.json"
+
+# Records sent to a pool worker at a time
+VALIDATION_CHUNK_SIZE = 500
+
+_validators: Dict[Tuple[str, int], jsonschema.Draft7Validator] = {}
+_validators_lock = threading.Lock()
+_fast_types: Dict[Tuple[str, int], Any] = {}
+
+class SchemaError:
+    """One way in which a record doesn't match the schema"""
+
+    def __init__(self, index: int, record_id: Optional[str], path: str, message: str):
+        """
+        Describe an error.
+
+        Args:
+            index: Position of the record in the input
+            record_id: The record's id, if it has one
+            path: Dotted path of the offending value within the record
+            message: What is wrong with it
+        """
+        self.index = index
+        self.record_id = record_id
+        self.path = path
+        self.message = message
+
+    def __str__(self) -> str:
+        record = f"record {self.record_id}" if self.record_id else f"record #{self.index}"
+        return f"{record}: {self.path or '(record)'}: {self.message}"
+
+class RecordValidationError(ValueError):
+    """Raised in fail-fast mode when a record doesn't match the schema"""
+
+    def __init__(self, errors: List[SchemaError]):
+        self.errors = errors
+        super().__init__("; ".join(str(error) for error in errors))
+
+class ValidationReport:
+    """Outcome of validating a sequence of records"""
+
+    def __init__(self):
+        self.checked = 0
+        self.invalid = 0
+        self.errors: List[SchemaError] = []
+        self.stopped_early = False
+
+    @property
+    def valid(self) -> bool:
+        """Whether every checked record matched the schema"""
+        return not self.errors
+
+    def add(self, errors: List[SchemaError]):
+        """Add the errors of one record"""
+        self.checked += 1
+        if errors:
+            self.invalid += 1
+            self.errors.extend(errors)
+
+    def log_summary(self, name: str, max_errors: int = 20):
+        """
+        Log the result, listing the first errors.
+
+        Args:
+            name: What was validated, for the log messages
+            max_errors: Number of errors to list
+        """
+        if self.valid:
+            logger.info(f"{name}: all {self.checked} records match the schema")
+            return
+
+        stopped = " (stopped at the first invalid record)" if self.stopped_early else ""
+        logger.warning(f"{name}: {self.invalid} of {self.checked} records do not match the schema, "
+                       f"{len(self.errors)} errors{stopped}")
+        for error in self.errors[:max_errors]:
+            logger.warning(f"  - {error}")
+        if len(self.errors) > max_errors:
+            logger.warning(f"  ... and {len(self.errors) - max_errors} more")
+
+def get_validator(schema_path: Optional[Union[str, Path]] = None) -> jsonschema.Draft7Validator:
+    """
+    Get the compiled validator for a single record.
+
+    Validators are cached per schema file and rebuilt when the file changes.
+
+    Args:
+        schema_path: Path of the array schema (defaults to SCHEMA_PATH)
+
+    Returns:
+        Validator for one item of the array
+    """
+    schema_path = Path(schema_path or SCHEMA_PATH)
+    key = (str(schema_path), schema_path.stat().st_mtime_ns)
+    with _validators_lock:
+        validator = _validators.get(key)
+        if validator is None:
+            schema = utils.load_json(schema_path)
+            item_schema = schema.get("items", schema) if schema.get("type") == "array" else schema
+            jsonschema.Draft7Validator.check_schema(item_schema)
+            validator = _validators[key] = jsonschema.Draft7Validator(item_schema)
+        return validator
+
+def fast_types(schema_path: Optional[Union[str, Path]] = None) -> Any:
+    """
+    Get the generated record types, if they can stand in for the schema.
+
+    Args:
+        schema_path: Path of the array schema (defaults to SCHEMA_PATH)
+
+    Returns:
+        The record_types module, or None if msgspec isn't installed, the schema
+        isn't the one the types were generated from, or they are out of date
+    """
+    if record_types is None:
+        return None
+    schema_path = Path(schema_path or SCHEMA_PATH)
+    if schema_path.resolve() != Path(SCHEMA_PATH).resolve():
+        return None
+
+    key = (str(schema_path), schema_path.stat().st_mtime_ns)
+    with _validators_lock:
+        if key not in _fast_types:
+            current = generate_record_types.schema_digest(utils.load_json(schema_path))
+            up_to_date = current == record_types.SCHEMA_DIGEST
+            if not up_to_date:
+                logger.warning("record_types.py is out of date with the schema; validating with jsonschema "
+                               "until it is regenerated with generate_record_types.py")
+            _fast_types[key] = record_types if up_to_date else None
+        return _fast_types[key]
+
+def validate_record(record: Any, index: int = 0,
+                    validator: Optional[jsonschema.Draft7Validator] = None,
+                    types: Any = None) -> List[SchemaError]:
+    """
+    Validate one record, gathering all its errors.
+
+    Args:
+        record: The record
+        index: Its position in the input
+        validator: Validator to use (defaults to the one for SCHEMA_PATH)
+        types: Generated record types (see fast_types) to check the record
+            with first; jsonschema then only runs to describe its errors
+
+    Returns:
+        The record's errors, empty if it is valid
+    """
+    if isinstance(record, utils.CompactRecord):
+        record = record.to_dict()
+    if types is not None and types.is_valid(record):
+        return []
+    validator = validator or get_validator()
+    record_id = record.get("id") if isinstance(record, dict) else None
+    return [
+        SchemaError(index, record_id, ".".join(str(part) for part in error.absolute_path), error.message)
+        for error in sorted(validator.iter_errors(record), key=lambda error: list(map(str, error.absolute_path)))
+    ]
+
+def validate_chunk(schema_path: str, start: int, records: List[Any],
+                   strict: bool = False) -> List[List[SchemaError]]:
+    """
+    Validate a chunk of records inside a pool worker.
+
+    Args:
+        schema_path: Path of the schema
+        start: Index of the first record of the chunk
+        records: The records
+        strict: Validate every record with jsonschema
+
+    Returns:
+        The errors of each record
+    """
+    validator = get_validator(schema_path)
+    types = None if strict else fast_types(schema_path)
+    return [validate_record(record, start + i, validator, types) for i, record in enumerate(records)]
+
+def validate_records(records: Iterable[Any], schema_path: Optional[Union[str, Path]] = None,
+                     fail_fast: bool = False, workers: int = 0, strict: bool = False) -> ValidationReport:
+    """
+    Validate records one at a time, gathering every error with its record's id.
+
+    Records are consumed as they come, so a stream of records is never held in
+    memory. With workers, chunks of records are validated in a process pool,
+    with only a few chunks in flight at once.
+
+    Args:
+        records: The records to validate
+        schema_path: Path of the array schema (defaults to SCHEMA_PATH)
+        fail_fast: Stop at the first invalid record
+        workers: Number of worker processes (0 or 1 validates in this process)
+        strict: Validate every record with jsonschema instead of the generated types
+
+    Returns:
+        The validation report
+    """
+    schema_path = Path(schema_path or SCHEMA_PATH)
+    report = ValidationReport()
+
+    if workers <= 1:
+        validator = get_validator(schema_path)
+        types = None if strict else fast_types(schema_path)
+        for index, record in enumerate(records):
+            report.add(validate_record(record, index, validator, types))
+            if fail_fast and report.errors:
+                report.stopped_early = True
+                break
+        return report
+
+    records = iter(records)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        start = 0
+        while True:
+            # Keep a couple of chunks queued per worker
+            while len(in_flight) < workers * 2:
+                chunk = list(islice(records, VALIDATION_CHUNK_SIZE))
+                if not chunk:
+                    break
+                in_flight.append(executor.submit(validate_chunk, str(schema_path), start, chunk, strict))
+                start += len(chunk)
+            if not in_flight:
+                break
+
+            for errors in in_flight.popleft().result():
+                report.add(errors)
+                if fail_fast and report.errors:
+                    report.stopped_early = True
+                    break
+            if report.stopped_early:
+                for future in in_flight:
+                    future.cancel()
+                break
+
+    return report
+
+def validate_file(file_path: Union[str, Path], fail_fast: bool = False, workers: int = 0,
+                  strict: bool = False) -> ValidationReport:
+    """
+    Validate a JSON array, JSON Lines or normalized export file of records.
+
+    A JSON array is decoded and validated by the generated types in a single
+    native pass when it can be; only if some record doesn't match is it
+    validated again record by record, to report every error.
+
+    Args:
+        file_path: Path of the file
+        fail_fast: Stop at the first invalid record
+        workers: Number of worker processes (0 or 1 validates in this process)
+        strict: Validate every record with jsonschema instead of the generated types
+
+    Returns:
+        The validation report; nothing is checked if the file is missing,
+        empty or not valid JSON
+    """
+    file_path = Path(file_path)
+    if file_path.suffix == ".jsonl":
+        return validate_records(utils.iter_jsonl(file_path), fail_fast=fail_fast, workers=workers, strict=strict)
+
+    types = None if strict else fast_types()
+    if types is not None and file_path.exists():
+        try:
+            report = ValidationReport()
+            report.checked = len(types.decode_array(file_path.read_bytes()))
+            return report
+        except (utils.msgspec.ValidationError, utils.msgspec.DecodeError):
+            # Find every error, and its record, below
+            pass
+
+    records = utils.load_json(file_path)
+    if export_to_json.is_normalized(records):
+        try:
+            records = export_to_json.decode_normalized(records)
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            logger.error(f"Invalid normalized export in {file_path}: {e}")
+            records = []
+    if not isinstance(records, list):
+        records = [records] if records else []
+    return validate_records(records, fail_fast=fail_fast, workers=workers, strict=strict)
@@ -0,0 +1,11 @@
+"""
+Shared setup for the pipeline tests. Run from the data_pipeline directory:
+
+    python -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+
+# Make the pipeline scripts importable
+sys.path.append(str(Path(__file__).resolve().parent.parent / "scripts"))
@@ -0,0 +1,29 @@
+"""
+Tests for merging AI results into the enriched commands.
+"""
+
+import combine_all
+
+def command(command_id, name, **fields):
+    """Build a minimal enriched command"""
+    return {"id": command_id, "command": name, "description": f"Run {name}.",
+            "category": "other", "tags": [], **fields}
+
+def test_duplicate_ids_keep_the_first_command():
+    enriched = [command("a", "ls"), command("b", "cp"), command("a", "ls-again")]
+
+    combined = list(combine_all.combine_records(enriched))
+
+    assert [cmd["id"] for cmd in combined] == ["a", "b"]
+    assert combined[0]["command"] == "ls"
+
+def test_ai_results_are_merged_once_per_id():
+    enriched = [command("a", "ls", tags=["filesystem"]), command("a", "ls")]
+    ai = [command("a", "ls", explanation="Lists files.", tags=["listing"]),
+          command("c", "mv", explanation="Moves files.", tags=["filesystem"])]
+
+    combined = list(combine_all.combine_records(enriched, ai))
+
+    assert [cmd["id"] for cmd in combined] == ["a", "c"]
+    assert combined[0]["explanation"] == "Lists files."
+    assert combined[0]["tags"] == ["filesystem", "listing"]
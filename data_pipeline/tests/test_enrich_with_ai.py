@@ -0,0 +1,39 @@
+"""
+Tests for batched tagging under a time budget.
+"""
+
+import time
+import enrich_with_ai
+
+def test_split_retries_stop_at_the_deadline(monkeypatch):
+    prompts = []
+
+    def malformed_reply(prompt, **kwargs):
+        # Each request takes the rest of the budget and tags nothing
+        prompts.append(prompt)
+        time.sleep(0.05)
+        return "not json"
+
+    monkeypatch.setattr(enrich_with_ai, "get_ai_explanation", malformed_reply)
+    batch = [{"id": str(i), "command": f"tool{i}", "description": "A tool."} for i in range(16)]
+
+    tagged = enrich_with_ai.tag_batch(batch, deadline=time.monotonic() + 0.01)
+
+    assert tagged == 0
+    assert len(prompts) == 1
+    assert not any(command.get("tags") for command in batch)
+
+def test_split_retries_run_without_a_deadline(monkeypatch):
+    prompts = []
+
+    def malformed_reply(prompt, **kwargs):
+        prompts.append(prompt)
+        return "not json"
+
+    monkeypatch.setattr(enrich_with_ai, "get_ai_explanation", malformed_reply)
+    batch = [{"id": str(i), "command": f"tool{i}", "description": "A tool."} for i in range(4)]
+
+    enrich_with_ai.tag_batch(batch)
+
+    # 4 commands, split down to single commands: 1 + 2 + 4 requests
+    assert len(prompts) == 7
@@ -0,0 +1,66 @@
+"""
+Tests for the normalized export and its decoders.
+"""
+
+import json
+import shutil
+import subprocess
+import pytest
+import utils
+import export_to_json
+
+DECODER_PATH = utils.ROOT_DIR / "lib" / "syntax-data.ts"
+TYPESCRIPT_PATH = utils.ROOT_DIR / "node_modules" / "typescript"
+
+# Transpiles the frontend decoder with the project's TypeScript and prints
+# what it makes of the file given as argument
+NODE_DECODE = """
+const fs = require("fs")
+const ts = require(process.argv[1])
+const source = fs.readFileSync(process.argv[2], "utf8")
+const output = ts.transpileModule(source, {
+  compilerOptions: { module: ts.ModuleKind.CommonJS, target: ts.ScriptTarget.ES2019 },
+}).outputText
+const module_ = { exports: {} }
+new Function("module", "exports", "require", output)(module_, module_.exports, require)
+const data = JSON.parse(fs.readFileSync(process.argv[3], "utf8"))
+process.stdout.write(JSON.stringify(module_.exports.decodeSyntaxData(data)))
+"""
+
+def records():
+    """Commands whose names and URLs contain replacement patterns"""
+    return [
+        {"id": "a", "command": "ls", "description": "List files.", "category": "file-management",
+         "tags": ["filesystem", "listing"],
+         "examples": [{"code": "ls -la", "description": "List all files"}],
+         "source": {"name": "TLDR Pages", "url": "https://github.com/tldr-pages/tldr/blob/main/pages/common/ls.md"},
+         "platform": "common", "locale": "en"},
+        {"id": "b", "command": "$&x$$", "description": "Odd name.", "category": "other",
+         "tags": ["filesystem"],
+         "source": {"name": "TLDR Pages", "url": "https://github.com/tldr-pages/tldr/blob/main/pages/common/$&x$$.md"},
+         "platform": "common", "locale": "en"},
+        {"id": "c", "command": "cmd", "description": "Odd path.", "category": "other", "tags": [],
+         "source": {"name": "TLDR Pages", "url": "https://github.com/tldr-pages/tldr/blob/main/pages/linux/$'$`{path}.md"},
+         "platform": "linux", "locale": "en", "rank": 3},
+    ]
+
+@pytest.fixture
+def normalized_file(tmp_path):
+    path = tmp_path / "syntax.json"
+    assert export_to_json.write_normalized(records(), path) == len(records())
+    return path
+
+def test_normalized_export_round_trips(normalized_file):
+    data = utils.load_json(normalized_file)
+    assert export_to_json.is_normalized(data)
+    assert export_to_json.decode_normalized(data) == records()
+
+@pytest.mark.skipif(shutil.which("node") is None or not TYPESCRIPT_PATH.exists(),
+                    reason="needs node and the project's node_modules")
+def test_frontend_decoder_matches_python(normalized_file):
+    result = subprocess.run(
+        ["node", "-e", NODE_DECODE, str(TYPESCRIPT_PATH), str(DECODER_PATH), str(normalized_file)],
+        capture_output=True, text=True, check=True
+    )
+    expected = export_to_json.decode_normalized(utils.load_json(normalized_file))
+    assert json.loads(result.stdout) == expected == records()
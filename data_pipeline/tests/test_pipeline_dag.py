@@ -0,0 +1,97 @@
+"""
+Tests for the stage runner's decisions about which stages to rerun.
+"""
+
+import time
+import threading
+import enrich_with_ai
+import pipeline_dag
+import run_pipeline
+
+def make_stage(tmp_path, records, runs, **kwargs):
+    """Build a stage that writes one output file and returns `records`"""
+    output = tmp_path / "ai.jsonl"
+
+    def run(results, persist):
+        runs.append(persist)
+        output.write_text("written")
+        return records
+
+    return pipeline_dag.Stage("ai", "AI step", run, outputs=[output], **kwargs)
+
+def test_up_to_date_stage_is_skipped(tmp_path):
+    runs = []
+    stage = make_stage(tmp_path, [{"id": "a"}], runs)
+    state_file = tmp_path / "state.json"
+
+    assert pipeline_dag.run_stages([stage], state_file=state_file)
+    assert pipeline_dag.run_stages([stage], state_file=state_file)
+    assert len(runs) == 1
+
+def test_stage_with_incomplete_records_reruns_until_complete(tmp_path):
+    runs = []
+    records = [
+        {"id": "a", "explanation": "Lists files.", "tags": ["filesystem"]},
+        {"id": "b", "explanation": None, "tags": []},
+    ]
+    stage = make_stage(tmp_path, records, runs, incomplete=enrich_with_ai.count_unenriched)
+    state_file = tmp_path / "state.json"
+
+    # A partial run, e.g. cut short by its time budget, is not up to date
+    assert pipeline_dag.run_stages([stage], state_file=state_file)
+    assert pipeline_dag.run_stages([stage], state_file=state_file)
+    assert len(runs) == 2
+
+    # Once a run finishes every record, the stage is skipped again
+    records[1].update(explanation="Copies files.", tags=["filesystem"])
+    assert pipeline_dag.run_stages([stage], state_file=state_file)
+    assert pipeline_dag.run_stages([stage], state_file=state_file)
+    assert len(runs) == 3
+
+def test_ai_stage_counts_unenriched_commands():
+    stages = {stage.name: stage for stage in run_pipeline.build_stages()}
+    assert stages["ai"].incomplete is enrich_with_ai.count_unenriched
+    assert enrich_with_ai.count_unenriched([
+        {"explanation": "Lists files.", "tags": ["filesystem"]},
+        {"explanation": "Lists files.", "tags": []},
+        {"tags": ["filesystem"]},
+    ]) == 2
+
+def test_skipped_intermediate_stage_reruns_once_without_blocking_other_stages(tmp_path):
+    runs = []
+    overlaps = {}
+    running = set()
+    lock = threading.Lock()
+
+    def track(name, records, duration=0.2):
+        def run(results, persist):
+            with lock:
+                runs.append(name)
+                overlaps[name] = set(running)
+                running.add(name)
+            time.sleep(duration)
+            with lock:
+                running.discard(name)
+            return records
+        return run
+
+    def make_stages():
+        return [
+            pipeline_dag.Stage("base", "Base", track("base", [{"id": "a"}]), intermediate=True),
+            pipeline_dag.Stage("left", "Left", track("left", 1), deps=["base"]),
+            pipeline_dag.Stage("right", "Right", track("right", 2), deps=["base"]),
+            pipeline_dag.Stage("quick", "Quick", track("quick", 3, 0.02)),
+            # Starts while base is being rerun
+            pipeline_dag.Stage("other", "Other", track("other", 4), deps=["quick"]),
+        ]
+
+    state_file = tmp_path / "state.json"
+    assert pipeline_dag.run_stages(make_stages(), state_file=state_file)
+    runs.clear()
+
+    # base is up to date but its records weren't kept, so both dependents
+    # need it rerun; it runs once, and the unrelated stage isn't held up
+    assert pipeline_dag.run_stages(make_stages(), force=["left", "right", "quick", "other"],
+                                   state_file=state_file)
+    assert sorted(runs) == ["base", "left", "other", "quick", "right"]
+    assert "base" in overlaps["other"]
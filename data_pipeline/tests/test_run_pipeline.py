@@ -0,0 +1,35 @@
+"""
+Tests for how the pipeline's stages hand records to each other.
+"""
+
+import pytest
+import utils
+import enrich_data
+import combine_all
+import export_to_json
+import run_pipeline
+
+STALE = [{"id": "stale", "command": "old", "description": "Left by an earlier run.",
+          "category": "other", "tags": []}]
+
+@pytest.fixture
+def stages(tmp_path, monkeypatch):
+    """The pipeline's stages by name, with stale intermediate files on disk"""
+    for module, name in ((enrich_data, "INPUT_FILE"), (combine_all, "ENRICHED_PATH"),
+                         (export_to_json, "INPUT_PATH")):
+        path = tmp_path / f"{module.__name__}_{name}.jsonl"
+        utils.write_jsonl(STALE, path)
+        monkeypatch.setattr(module, name, path)
+    monkeypatch.setattr(combine_all, "AI_EXPLANATIONS_PATH", tmp_path / "missing.jsonl")
+    monkeypatch.setattr(export_to_json, "OUTPUT_PATH", tmp_path / "syntax.json")
+    return {stage.name: stage for stage in run_pipeline.build_stages(skip_ai=True)}
+
+def test_empty_results_are_not_replaced_by_stale_files(stages):
+    assert list(stages["enrich"].run({"scrape": []}, False)) == []
+    assert list(stages["combine"].run({"enrich": []}, False)) == []
+    assert stages["export"].run({"combine": []}, True) == 0
+    assert utils.load_json(export_to_json.OUTPUT_PATH) == []
+
+def test_files_are_read_when_the_stage_did_not_run(stages):
+    combined = list(stages["combine"].run({}, False))
+    assert [command["id"] for command in combined] == ["stale"]
@@ -0,0 +1,73 @@
+"""
+Tests for incremental scraping of the TLDR pages.
+"""
+
+import shutil
+import subprocess
+import pytest
+import utils
+import scrape_tldr
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+TAR_PAGE = """# tar
+
+> Archiving utility.
+> More information: <https://www.gnu.org/software/tar>.
+
+- Create an archive from files:
+
+`tar cf {{path/to/target.tar}} {{path/to/file1 path/to/file2 ...}}`
+"""
+
+LS_PAGE = """# ls
+
+> List directory contents.
+
+- List files one per line:
+
+`ls -1`
+"""
+
+def git(repo, *args):
+    """Run a git command in the test repository"""
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=repo, check=True, capture_output=True)
+
+def commit_pages(repo, pages, message):
+    """Write pages into the repository and commit them"""
+    for path, content in pages.items():
+        page = repo / path
+        page.parent.mkdir(parents=True, exist_ok=True)
+        page.write_text(content, encoding="utf-8")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", message)
+
+@pytest.fixture
+def tldr_repo(tmp_path, monkeypatch):
+    """A local TLDR clone, with the scraper's files kept under tmp_path"""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q")
+    commit_pages(repo, {"pages/common/tar.md": TAR_PAGE, "pages/common/ls.md": LS_PAGE}, "Add pages")
+
+    monkeypatch.setattr(scrape_tldr, "CLONE_DIR", repo)
+    monkeypatch.setattr(scrape_tldr, "OUTPUT_FILE", tmp_path / "tldr_commands.jsonl")
+    monkeypatch.setattr(scrape_tldr, "STATE_FILE", tmp_path / "scrape_state.json")
+    monkeypatch.setattr(scrape_tldr, "SHARD_DIR", tmp_path / "shards")
+    monkeypatch.setattr(scrape_tldr, "SHARD_INDEX_FILE", tmp_path / "shards" / "index.json")
+    monkeypatch.setattr(scrape_tldr, "PARSE_CACHE_FILE", tmp_path / "parse_cache.json")
+    # Don't pull from GitHub
+    monkeypatch.setattr(scrape_tldr, "clone_tldr_repo", lambda: True)
+    return repo
+
+def test_changed_page_that_no_longer_parses_is_dropped(tldr_repo):
+    commands = scrape_tldr.scrape_tldr_pages(full=True)
+    assert sorted(command.command for command in commands) == ["ls", "tar"]
+
+    commit_pages(tldr_repo, {"pages/common/tar.md": "Not a TLDR page any more\n"}, "Break tar")
+    commands = scrape_tldr.scrape_tldr_pages()
+
+    assert [command.command for command in commands] == ["ls"]
+    assert [command.command for command in utils.iter_commands(scrape_tldr.OUTPUT_FILE)] == ["ls"]
+    assert [command["command"] for command in scrape_tldr.load_shard("en", "common")] == ["ls"]
@@ -0,0 +1,76 @@
+import { SyntaxItem } from "@/types"
+
+// Must match NORMALIZED_FORMAT and NORMALIZED_VERSION in data_pipeline/scripts/export_to_json.py
+const NORMALIZED_FORMAT = "syntaxscope-normalized"
+const NORMALIZED_VERSION = 1
+
+type SourceRef = number | [number, string] | Record<string, unknown>
+
+// Filled in one pass, with a function so "$&" and the like in values stay literal
+const URL_PLACEHOLDER = /\{(command|path)\}/g
+
+export type NormalizedSyntaxData = {
+  format: typeof NORMALIZED_FORMAT
+  version: number
+  // Field names, in the order of the values in each record
+  fields: string[]
+  records: unknown[][]
+  // Values of table fields (category, tags, ...), indexed by the records
+  tables: Record<string, unknown[]>
+  // Sources with a URL template: "{command}" and "{path}" are filled from the record
+  sources: Record<string, unknown>[]
+}
+
+function decodeSource(ref: SourceRef, command: string, sources: Record<string, unknown>[]) {
+  if (typeof ref !== "number" && !Array.isArray(ref)) return ref
+  const [index, path] = typeof ref === "number" ? [ref, ""] : ref
+  const source = { ...sources[index] }
+  if (typeof source.url === "string") {
+    source.url = source.url.replace(URL_PLACEHOLDER, (_match: string, name: string) =>
+      name === "command" ? command : path
+    )
+  }
+  return source
+}
+
+/**
+ * Turn syntax.json into items, whether it is a plain array of items or in
+ * the normalized format written by `export_to_json.py --normalized`.
+ */
+export function decodeSyntaxData(data: SyntaxItem[] | NormalizedSyntaxData): SyntaxItem[] {
+  if (Array.isArray(data)) return data
+  if (data.format !== NORMALIZED_FORMAT || data.version !== NORMALIZED_VERSION) {
+    throw new Error(`Unsupported syntax data format: ${data.format} version ${data.version}`)
+  }
+
+  const { fields, records, tables, sources } = data
+  const fieldTables = fields.map((field) => tables[field])
+  const examplesAt = fields.indexOf("examples")
+  const items = new Array<SyntaxItem>(records.length)
+
+  // Plain loops: this runs over every record on a cold load
+  for (let r = 0; r < records.length; r++) {
+    const row = records[r]
+    const item: Record<string, unknown> = {}
+    for (let i = 0; i < fields.length && i < row.length; i++) {
+      const value = row[i]
+      if (value === null || value === undefined) continue
+      const table = fieldTables[i]
+      if (table) {
+        item[fields[i]] = Array.isArray(value) ? value.map((index: number) => table[index]) : table[value as number]
+      } else if (i === examplesAt) {
+        item[fields[i]] = (value as unknown[]).map((example) =>
+          Array.isArray(example) ? { code: example[0], description: example[1] } : example
+        )
+      } else {
+        item[fields[i]] = value
+      }
+    }
+    if (row.length > fields.length) Object.assign(item, row[fields.length])
+    if (item.source !== undefined) {
+      item.source = decodeSource(item.source as SourceRef, String(item.command ?? ""), sources)
+    }
+    items[r] = item as SyntaxItem
+  }
+  return items
+}
@@ -26,4 +26,9 @@ export type SyntaxItem = {
   description: string;
   category: string;
   tags: string[];
+  explanation?: string;
+  examples?: { code: string; description: string }[];
+  source?: { name?: string; url?: string; license?: string };
+  platform?: string;
+  locale?: string;
 };